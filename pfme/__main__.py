@@ -1,9 +1,16 @@
 import argparse
 import datetime as dt
-import importlib.util
 import json
+import sys
 
+from typing import TextIO
+
+from pfme.cache import cached_simulate, ResultCache
 from pfme.config import SimulationConfig
+from pfme.export import save_npz, save_parquet
+from pfme.metric import RunMetric
+from pfme.profiling import Profiler
+from pfme.run import collect_metrics, load_simulation_config
 from pfme.simulation import Simulation
 
 
@@ -14,43 +21,79 @@ def parse_args() -> argparse.Namespace:
         type=str,
         required=True,
         help=(
-            "Path to a .py file defining a `get_config` function, taking no arguments, and returning "
-            "a SimulationConfig."
+            "Path to a .toml or .json scenario, or to a .py file defining a `get_config` function, "
+            "taking no arguments, and returning a SimulationConfig."
         ),
     )
-    return ap.parse_args()
-
-
-def load_simulation_config(config_path: str) -> SimulationConfig:
-    spec = importlib.util.spec_from_file_location("pfme._dynamically_loaded.config", config_path)
-
-    if spec is None:
-        raise ValueError(f"Config path didn't point to a valid python file: {config_path}.")
-    module = importlib.util.module_from_spec(spec)
-
-    spec.loader.exec_module(module)
-
-    try:
-        config = module.get_config()
-    except AttributeError:
-        raise ValueError(f"Config file didn't define get_config function: {config_path}.")
-
-    if not isinstance(config, SimulationConfig):
-        raise ValueError(
-            f"get_config did not return a SimulationConfig: {config_path}, {type(config)}."
-        )
-
-    return config
-
-
-def simulate(config: SimulationConfig) -> None:
+    ap.add_argument(
+        "--output-format",
+        choices=["json", "ndjson", "npz", "parquet"],
+        default="json",
+        help=(
+            "json prints one document once the run finishes. ndjson streams one line per metric "
+            "entry while the run progresses, between a start and an end line. npz and parquet "
+            "write the metric columns to --output, and print the JSON document without metrics."
+        ),
+    )
+    ap.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Path of the .npz file, or directory of .parquet files, for binary output formats.",
+    )
+    ap.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help=(
+            "Reuse results of identical earlier runs stored in this directory. Only applies to the "
+            "json output format, and not with --profile."
+        ),
+    )
+    ap.add_argument(
+        "--profile",
+        action="store_true",
+        help="Count calls and wall time of every strategy, metric and asset provider hook, and include them in the output.",
+    )
+    args = ap.parse_args()
+    if args.output_format in ("npz", "parquet") and args.output is None:
+        ap.error(f"--output is required with --output-format {args.output_format}")
+    return args
+
+
+def simulate_ndjson(config: SimulationConfig, args: argparse.Namespace, out: TextIO) -> None:
+    """Run config, writing results to out as newline-delimited JSON.
+
+    Metric entries are written as they are calculated and not kept, so
+    memory use doesn't grow with the length of the run. Every line is
+    flushed, so consumers of a pipe see it as soon as it is written.
+    """
+    def write_line(line: dict) -> None:
+        out.write(json.dumps(line))
+        out.write("\n")
+        out.flush()
+
+    def sink(metric: RunMetric, entry: dict) -> None:
+        write_line({"type": "metric", "metric": metric.name(), **entry})
+
+    profiler = Profiler() if getattr(args, "profile", False) else None
+    write_line({
+        "type": "start",
+        "start_time": dt.datetime.now(dt.UTC).isoformat(),
+        "args": vars(args),
+    })
     Simulation(
         config=config,
+        sink=sink,
+        profiler=profiler,
     ).run()
-    captured_metrics = {}
-    for metric in config.metrics:
-        captured_metrics[metric.name()] = metric.values
-    return captured_metrics
+    end_line = {
+        "type": "end",
+        "end_time": dt.datetime.now(dt.UTC).isoformat(),
+    }
+    if profiler is not None:
+        end_line["profile"] = profiler.report()
+    write_line(end_line)
 
 
 def main() -> None:
@@ -58,16 +101,34 @@ def main() -> None:
 
     config = load_simulation_config(args.config)
 
+    if args.output_format == "ndjson":
+        simulate_ndjson(config, args, sys.stdout)
+        return
+
+    profiler = Profiler() if args.profile else None
     start_time = dt.datetime.now(dt.UTC)
-    captured_metrics = simulate(config)
+    if args.cache_dir is not None and args.output_format == "json" and profiler is None:
+        captured_metrics = cached_simulate(config, ResultCache(args.cache_dir))
+    else:
+        simulation = Simulation(config, profiler=profiler)
+        simulation.run()
+        captured_metrics = collect_metrics(simulation.metrics)
     end_time = dt.datetime.now(dt.UTC)
 
     result_dict = {
         "start_time": start_time.isoformat(),
         "end_time": end_time.isoformat(),
         "args": vars(args),
-        "metrics": captured_metrics,
     }
+    if profiler is not None:
+        result_dict["profile"] = profiler.report()
+
+    if args.output_format == "npz":
+        save_npz(args.output, simulation.metrics)
+    elif args.output_format == "parquet":
+        save_parquet(args.output, simulation.metrics)
+    else:
+        result_dict["metrics"] = captured_metrics
 
     print(json.dumps(result_dict))
 
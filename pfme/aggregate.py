@@ -0,0 +1,234 @@
+"""Cross-path statistics that take constant memory per year.
+
+Each aggregate is updated with the values of any number of paths at a
+time, and aggregates of separate sets of paths, e.g. from different
+workers, merge into the aggregate of all of them.
+"""
+import math
+
+import numpy as np
+
+
+class QuantileSketch:
+    """Distribution of values, answering quantiles to within a relative error.
+
+    Values are counted in logarithmic buckets: a positive value v lands in
+    bucket ceil(log_gamma(v)), with gamma = (1 + a) / (1 - a) for relative
+    accuracy a, and negative values likewise by magnitude. Every value in a
+    bucket is within a of the bucket's representative, so quantiles are
+    too. The number of buckets grows with the log of the range of values,
+    not with how many are added, and merging two sketches just adds their
+    bucket counts, which is exact.
+    """
+    relative_accuracy: float
+    count: int
+    zero_count: int
+    positive: dict[int, int]
+    negative: dict[int, int]
+    min: float
+    max: float
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"Relative accuracy must be between 0 and 1, got {relative_accuracy}.")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.zero_count = 0
+        self.positive = {}
+        self.negative = {}
+        self.min = math.inf
+        self.max = -math.inf
+
+    @staticmethod
+    def _count_into(store: dict[int, int], indices: np.ndarray) -> None:
+        keys, counts = np.unique(indices, return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def add(self, values: np.ndarray | float) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not len(values):
+            return
+        if np.isnan(values).any():
+            raise ValueError("Can't add NaN to a quantile sketch")
+
+        positive = values[values > 0]
+        negative = -values[values < 0]
+        self._count_into(self.positive, np.ceil(np.log(positive) / self._log_gamma).astype(np.int64))
+        self._count_into(self.negative, np.ceil(np.log(negative) / self._log_gamma).astype(np.int64))
+        self.zero_count += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add all values counted by other."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Can only merge sketches with the same relative accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _representative(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        """Value below which a fraction q of the values lie."""
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be between 0 and 1, got {q}.")
+        if self.count == 0:
+            return math.nan
+
+        rank = q * (self.count - 1)
+        seen = 0
+        # From the most negative value up to the most positive one
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._representative(key), self.min)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._representative(key), self.max)
+        return self.max
+
+
+class Moments:
+    """Count, mean and variance, merged with Chan et al.'s pairwise update."""
+    count: int
+    mean: float
+    # Sum of squared deviations from the mean
+    m2: float
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        total = self.count + count
+        if total == 0:
+            return
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    def add(self, values: np.ndarray | float) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()))
+
+    def merge(self, other: "Moments") -> None:
+        self._combine(other.count, other.mean, other.m2)
+
+    def variance(self) -> float:
+        """Sample variance."""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+
+class YearlyDistribution:
+    """Quantile sketch and moments of a numeric metric, per recorded year."""
+    relative_accuracy: float
+    years: list[float]
+    sketches: list[QuantileSketch]
+    moments: list[Moments]
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.years = []
+        self.sketches = []
+        self.moments = []
+
+    def add(self, row: int, year: float, values: np.ndarray | float) -> None:
+        """Add the values of any number of paths at the row-th recorded year."""
+        while len(self.years) <= row:
+            self.years.append(math.nan)
+            self.sketches.append(QuantileSketch(self.relative_accuracy))
+            self.moments.append(Moments())
+        self.years[row] = year
+        self.sketches[row].add(values)
+        self.moments[row].add(values)
+
+    def add_path(self, years: np.ndarray, values: np.ndarray) -> None:
+        """Add one path's series, e.g. a scalar run's metric data."""
+        for row, (year, value) in enumerate(zip(years.tolist(), values.tolist())):
+            self.add(row, year, value)
+
+    def merge(self, other: "YearlyDistribution") -> None:
+        for row, year in enumerate(other.years):
+            if row < len(self.years):
+                if self.years[row] != year:
+                    raise ValueError(f"Can't merge distributions recorded at different years: {self.years[row]}, {year}.")
+                self.sketches[row].merge(other.sketches[row])
+                self.moments[row].merge(other.moments[row])
+            else:
+                self.years.append(year)
+                self.sketches.append(QuantileSketch(self.relative_accuracy))
+                self.sketches[row].merge(other.sketches[row])
+                self.moments.append(Moments())
+                self.moments[row].merge(other.moments[row])
+
+    def summary(self, quantiles: tuple[float, ...]) -> list[dict]:
+        return [
+            {
+                "year": year,
+                "value": {
+                    **{f"p{100 * q:g}": sketch.quantile(q) for q in quantiles},
+                    "mean": moments.mean,
+                    "std": math.sqrt(moments.variance()),
+                    "count": moments.count,
+                },
+            }
+            for year, sketch, moments in zip(self.years, self.sketches, self.moments)
+        ]
+
+
+class YearlyFrequency:
+    """Fraction of paths for which a boolean metric is true, per recorded year."""
+    years: list[float]
+    true_counts: list[int]
+    counts: list[int]
+
+    def __init__(self):
+        self.years = []
+        self.true_counts = []
+        self.counts = []
+
+    def add(self, row: int, year: float, values: np.ndarray | bool) -> None:
+        values = np.asarray(values, dtype=bool).ravel()
+        while len(self.years) <= row:
+            self.years.append(math.nan)
+            self.true_counts.append(0)
+            self.counts.append(0)
+        self.years[row] = year
+        self.true_counts[row] += int(values.sum())
+        self.counts[row] += len(values)
+
+    def add_path(self, years: np.ndarray, values: np.ndarray) -> None:
+        for row, (year, value) in enumerate(zip(years.tolist(), values.tolist())):
+            self.add(row, year, value)
+
+    def merge(self, other: "YearlyFrequency") -> None:
+        for row, year in enumerate(other.years):
+            if row < len(self.years) and self.years[row] != year:
+                raise ValueError(f"Can't merge frequencies recorded at different years: {self.years[row]}, {year}.")
+            self.add(row, year, np.empty(0, dtype=bool))
+            self.true_counts[row] += other.true_counts[row]
+            self.counts[row] += other.counts[row]
+
+    def summary(self) -> list[dict]:
+        return [
+            {"year": year, "value": true_count / count if count else math.nan}
+            for year, true_count, count in zip(self.years, self.true_counts, self.counts)
+        ]
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 from abc import ABC, abstractmethod
 from enum import Enum, auto
 from typing import TypeVar
@@ -12,6 +14,13 @@ class Asset(Enum):
 
 
 class AssetProvider(ABC):
+    def prepare(self, n_steps: int, increment: float) -> None:
+        """Called once before a run of n_steps steps of size increment.
+
+        Providers can use this to precompute their whole trajectory.
+        """
+        pass
+
     @abstractmethod
     def update_value(self, year: float, increment: float) -> None:
         """Update the asset value.
@@ -23,6 +32,17 @@ class AssetProvider(ABC):
         """
         ...
 
+    def advance(self, year: float, increment: float, n_steps: int) -> None:
+        """Same as n_steps calls to update_value, the last one for year."""
+        for i in range(n_steps - 1, -1, -1):
+            self.update_value(year - i * increment, increment)
+
+    def step_growth(self, increment: float) -> float | None:
+        """Factor the value grows by in every step of size increment, or
+        None if that differs between steps.
+        """
+        return None
+
     def value(self) -> float:
         ...
 
@@ -36,15 +56,150 @@ class ConstantGeomIncreaseAsset(AssetProvider):
     growth_rate: float
 
     _value: float
+    _step: int
+    _increment: float
+    _trajectory: list[float]
 
     def __init__(self, starting_value: float, growth_rate: float):
         self.starting_value = starting_value
         self.growth_rate = growth_rate
         self._value = starting_value
+        self._step = 0
+        self._increment = math.nan
+        self._trajectory = []
+
+    def trajectory(self, n_steps: int, increment: float) -> np.ndarray:
+        """Closed-form value after each of 0, 1, ..., n_steps steps."""
+        return self.starting_value * (1 + self.growth_rate) ** (np.arange(n_steps + 1) * increment)
+
+    def prepare(self, n_steps: int, increment: float) -> None:
+        self._increment = increment
+        self._trajectory = self.trajectory(n_steps, increment).tolist()
 
     def update_value(self, _year: float, increment: float) -> None:
-        if not math.isnan(increment):
+        if math.isnan(increment):
+            self._step = 0
+            self._value = self.starting_value
+            return
+
+        self._step += 1
+        if increment == self._increment and self._step < len(self._trajectory):
+            self._value = self._trajectory[self._step]
+        else:
+            # Off the prepared grid, the trajectory no longer applies
+            self._trajectory = []
             self._value *= (1 + self.growth_rate) ** increment
 
+    def advance(self, year: float, increment: float, n_steps: int) -> None:
+        if increment == self._increment and self._step + n_steps < len(self._trajectory):
+            self._step += n_steps
+            self._value = self._trajectory[self._step]
+        else:
+            super().advance(year, increment, n_steps)
+
+    def step_growth(self, increment: float) -> float:
+        return (1 + self.growth_rate) ** increment
+
     def value(self) -> float:
         return self._value
+
+
+class StochasticAsset(AssetProvider):
+    """Asset with random log-returns.
+
+    The log-return over a step of length dt is
+    (log(1 + growth_rate) - volatility^2 / 2) * dt + volatility * sqrt(dt) * shock,
+    where shock has zero mean and unit variance. With normal shocks the
+    expected value grows like ConstantGeomIncreaseAsset with the same
+    growth_rate.
+
+    All shocks of a run are drawn in one call in `prepare`, so that
+    `update_value` only indexes into the precomputed growth factors.
+    """
+    starting_value: float
+    growth_rate: float
+    volatility: float
+    seed: int | None
+
+    _value: float
+    _step: int
+    _increment: float
+    _growth_factors: np.ndarray
+
+    def __init__(
+        self,
+        starting_value: float,
+        growth_rate: float,
+        volatility: float,
+        seed: int | None = None,
+    ):
+        self.starting_value = starting_value
+        self.growth_rate = growth_rate
+        self.volatility = volatility
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self._value = starting_value
+        self._step = 0
+        self._increment = math.nan
+        self._growth_factors = np.empty(0)
+
+    @abstractmethod
+    def draw_shocks(self, size: int | tuple[int, ...]) -> np.ndarray:
+        """Draw zero-mean, unit-variance shocks."""
+        ...
+
+    def growth_factors(self, shocks: np.ndarray, increment: float) -> np.ndarray:
+        log_drift = math.log1p(self.growth_rate) - 0.5 * self.volatility ** 2
+        return np.exp(log_drift * increment + self.volatility * math.sqrt(increment) * shocks)
+
+    def prepare(self, n_steps: int, increment: float) -> None:
+        self._increment = increment
+        self._growth_factors = self.growth_factors(self.draw_shocks(n_steps), increment)
+
+    def update_value(self, _year: float, increment: float) -> None:
+        if math.isnan(increment):
+            self._step = 0
+            self._value = self.starting_value
+            return
+
+        if increment == self._increment and self._step < len(self._growth_factors):
+            factor = self._growth_factors[self._step]
+        else:
+            # Not prepared for this step, e.g. when driven by hand
+            factor = self.growth_factors(self.draw_shocks(1), increment)[0]
+        self._step += 1
+        self._value *= float(factor)
+
+    def value(self) -> float:
+        return self._value
+
+
+class GeometricBrownianMotionAsset(StochasticAsset):
+    def draw_shocks(self, size: int | tuple[int, ...]) -> np.ndarray:
+        return self.rng.standard_normal(size)
+
+
+class StudentTAsset(StochasticAsset):
+    """Fat-tailed variant of GeometricBrownianMotionAsset.
+
+    Shocks are Student-t distributed, rescaled to unit variance, which needs
+    degrees_of_freedom > 2.
+    """
+    degrees_of_freedom: float
+
+    def __init__(
+        self,
+        starting_value: float,
+        growth_rate: float,
+        volatility: float,
+        degrees_of_freedom: float,
+        seed: int | None = None,
+    ):
+        if degrees_of_freedom <= 2:
+            raise ValueError(f"Student-t shocks need degrees_of_freedom > 2, got {degrees_of_freedom}.")
+        self.degrees_of_freedom = degrees_of_freedom
+        super().__init__(starting_value, growth_rate, volatility, seed)
+
+    def draw_shocks(self, size: int | tuple[int, ...]) -> np.ndarray:
+        nu = self.degrees_of_freedom
+        return self.rng.standard_t(nu, size) * math.sqrt((nu - 2) / nu)
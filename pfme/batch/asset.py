@@ -0,0 +1,339 @@
+import importlib.util
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from typing import TypeVar
+
+import math
+
+import numpy as np
+
+from pfme.asset import (
+    Asset,
+    AssetProvider,
+    ConstantGeomIncreaseAsset,
+    GeometricBrownianMotionAsset,
+    StochasticAsset,
+    StudentTAsset,
+)
+from pfme.correlated import CorrelatedAsset, ReturnsModel
+
+
+SAMPLING_METHODS = ("plain", "antithetic", "sobol")
+
+
+class BatchAssetProvider(ABC):
+    """Batched counterpart of AssetProvider, tracking one value per path."""
+    n_paths: int = 1
+
+    def prepare(self, n_paths: int, n_steps: int, increment: float) -> None:
+        """Called once before a run of n_paths paths, each n_steps steps of size increment.
+
+        Called by the engine before the initial update_value.
+        """
+        self.n_paths = n_paths
+
+    @abstractmethod
+    def update_value(self, year: float, increment: float) -> None:
+        """Update the asset values of all paths.
+
+        Same contract as AssetProvider.update_value.
+        """
+        ...
+
+    @abstractmethod
+    def value(self) -> np.ndarray:
+        """Value per unit of the asset, with shape (n_paths,)."""
+        ...
+
+    @classmethod
+    def from_scalar(cls, provider: AssetProvider) -> "BatchAssetProvider":
+        """Batched counterpart of provider."""
+        raise ValueError(f"Can't build {cls.__name__} from asset provider {type(provider).__name__}.")
+
+
+BatchAssetProviderType = TypeVar('BatchAssetProviderType', bound=BatchAssetProvider)
+
+
+class BatchConstantGeomIncreaseAsset(BatchAssetProvider):
+    starting_value: float
+    growth_rate: float
+
+    _value: np.ndarray
+    _step: int
+    _increment: float
+    _trajectory: np.ndarray
+
+    def __init__(self, starting_value: float, growth_rate: float):
+        self.starting_value = starting_value
+        self.growth_rate = growth_rate
+        self._value = np.full(self.n_paths, starting_value)
+        self._step = 0
+        self._increment = math.nan
+        self._trajectory = np.empty((0, self.n_paths))
+
+    def prepare(self, n_paths: int, n_steps: int, increment: float) -> None:
+        super().prepare(n_paths, n_steps, increment)
+        self._increment = increment
+        trajectory = ConstantGeomIncreaseAsset(self.starting_value, self.growth_rate).trajectory(n_steps, increment)
+        # Every path has the same value, so each row is a broadcast view
+        self._trajectory = np.broadcast_to(trajectory[:, np.newaxis], (n_steps + 1, n_paths))
+
+    def update_value(self, _year: float, increment: float) -> None:
+        if math.isnan(increment):
+            self._step = 0
+            self._value = np.full(self.n_paths, self.starting_value)
+            return
+
+        self._step += 1
+        if increment == self._increment and self._step < len(self._trajectory):
+            self._value = self._trajectory[self._step]
+        else:
+            self._trajectory = np.empty((0, self.n_paths))
+            self._value = self._value * (1 + self.growth_rate) ** increment
+
+    def value(self) -> np.ndarray:
+        return self._value
+
+    @classmethod
+    def from_scalar(cls, provider: ConstantGeomIncreaseAsset) -> "BatchConstantGeomIncreaseAsset":
+        return cls(provider.starting_value, provider.growth_rate)
+
+
+class BatchStochasticAsset(BatchAssetProvider):
+    """Batched counterpart of StochasticAsset.
+
+    Shocks for all paths and steps are drawn in one call in `prepare`, one
+    path after another, so path 0 reproduces a StochasticAsset with the
+    same seed.
+
+    sampling selects how the shocks are drawn:
+
+    - "plain": independent draws.
+    - "antithetic": the second half of the paths takes the negated shocks
+      of the first half, path i pairing with path i + ceil(n_paths / 2).
+    - "sobol": scrambled Sobol points, one dimension per step, mapped
+      through the inverse CDF of the shocks. Needs scipy, and is best
+      balanced when n_paths is a power of 2.
+
+    sampling is checked when set, so an unusable method fails before a run.
+    """
+    starting_value: float
+    growth_rate: float
+    volatility: float
+    seed: int | None
+
+    _sampling: str
+
+    _value: np.ndarray
+    _step: int
+    _increment: float
+    # Shape (n_steps, n_paths), so that each step reads one contiguous row
+    _growth_factors: np.ndarray
+
+    def __init__(
+        self,
+        starting_value: float,
+        growth_rate: float,
+        volatility: float,
+        seed: int | None = None,
+        sampling: str = "plain",
+    ):
+        self.starting_value = starting_value
+        self.growth_rate = growth_rate
+        self.volatility = volatility
+        self.seed = seed
+        self.sampling = sampling
+        self.rng = np.random.default_rng(seed)
+        self._value = np.full(self.n_paths, starting_value)
+        self._step = 0
+        self._increment = math.nan
+        self._growth_factors = np.empty((0, self.n_paths))
+
+    @property
+    def sampling(self) -> str:
+        return self._sampling
+
+    @sampling.setter
+    def sampling(self, sampling: str) -> None:
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling {sampling!r}, expected one of {', '.join(SAMPLING_METHODS)}.")
+        if sampling == "sobol" and importlib.util.find_spec("scipy") is None:
+            raise ImportError("Sobol sampling needs scipy, install it with `pip install scipy`.")
+        self._sampling = sampling
+
+    @abstractmethod
+    def draw_shocks(self, size: int | tuple[int, ...]) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def shocks_from_uniforms(self, uniforms: np.ndarray) -> np.ndarray:
+        """Map uniforms on (0, 1) to shocks, for Sobol sampling."""
+        ...
+
+    def sample_shocks(self, n_paths: int, n_steps: int) -> np.ndarray:
+        """Shocks for a run, with shape (n_paths, n_steps)."""
+        if self.sampling == "antithetic":
+            half = self.draw_shocks(((n_paths + 1) // 2, n_steps))
+            return np.concatenate([half, -half])[:n_paths]
+        if self.sampling == "sobol":
+            from scipy.stats import qmc
+            uniforms = qmc.Sobol(n_steps, scramble=True, seed=self.rng).random(n_paths)
+            return self.shocks_from_uniforms(uniforms)
+        return self.draw_shocks((n_paths, n_steps))
+
+    def growth_factors(self, shocks: np.ndarray, increment: float) -> np.ndarray:
+        log_drift = math.log1p(self.growth_rate) - 0.5 * self.volatility ** 2
+        return np.exp(log_drift * increment + self.volatility * math.sqrt(increment) * shocks)
+
+    def prepare(self, n_paths: int, n_steps: int, increment: float) -> None:
+        super().prepare(n_paths, n_steps, increment)
+        self._increment = increment
+        shocks = self.sample_shocks(n_paths, n_steps)
+        self._growth_factors = np.ascontiguousarray(self.growth_factors(shocks, increment).T)
+
+    def update_value(self, _year: float, increment: float) -> None:
+        if math.isnan(increment):
+            self._step = 0
+            self._value = np.full(self.n_paths, self.starting_value)
+            return
+
+        if increment == self._increment and self._step < len(self._growth_factors):
+            factors = self._growth_factors[self._step]
+        else:
+            factors = self.growth_factors(self.draw_shocks(self.n_paths), increment)
+        self._step += 1
+        self._value = self._value * factors
+
+    def value(self) -> np.ndarray:
+        return self._value
+
+    @classmethod
+    def from_scalar(cls, provider: StochasticAsset) -> "BatchStochasticAsset":
+        return cls(provider.starting_value, provider.growth_rate, provider.volatility, provider.seed)
+
+
+class BatchGeometricBrownianMotionAsset(BatchStochasticAsset):
+    def draw_shocks(self, size: int | tuple[int, ...]) -> np.ndarray:
+        return self.rng.standard_normal(size)
+
+    def shocks_from_uniforms(self, uniforms: np.ndarray) -> np.ndarray:
+        from scipy.stats import norm
+        return norm.ppf(uniforms)
+
+
+class BatchStudentTAsset(BatchStochasticAsset):
+    degrees_of_freedom: float
+
+    def __init__(
+        self,
+        starting_value: float,
+        growth_rate: float,
+        volatility: float,
+        degrees_of_freedom: float,
+        seed: int | None = None,
+        sampling: str = "plain",
+    ):
+        if degrees_of_freedom <= 2:
+            raise ValueError(f"Student-t shocks need degrees_of_freedom > 2, got {degrees_of_freedom}.")
+        self.degrees_of_freedom = degrees_of_freedom
+        super().__init__(starting_value, growth_rate, volatility, seed, sampling)
+
+    def draw_shocks(self, size: int | tuple[int, ...]) -> np.ndarray:
+        nu = self.degrees_of_freedom
+        return self.rng.standard_t(nu, size) * math.sqrt((nu - 2) / nu)
+
+    def shocks_from_uniforms(self, uniforms: np.ndarray) -> np.ndarray:
+        from scipy.stats import t
+        nu = self.degrees_of_freedom
+        return t.ppf(uniforms, nu) * math.sqrt((nu - 2) / nu)
+
+    @classmethod
+    def from_scalar(cls, provider: StudentTAsset) -> "BatchStudentTAsset":
+        return cls(
+            provider.starting_value,
+            provider.growth_rate,
+            provider.volatility,
+            provider.degrees_of_freedom,
+            provider.seed,
+        )
+
+
+class BatchCorrelatedAsset(BatchAssetProvider):
+    """Batched counterpart of CorrelatedAsset."""
+    model: ReturnsModel
+    asset: Asset
+    starting_value: float
+
+    _value: np.ndarray
+    _step: int
+    _increment: float
+    _growth_factors: np.ndarray
+
+    def __init__(self, model: ReturnsModel, asset: Asset, starting_value: float):
+        if asset not in model.assets:
+            raise ValueError(f"Asset {asset.name} is not part of the returns model.")
+        self.model = model
+        self.asset = asset
+        self.starting_value = starting_value
+        self._value = np.full(self.n_paths, starting_value)
+        self._step = 0
+        self._increment = math.nan
+        self._growth_factors = np.empty((0, self.n_paths))
+
+    def prepare(self, n_paths: int, n_steps: int, increment: float) -> None:
+        super().prepare(n_paths, n_steps, increment)
+        self._increment = increment
+        self._growth_factors = self.model.growth_factors(self.asset, n_paths, n_steps, increment)
+
+    def update_value(self, _year: float, increment: float) -> None:
+        if math.isnan(increment):
+            self._step = 0
+            self._value = np.full(self.n_paths, self.starting_value)
+            return
+
+        if increment != self._increment or self._step >= len(self._growth_factors):
+            raise ValueError("BatchCorrelatedAsset must be prepared for the time grid it is run on")
+        self._value = self._value * self._growth_factors[self._step]
+        self._step += 1
+
+    def value(self) -> np.ndarray:
+        return self._value
+
+    @classmethod
+    def from_scalar(cls, provider: CorrelatedAsset) -> "BatchCorrelatedAsset":
+        return cls(provider.model, provider.asset, provider.starting_value)
+
+
+_COUNTERPARTS: dict[type, type[BatchAssetProvider]] = {
+    ConstantGeomIncreaseAsset: BatchConstantGeomIncreaseAsset,
+    GeometricBrownianMotionAsset: BatchGeometricBrownianMotionAsset,
+    StudentTAsset: BatchStudentTAsset,
+    CorrelatedAsset: BatchCorrelatedAsset,
+}
+
+
+def to_batch_asset_provider(provider: AssetProvider | BatchAssetProvider) -> BatchAssetProvider:
+    if isinstance(provider, BatchAssetProvider):
+        return provider
+    try:
+        counterpart = _COUNTERPARTS[type(provider)]
+    except KeyError:
+        raise ValueError(f"No batched counterpart for asset provider {type(provider).__name__}.")
+    return counterpart.from_scalar(provider)
+
+
+def reseed(providers: Iterable[BatchAssetProvider], seed: np.random.SeedSequence) -> None:
+    """Give every random source of providers a stream spawned from seed,
+    and drop draws cached under the previous streams.
+    """
+    sources = {}
+    for provider in providers:
+        # Correlated providers draw from their shared returns model
+        for source in (provider, getattr(provider, "model", None)):
+            if hasattr(source, "rng"):
+                sources.setdefault(id(source), source)
+    for source, child in zip(sources.values(), seed.spawn(len(sources))):
+        source.rng = np.random.default_rng(child)
+        if hasattr(source, "clear"):
+            source.clear()
@@ -0,0 +1,222 @@
+import copy
+
+from abc import ABC, abstractmethod
+from typing import TypeVar
+
+import numpy as np
+
+from pfme.aggregate import YearlyDistribution, YearlyFrequency
+from pfme.asset import Asset
+from pfme.batch.portfolio import BatchPortfolio, EXPENSE_COLUMNS, INCOME_COLUMNS
+from pfme.metric import CashflowStatement, FIReached, HoldingsByAsset, RunMetric, TotalAssets
+
+
+class BatchRunMetric(ABC):
+    """Batched counterpart of RunMetric.
+
+    Each recorded value holds the metric for every path, with the path as
+    the leading axis.
+    """
+    def __init__(self):
+        self.values = []
+
+    def new_run(self) -> "BatchRunMetric":
+        """Same as RunMetric.new_run."""
+        run = copy.copy(self)
+        BatchRunMetric.__init__(run)
+        return run
+
+    def name(self):
+        return type(self).__name__
+
+    def requested_assets(self) -> set[Asset]:
+        return set()
+
+    @abstractmethod
+    def calculate(self, portfolio: BatchPortfolio):
+        ...
+
+    def record(self, portfolio: BatchPortfolio, year: float):
+        value = self.calculate(portfolio)
+        self.values.append(
+            {
+                "year": year,
+                "value": value,
+            }
+        )
+
+    @classmethod
+    def from_scalar(cls, metric: RunMetric) -> "BatchRunMetric":
+        return cls()
+
+
+BatchRunMetricType = TypeVar('BatchRunMetricType', bound=BatchRunMetric)
+
+
+class BatchTotalAssets(BatchRunMetric):
+    def calculate(self, portfolio: BatchPortfolio):
+        return portfolio.current_value()
+
+
+class BatchHoldingsByAsset(BatchRunMetric):
+    def calculate(self, portfolio: BatchPortfolio):
+        return [
+            {
+                "asset": asset.name,
+                "units": portfolio.units_of_asset_held(asset).copy(),
+                "unit_value": portfolio.asset_value_per_unit(asset).copy(),
+            }
+            for asset in portfolio.assets
+        ]
+
+
+class BatchFIReached(BatchRunMetric):
+    withdrawal_rate: float
+
+    def __init__(self, withdrawal_rate: float):
+        self.withdrawal_rate = withdrawal_rate
+        super().__init__()
+
+    def calculate(self, portfolio: BatchPortfolio):
+        return (
+            portfolio.current_value() * self.withdrawal_rate
+            >= portfolio.total_expenses()
+        )
+
+    @classmethod
+    def from_scalar(cls, metric: FIReached) -> "BatchFIReached":
+        return cls(metric.withdrawal_rate)
+
+
+class BatchUnitValue(BatchRunMetric):
+    """Value per unit of one asset."""
+    asset: Asset
+
+    def __init__(self, asset: Asset):
+        self.asset = asset
+        super().__init__()
+
+    def requested_assets(self) -> set[Asset]:
+        return {self.asset}
+
+    def calculate(self, portfolio: BatchPortfolio):
+        return portfolio.asset_value_per_unit(self.asset).copy()
+
+
+class BatchCashflowStatement(BatchRunMetric):
+    def calculate(self, portfolio: BatchPortfolio):
+        return {
+            "income": [
+                {
+                    "name": key.name,
+                    "value": portfolio.income[:, column].copy(),
+                }
+                for key, column in INCOME_COLUMNS.items()
+            ],
+            "expenses": [
+                {
+                    "name": key.name,
+                    "value": portfolio.expenses[:, column].copy(),
+                }
+                for key, column in EXPENSE_COLUMNS.items()
+            ]
+        }
+
+
+class BatchAggregate(BatchRunMetric):
+    """Reducer of another batched metric across paths.
+
+    Rather than keeping every path's value, each recorded value is folded
+    into per-year statistics, so memory doesn't grow with the number of
+    paths. The same reducer may be recorded by several batches of paths
+    in turn, and reducers of separate batches combine with merge.
+    """
+    metric: BatchRunMetric
+
+    def __init__(self, metric: BatchRunMetric):
+        # values are derived from the statistics, not stored
+        self.metric = metric
+        self._rows: dict[float, int] = {}
+
+    def new_run(self) -> "BatchAggregate":
+        # Shared on purpose, so that one reducer records successive runs
+        return self
+
+    def name(self):
+        return f"{type(self).__name__}({self.metric.name()})"
+
+    def requested_assets(self) -> set[Asset]:
+        return self.metric.requested_assets()
+
+    def calculate(self, portfolio: BatchPortfolio):
+        return self.metric.calculate(portfolio)
+
+    def record(self, portfolio: BatchPortfolio, year: float):
+        row = self._rows.setdefault(year, len(self._rows))
+        self.statistics.add(row, year, self.calculate(portfolio))
+
+    def merge(self, other: "BatchAggregate") -> None:
+        """Add the paths reduced by other."""
+        for year in other.statistics.years:
+            self._rows.setdefault(year, len(self._rows))
+        self.statistics.merge(other.statistics)
+
+
+class BatchQuantiles(BatchAggregate):
+    """Quantiles, mean and standard deviation of a numeric metric per year.
+
+    Quantiles are estimated by a QuantileSketch to within
+    relative_accuracy.
+    """
+    quantiles: tuple[float, ...]
+    statistics: YearlyDistribution
+
+    def __init__(
+        self,
+        metric: BatchRunMetric,
+        quantiles: tuple[float, ...] = (0.05, 0.5, 0.95),
+        relative_accuracy: float = 0.01,
+    ):
+        super().__init__(metric)
+        self.quantiles = quantiles
+        self.statistics = YearlyDistribution(relative_accuracy)
+
+    @property
+    def values(self):
+        return self.statistics.summary(self.quantiles)
+
+
+class BatchProbability(BatchAggregate):
+    """Fraction of paths for which a boolean metric holds, per year."""
+    statistics: YearlyFrequency
+
+    def __init__(self, metric: BatchRunMetric):
+        super().__init__(metric)
+        self.statistics = YearlyFrequency()
+
+    @property
+    def values(self):
+        return self.statistics.summary()
+
+
+_COUNTERPARTS: dict[type, type[BatchRunMetric]] = {
+    TotalAssets: BatchTotalAssets,
+    HoldingsByAsset: BatchHoldingsByAsset,
+    FIReached: BatchFIReached,
+    CashflowStatement: BatchCashflowStatement,
+}
+
+
+def to_batch_metric(metric: RunMetric | BatchRunMetric) -> BatchRunMetric:
+    if isinstance(metric, BatchRunMetric):
+        return metric
+    try:
+        counterpart = _COUNTERPARTS[type(metric)]
+    except KeyError:
+        raise ValueError(f"No batched counterpart for metric {type(metric).__name__}.")
+    return counterpart.from_scalar(metric)
+
+
+def stack_values(metric: BatchRunMetric) -> np.ndarray:
+    """Stack the recorded values of an array-valued metric into (n_steps, n_paths)."""
+    return np.stack([entry["value"] for entry in metric.values])
@@ -0,0 +1,78 @@
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.batch.asset import BatchAssetProviderType
+from pfme.portfolio import Expense, Income
+
+# Column of each income / expense kind in the batched income and expense arrays
+INCOME_COLUMNS: dict[Income, int] = {income: i for i, income in enumerate(Income)}
+EXPENSE_COLUMNS: dict[Expense, int] = {expense: i for i, expense in enumerate(Expense)}
+
+
+class BatchPortfolio:
+    """Portfolio state of n_paths independent paths.
+
+    Every quantity is a float array whose first axis is the path:
+    holdings and unit prices are (n_paths, n_assets), with assets in the
+    column order of `assets`; income and expenses are (n_paths, len(Income))
+    and (n_paths, len(Expense)), indexed via INCOME_COLUMNS / EXPENSE_COLUMNS.
+    """
+    providers: dict[Asset, BatchAssetProviderType]
+    assets: list[Asset]
+    asset_columns: dict[Asset, int]
+
+    holdings: np.ndarray
+    unit_prices: np.ndarray
+    income: np.ndarray
+    expenses: np.ndarray
+
+    def __init__(self, providers: dict[Asset, BatchAssetProviderType], n_paths: int):
+        self.providers = providers
+        self.assets = list(providers)
+        self.asset_columns = {asset: i for i, asset in enumerate(self.assets)}
+        self.n_paths = n_paths
+
+        self.holdings = np.zeros((n_paths, len(self.assets)))
+        self.unit_prices = np.ones((n_paths, len(self.assets)))
+        self.income = np.zeros((n_paths, len(Income)))
+        self.expenses = np.zeros((n_paths, len(Expense)))
+
+    def update_unit_prices(self) -> None:
+        """Copy the current provider values into unit_prices."""
+        for column, asset in enumerate(self.assets):
+            self.unit_prices[:, column] = self.providers[asset].value()
+
+    def add(
+        self,
+        asset: Asset,
+        /,
+        cash: np.ndarray | float | None = None,
+        units: np.ndarray | float | None = None,
+    ):
+        if cash is None and units is None:
+            raise ValueError("Didn't specify anything to add")
+
+        column = self.asset_columns[asset]
+        if units is not None:
+            self.holdings[:, column] += units
+
+        if cash is not None:
+            self.holdings[:, column] += cash / self.unit_prices[:, column]
+
+    def current_value(self) -> np.ndarray:
+        return np.einsum("ij,ij->i", self.holdings, self.unit_prices)
+
+    def asset_value_per_unit(self, asset: Asset) -> np.ndarray:
+        return self.unit_prices[:, self.asset_columns[asset]]
+
+    def units_of_asset_held(self, asset: Asset) -> np.ndarray:
+        return self.holdings[:, self.asset_columns[asset]]
+
+    def cash_of_asset_held(self, asset: Asset) -> np.ndarray:
+        return self.units_of_asset_held(asset) * self.asset_value_per_unit(asset)
+
+    def total_income(self) -> np.ndarray:
+        return self.income.sum(axis=1)
+
+    def total_expenses(self) -> np.ndarray:
+        return self.expenses.sum(axis=1)
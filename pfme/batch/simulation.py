@@ -0,0 +1,114 @@
+import copy
+import math
+
+from pfme.asset import Asset
+from pfme.batch.asset import BatchAssetProviderType, to_batch_asset_provider
+from pfme.batch.metric import BatchRunMetricType, to_batch_metric
+from pfme.batch.portfolio import BatchPortfolio, EXPENSE_COLUMNS, INCOME_COLUMNS
+from pfme.batch.strategy import BatchStrategyType, to_batch_strategy
+from pfme.config import SimulationConfig
+from pfme.progress import Progress
+from pfme.strategy import trajectory_deltas
+
+
+class BatchSimulation:
+    """Runs n_paths copies of a simulation at once.
+
+    Accepts a regular SimulationConfig; scalar strategies, metrics and asset
+    providers are replaced by their batched counterparts. Like Simulation,
+    it records into per-run instances of the metrics, available on
+    `metrics` after `run`; reducers like BatchQuantiles are the exception
+    and record into the config's instance. Progress is only shown
+    if asked for, as batches usually run inside larger jobs.
+    """
+    n_paths: int
+    metrics: list[BatchRunMetricType]
+    asset_providers: dict[Asset, BatchAssetProviderType]
+    strategies: list[BatchStrategyType]
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        n_paths: int,
+        progress: bool = False,
+    ):
+        if n_paths < 1:
+            raise ValueError(f"Need at least one path, got {n_paths}.")
+        self.n_paths = n_paths
+        self.progress = progress
+        # Fresh instances, so run state stays out of the config, except for
+        # reducers, which accumulate across runs on purpose
+        self.metrics = [to_batch_metric(metric).new_run() for metric in config.metrics]
+        self.strategies = [to_batch_strategy(strategy).new_run() for strategy in config.strategies]
+        self.config = config
+
+        collected_assets = set()
+        for strategy in self.strategies:
+            collected_assets |= strategy.requested_assets()
+        for metric in self.metrics:
+            collected_assets |= metric.requested_assets()
+
+        # Fixed enum order, so that portfolio columns don't depend on set
+        # iteration order. Copied like in Simulation, as counterparts may
+        # share a returns model with the config.
+        self.asset_providers = copy.deepcopy({
+            asset: to_batch_asset_provider(self.config.asset_provider_mapping[asset])
+            for asset in Asset
+            if asset in collected_assets
+        })
+
+    def run(self) -> None:
+        c = self.config
+        portfolio = BatchPortfolio(self.asset_providers, self.n_paths)
+
+        years = c.years()
+        for asset_provider in self.asset_providers.values():
+            asset_provider.prepare(self.n_paths, len(years), c.increment)
+            asset_provider.update_value(c.start_year, math.nan)
+        portfolio.update_unit_prices()
+
+        income_strategies = []
+        income_trajectories = []
+        expense_strategies = []
+        expense_trajectories = []
+        for strategy in self.strategies:
+            trajectory = strategy.income_trajectory(years)
+            if trajectory is None:
+                income_strategies.append(strategy)
+            else:
+                income_trajectories.append(trajectory)
+            trajectory = strategy.expenses_trajectory(years)
+            if trajectory is None:
+                expense_strategies.append(strategy)
+            else:
+                expense_trajectories.append(trajectory)
+        income_deltas = [
+            (INCOME_COLUMNS[income], deltas)
+            for income, deltas in trajectory_deltas(income_trajectories)
+        ]
+        expense_deltas = [
+            (EXPENSE_COLUMNS[expense], deltas)
+            for expense, deltas in trajectory_deltas(expense_trajectories)
+        ]
+
+        with Progress(len(years), enabled=self.progress) as progress:
+            for step, year in enumerate(years.tolist()):
+                if step >= progress.next_refresh:
+                    progress.refresh(step)
+                for column, deltas in income_deltas:
+                    portfolio.income[:, column] += deltas[step]
+                for strategy in income_strategies:
+                    strategy.update_income(portfolio.income, year, c.increment)
+                for column, deltas in expense_deltas:
+                    portfolio.expenses[:, column] += deltas[step]
+                for strategy in expense_strategies:
+                    strategy.update_expenses(portfolio.expenses, year, c.increment)
+                for strategy in self.strategies:
+                    strategy.execute(portfolio, year, c.increment)
+
+                for metric in self.metrics:
+                    metric.record(portfolio, year)
+                for asset_provider in self.asset_providers.values():
+                    asset_provider.update_value(year, c.increment)
+                portfolio.update_unit_prices()
+            progress.refresh(len(years))
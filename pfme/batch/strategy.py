@@ -0,0 +1,248 @@
+import math
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, fields, replace
+from typing import TypeVar
+
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.batch.portfolio import BatchPortfolio, EXPENSE_COLUMNS, INCOME_COLUMNS
+from pfme.portfolio import Expense, Income
+from pfme.strategy import (
+    BusinessConstant,
+    CareerExponential,
+    EarnPostTaxIncome,
+    FixedYearlyInvestmentStrategy,
+    InvestFractionOfCashAfterBuffer,
+    LimitedDurationStrategy,
+    SimpleSpendingWithCreep,
+    Strategy,
+)
+from pfme.tax import UK_TAX_ENGINE, UkTaxEngine
+
+
+@dataclass
+class BatchStrategy(ABC):
+    """Batched counterpart of Strategy.
+
+    Hooks receive the (n_paths, ...) arrays of a BatchPortfolio and must
+    update every path at once.
+    """
+    @abstractmethod
+    def requested_assets(self) -> set[Asset]:
+        ...
+
+    def update_expenses(self, expenses: np.ndarray, year: float, increment: float):
+        pass
+
+    def update_income(self, income: np.ndarray, year: float, increment: float):
+        pass
+
+    def execute(self, portfolio: BatchPortfolio, year: float, increment: float) -> None:
+        ...
+
+    def income_trajectory(self, years: np.ndarray) -> dict[Income, np.ndarray] | None:
+        """Same as Strategy.income_trajectory; the result is shared by all paths."""
+        return None
+
+    def expenses_trajectory(self, years: np.ndarray) -> dict[Expense, np.ndarray] | None:
+        """Same as Strategy.expenses_trajectory; the result is shared by all paths."""
+        return None
+
+    def new_run(self) -> "BatchStrategy":
+        """Same as Strategy.new_run."""
+        children = {
+            f.name: getattr(self, f.name).new_run()
+            for f in fields(self)
+            if f.init and isinstance(getattr(self, f.name), BatchStrategy)
+        }
+        if not children and all(f.init for f in fields(self)):
+            return self
+        return replace(self, **children)
+
+    @classmethod
+    def from_scalar(cls, strategy: Strategy) -> "BatchStrategy":
+        return cls(**{f.name: getattr(strategy, f.name) for f in fields(strategy) if f.init})
+
+
+BatchStrategyType = TypeVar('BatchStrategyType', bound=BatchStrategy)
+
+
+@dataclass
+class BatchLimitedDurationStrategy(BatchStrategy):
+    child: BatchStrategyType
+    start: float = -math.inf
+    end: float = math.inf
+    relative: bool = True
+
+    elapsed: float = field(default=0.0, init=False)
+
+    def requested_assets(self) -> set[Asset]:
+        return self.child.requested_assets()
+
+    def execute(self, portfolio: BatchPortfolio, year: float, increment: float) -> None:
+        if self.relative:
+            if not math.isnan(increment):
+                self.elapsed += increment
+            if self.start <= self.elapsed <= self.end:
+                self.child.execute(portfolio, year, increment)
+        else:
+            if self.start <= year <= self.end:
+                self.child.execute(portfolio, year, increment)
+
+    @classmethod
+    def from_scalar(cls, strategy: LimitedDurationStrategy) -> "BatchLimitedDurationStrategy":
+        return cls(
+            to_batch_strategy(strategy.child),
+            start=strategy.start,
+            end=strategy.end,
+            relative=strategy.relative,
+        )
+
+
+@dataclass
+class BatchFixedYearlyInvestmentStrategy(BatchStrategy):
+    asset: Asset
+    amount: float
+
+    def requested_assets(self) -> set[Asset]:
+        return {self.asset}
+
+    def execute(self, portfolio: BatchPortfolio, year: float, increment: float) -> None:
+        portfolio.add(self.asset, cash=self.amount * increment)
+
+
+@dataclass
+class BatchEarnPostTaxIncome(BatchStrategy):
+    tax_engine: UkTaxEngine = field(default_factory=lambda: UK_TAX_ENGINE)
+
+    def requested_assets(self) -> set[Asset]:
+        return {Asset.CASH}
+
+    def execute(self, portfolio: BatchPortfolio, year: float, increment: float) -> None:
+        rental = portfolio.income[:, INCOME_COLUMNS[Income.UK_RENTAL]]
+        trading = portfolio.income[:, INCOME_COLUMNS[Income.UK_TRADING]]
+        salary = portfolio.income[:, INCOME_COLUMNS[Income.UK_SALARY]]
+
+        tax, national_insurance = self.tax_engine.tax_and_ni_batch(rental, trading, salary, year)
+
+        cash_gained = rental + trading + salary - tax - national_insurance - portfolio.total_expenses()
+        portfolio.add(Asset.CASH, cash=cash_gained)
+
+
+@dataclass
+class BatchCareerExponential(BatchStrategy):
+    starting_salary: float
+    yearly_salary_growth: float
+
+    start_year: float | None = field(default=None, init=False)
+
+    def requested_assets(self) -> set[Asset]:
+        return {Asset.CASH}
+
+    def __salary_at_time(self, t: float):
+        return (1 + self.yearly_salary_growth) ** (t - self.start_year) * self.starting_salary
+
+    def update_income(self, income: np.ndarray, year: float, increment: float):
+        if self.start_year is None:
+            self.start_year = year
+            salary_before = 0.0
+        else:
+            salary_before = self.__salary_at_time(year - increment)
+
+        salary_now = self.__salary_at_time(year)
+
+        income[:, INCOME_COLUMNS[Income.UK_SALARY]] += salary_now - salary_before
+
+    def income_trajectory(self, years: np.ndarray) -> dict[Income, np.ndarray]:
+        return {
+            Income.UK_SALARY: (1 + self.yearly_salary_growth) ** (years - years[0]) * self.starting_salary,
+        }
+
+
+@dataclass
+class BatchBusinessConstant(BatchStrategy):
+    yearly_profit: float
+
+    def requested_assets(self) -> set[Asset]:
+        return {Asset.CASH}
+
+    def update_income(self, income: np.ndarray, year: float, increment: float):
+        income[:, INCOME_COLUMNS[Income.UK_TRADING]] = self.yearly_profit
+
+
+@dataclass
+class BatchInvestFractionOfCashAfterBuffer(BatchStrategy):
+    buffer_per_yearly_expenses: float
+    allocation: dict[Asset, float]
+
+    def __post_init__(self):
+        if abs(sum(self.allocation.values()) - 1.0) > 1e-12:
+            raise ValueError("Allocation ratios must add up to one")
+        if any([ratio < 0.0 for ratio in self.allocation.values()]):
+            raise ValueError("Allocation ratios cannot be negative")
+
+    def requested_assets(self) -> set[Asset]:
+        return {Asset.CASH} | set(self.allocation.keys())
+
+    def execute(self, portfolio: BatchPortfolio, year: float, increment: float) -> None:
+        yearly_buffer = self.buffer_per_yearly_expenses * portfolio.total_expenses()
+        investable = (portfolio.cash_of_asset_held(Asset.CASH) - yearly_buffer) * increment
+        # Paths below their buffer invest nothing
+        investable = np.maximum(investable, 0.0)
+
+        for asset, ratio in self.allocation.items():
+            portfolio.add(asset, cash=investable * ratio)
+
+        portfolio.add(Asset.CASH, cash=-investable)
+
+
+@dataclass
+class BatchSimpleSpendingWithCreep(BatchStrategy):
+    initial_spending: float
+    creep_rate: float
+
+    start_year: float | None = field(default=None, init=False)
+
+    def __at_time_t(self, t: float):
+        return self.initial_spending * (1 + self.creep_rate) ** (t - self.start_year)
+
+    def requested_assets(self) -> set[Asset]:
+        return {Asset.CASH}
+
+    def update_expenses(self, expenses: np.ndarray, year: float, increment: float) -> None:
+        if self.start_year is None:
+            self.start_year = year
+            expenses_pre = 0
+        else:
+            expenses_pre = self.__at_time_t(year - increment)
+        expenses_now = self.__at_time_t(year)
+
+        expenses[:, EXPENSE_COLUMNS[Expense.LIVING]] += expenses_now - expenses_pre
+
+    def expenses_trajectory(self, years: np.ndarray) -> dict[Expense, np.ndarray]:
+        return {
+            Expense.LIVING: self.initial_spending * (1 + self.creep_rate) ** (years - years[0]),
+        }
+
+
+_COUNTERPARTS: dict[type, type[BatchStrategy]] = {
+    LimitedDurationStrategy: BatchLimitedDurationStrategy,
+    FixedYearlyInvestmentStrategy: BatchFixedYearlyInvestmentStrategy,
+    EarnPostTaxIncome: BatchEarnPostTaxIncome,
+    CareerExponential: BatchCareerExponential,
+    BusinessConstant: BatchBusinessConstant,
+    InvestFractionOfCashAfterBuffer: BatchInvestFractionOfCashAfterBuffer,
+    SimpleSpendingWithCreep: BatchSimpleSpendingWithCreep,
+}
+
+
+def to_batch_strategy(strategy: Strategy | BatchStrategy) -> BatchStrategy:
+    if isinstance(strategy, BatchStrategy):
+        return strategy
+    try:
+        counterpart = _COUNTERPARTS[type(strategy)]
+    except KeyError:
+        raise ValueError(f"No batched counterpart for strategy {type(strategy).__name__}.")
+    return counterpart.from_scalar(strategy)
@@ -0,0 +1,295 @@
+"""Benchmarks of the simulation engines on standard scenarios.
+
+`python -m pfme.bench` runs every benchmark and prints the throughput, in
+simulated steps (times paths) per second, and the peak memory of each.
+With --save the results are stored as a baseline; with --compare they are
+checked against a stored baseline, and the process exits with status 1
+if any benchmark slowed down by more than --threshold.
+"""
+import argparse
+import datetime as dt
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset, GeometricBrownianMotionAsset
+from pfme.batch.simulation import BatchSimulation
+from pfme.config import SimulationConfig
+from pfme.event import EventSimulation
+from pfme.metric import CashflowStatement, FIReached, HoldingsByAsset, RunMetricType, TotalAssets
+from pfme.portfolio import Income, Portfolio
+from pfme.simulation import Simulation
+from pfme.strategy import (
+    CareerExponential,
+    EarnPostTaxIncome,
+    FixedYearlyInvestmentStrategy,
+    InvestFractionOfCashAfterBuffer,
+    LimitedDurationStrategy,
+    SimpleSpendingWithCreep,
+    StrategyType,
+)
+
+YEARS = 50
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # Builds the inputs and returns the call to time, so that setup
+    # isn't measured
+    setup: Callable[[], Callable[[], Any]]
+    # Units of work done by one call, e.g. steps times paths
+    steps: int
+
+
+def few_strategies() -> list[StrategyType]:
+    return [
+        CareerExponential(40_000.0, 0.03),
+        SimpleSpendingWithCreep(20_000.0, 0.02),
+        EarnPostTaxIncome(),
+        InvestFractionOfCashAfterBuffer(
+            1.0,
+            {Asset.ETF_GLOBAL_STOCK: 0.8, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.2},
+        ),
+    ]
+
+
+def fixed_investment_strategies() -> list[StrategyType]:
+    """Income and expenses with closed forms and no cash-dependent
+    decisions, so that EventSimulation can skip between events.
+    """
+    return [
+        CareerExponential(40_000.0, 0.03),
+        SimpleSpendingWithCreep(20_000.0, 0.02),
+        EarnPostTaxIncome(),
+        FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 5_000.0),
+    ]
+
+
+def many_strategies() -> list[StrategyType]:
+    strategies = few_strategies()
+    for i in range(40):
+        strategies.append(LimitedDurationStrategy(
+            FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0 + i),
+            start=float(i),
+            end=float(i + 10),
+        ))
+    return strategies
+
+
+def make_config(
+    increment: float,
+    strategies: list[StrategyType],
+    metrics: list[RunMetricType] | None = None,
+    random: bool = False,
+) -> SimulationConfig:
+    if random:
+        etf = GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=0)
+    else:
+        etf = ConstantGeomIncreaseAsset(100.0, 0.06)
+    return SimulationConfig(
+        metrics=[TotalAssets()] if metrics is None else metrics,
+        strategies=strategies,
+        increment=increment,
+        start_year=2024.0,
+        end_year=2024.0 + YEARS,
+        asset_provider_mapping={
+            Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+            Asset.ETF_GLOBAL_STOCK: etf,
+            Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: ConstantGeomIncreaseAsset(100.0, 0.04),
+        },
+    )
+
+
+def simulation_benchmark(name: str, increment: float, make_strategies, metrics=None, engine=Simulation) -> Benchmark:
+    def setup():
+        metric_list = None if metrics is None else metrics()
+        return engine(make_config(increment, make_strategies(), metric_list), progress=False).run
+
+    return Benchmark(name, setup, steps=round(YEARS / increment))
+
+
+def batch_benchmark(name: str, n_paths: int) -> Benchmark:
+    def setup():
+        return BatchSimulation(make_config(1.0, few_strategies(), random=True), n_paths).run
+
+    return Benchmark(name, setup, steps=YEARS * n_paths)
+
+
+def portfolio_add_benchmark(n_calls: int) -> Benchmark:
+    def setup():
+        portfolio = Portfolio({
+            Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+            Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.06),
+        })
+
+        def run():
+            add = portfolio.add
+            for _ in range(n_calls):
+                add(Asset.ETF_GLOBAL_STOCK, cash=10.0)
+                add(Asset.CASH, units=-10.0)
+
+        return run
+
+    return Benchmark("portfolio_add", setup, steps=n_calls)
+
+
+def earn_post_tax_income_benchmark(n_calls: int) -> Benchmark:
+    def setup():
+        portfolio = Portfolio({Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0)})
+        portfolio.income[Income.UK_SALARY] = 60_000.0
+        portfolio.income[Income.UK_TRADING] = 5_000.0
+        strategy = EarnPostTaxIncome()
+
+        def run():
+            execute = strategy.execute
+            for _ in range(n_calls):
+                execute(portfolio, 2024.0, 1.0)
+
+        return run
+
+    return Benchmark("earn_post_tax_income", setup, steps=n_calls)
+
+
+def heavy_metrics() -> list[RunMetricType]:
+    return [TotalAssets(), HoldingsByAsset(), CashflowStatement(), FIReached(0.04)]
+
+
+BENCHMARKS = [
+    simulation_benchmark("yearly_few_strategies", 1.0, few_strategies),
+    simulation_benchmark("monthly_few_strategies", 1 / 12, few_strategies),
+    simulation_benchmark("daily_few_strategies", 1 / 365, few_strategies),
+    simulation_benchmark("monthly_many_strategies", 1 / 12, many_strategies),
+    simulation_benchmark("monthly_heavy_metrics", 1 / 12, few_strategies, heavy_metrics),
+    simulation_benchmark("monthly_fixed_investment", 1 / 12, fixed_investment_strategies),
+    simulation_benchmark("monthly_fixed_investment_events", 1 / 12, fixed_investment_strategies, engine=EventSimulation),
+    simulation_benchmark("daily_fixed_investment", 1 / 365, fixed_investment_strategies),
+    simulation_benchmark("daily_fixed_investment_events", 1 / 365, fixed_investment_strategies, engine=EventSimulation),
+    batch_benchmark("batch_10k_paths", 10_000),
+    portfolio_add_benchmark(100_000),
+    earn_post_tax_income_benchmark(100_000),
+]
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = 3) -> dict[str, Any]:
+    """Best time of repeat calls, and peak memory of one more traced call.
+
+    Memory is traced in a separate call, as tracing slows the call down.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        call = benchmark.setup()
+        gc.collect()
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+
+    call = benchmark.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "name": benchmark.name,
+        "steps": benchmark.steps,
+        "seconds": best,
+        "steps_per_second": benchmark.steps / best,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def find_slowdowns(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    threshold: float,
+) -> list[dict[str, Any]]:
+    """Benchmarks whose throughput fell by more than threshold (a fraction)
+    relative to the baseline. Benchmarks missing from either side are skipped.
+    """
+    baseline_by_name = {result["name"]: result for result in baseline}
+    slowdowns = []
+    for result in results:
+        before = baseline_by_name.get(result["name"])
+        if before is None:
+            continue
+        ratio = result["steps_per_second"] / before["steps_per_second"]
+        if ratio < 1 - threshold:
+            slowdowns.append({
+                "name": result["name"],
+                "baseline_steps_per_second": before["steps_per_second"],
+                "steps_per_second": result["steps_per_second"],
+                "ratio": ratio,
+            })
+    return slowdowns
+
+
+def save_baseline(path: str, results: list[dict[str, Any]]) -> None:
+    with open(path, "w") as f:
+        json.dump({"results": results}, f, indent=2)
+
+
+def load_baseline(path: str) -> list[dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--only",
+        nargs="+",
+        choices=[benchmark.name for benchmark in BENCHMARKS],
+        default=None,
+        help="Names of the benchmarks to run. Defaults to all of them.",
+    )
+    ap.add_argument("--repeat", type=int, default=3, help="Timed calls per benchmark; the best one is reported.")
+    ap.add_argument("--save", type=str, default=None, help="Store the results as a baseline at this path.")
+    ap.add_argument("--compare", type=str, default=None, help="Path of a baseline to check the results against.")
+    ap.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fraction of baseline throughput a benchmark may lose before it's flagged as a slowdown.",
+    )
+    return ap.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    benchmarks = [
+        benchmark for benchmark in BENCHMARKS
+        if args.only is None or benchmark.name in args.only
+    ]
+
+    start_time = dt.datetime.now(dt.UTC)
+    results = [run_benchmark(benchmark, args.repeat) for benchmark in benchmarks]
+    end_time = dt.datetime.now(dt.UTC)
+
+    result_dict = {
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "args": vars(args),
+        "results": results,
+    }
+    if args.compare is not None:
+        result_dict["slowdowns"] = find_slowdowns(results, load_baseline(args.compare), args.threshold)
+    if args.save is not None:
+        save_baseline(args.save, results)
+
+    print(json.dumps(result_dict))
+    if result_dict.get("slowdowns"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""On-disk cache of simulation results, keyed by the content of the config."""
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from pfme.config import SimulationConfig
+from pfme.run import simulate
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("PFME_CACHE_DIR", Path.home() / ".cache" / "pfme"))
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+
+def _type_name(obj: Any) -> str:
+    return f"{type(obj).__module__}.{type(obj).__qualname__}"
+
+
+def _defining_file(cls: type) -> Path | None:
+    """Source file of cls, found through its methods, as classes of
+    scenario files live in modules that aren't importable.
+    """
+    for value in vars(cls).values():
+        function = getattr(value, "__func__", getattr(value, "fget", value))
+        code = getattr(function, "__code__", None)
+        if code is not None and os.path.isfile(code.co_filename):
+            return Path(code.co_filename)
+    return None
+
+
+def class_source_digest(cls: type) -> str | None:
+    """Hash of the files defining cls and its bases outside pfme, whose
+    code source_digest doesn't cover, or None if there are none.
+    """
+    digest = hashlib.sha256()
+    files = set()
+    for base in cls.__mro__:
+        if base.__module__.startswith("pfme.") and not base.__module__.startswith("pfme._dynamically_loaded"):
+            continue
+        path = _defining_file(base)
+        if path is not None and path not in files:
+            files.add(path)
+            digest.update(path.read_bytes())
+    return digest.hexdigest() if files else None
+
+
+def canonicalize(obj: Any) -> Any:
+    """JSON-compatible description of everything that determines obj's behaviour.
+
+    Dataclasses are described by their init fields. Other objects are
+    described by the attributes named like their constructor parameters,
+    plus the state of any random generator they hold, so unseeded configs
+    never share a description. Objects of classes defined outside pfme,
+    e.g. in a scenario file, are also described by that class's source. Files are described by path, size and
+    modification time. Anything else, e.g. a function, raises TypeError.
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, Enum):
+        return {"enum": f"{_type_name(obj)}.{obj.name}"}
+    if isinstance(obj, (list, tuple)):
+        return [canonicalize(item) for item in obj]
+    if isinstance(obj, dict):
+        return {"dict": [[canonicalize(key), canonicalize(value)] for key, value in obj.items()]}
+    if isinstance(obj, np.ndarray):
+        return {"ndarray": str(obj.dtype), "shape": list(obj.shape), "data": canonicalize(obj.tolist())}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.random.Generator):
+        return {"rng": obj.bit_generator.state}
+    if isinstance(obj, os.PathLike):
+        path = Path(obj).resolve()
+        stat = path.stat()
+        return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        params = {
+            field.name: getattr(obj, field.name)
+            for field in dataclasses.fields(obj)
+            if field.init
+        }
+    elif hasattr(obj, "__dict__") and not inspect.isroutine(obj) and not isinstance(obj, type):
+        params = {}
+        for name in inspect.signature(type(obj).__init__).parameters:
+            if name == "self":
+                continue
+            if not hasattr(obj, name):
+                raise TypeError(
+                    f"Can't describe {_type_name(obj)}: constructor argument {name} isn't stored as an attribute."
+                )
+            params[name] = getattr(obj, name)
+        for name, value in vars(obj).items():
+            if isinstance(value, np.random.Generator):
+                params[name] = value
+    else:
+        raise TypeError(f"Can't describe object of type {_type_name(obj)}.")
+
+    description = {
+        "type": _type_name(obj),
+        "params": {name: canonicalize(value) for name, value in params.items()},
+    }
+    source = class_source_digest(type(obj))
+    if source is not None:
+        description["source"] = source
+    return description
+
+
+@lru_cache(maxsize=None)
+def source_digest() -> str:
+    """Hash of the pfme source code, so results are never reused across code changes."""
+    digest = hashlib.sha256()
+    package_dir = Path(__file__).parent
+    for path in sorted(package_dir.rglob("*.py")):
+        digest.update(str(path.relative_to(package_dir)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def config_key(config: SimulationConfig) -> str:
+    description = {
+        "source": source_digest(),
+        "config": canonicalize(config),
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Directory of JSON results, evicting least recently used entries
+    once the directory grows beyond max_bytes.
+    """
+    directory: Path
+    max_bytes: int
+
+    def __init__(self, directory: str | os.PathLike = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Any | None:
+        """Stored result of key, or None if there is none. Unreadable
+        entries, e.g. left half-written by a crash, are removed and count
+        as missing.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+        except OSError:
+            return None
+        try:
+            # The modification time doubles as the last-use time for eviction
+            os.utime(path)
+        except OSError:
+            # E.g. a read-only shared cache
+            pass
+        return result
+
+    def put(self, key: str, result: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def cached_simulate(config: SimulationConfig, cache: ResultCache | None = None, progress: bool = True) -> dict:
+    """Same as simulate, reusing the stored result of an identical earlier run.
+
+    The cache never makes a run fail: configs that canonicalize can't
+    describe are simulated without it, and results that can't be stored
+    are returned all the same.
+    """
+    cache = cache if cache is not None else ResultCache()
+    try:
+        key = config_key(config)
+    except TypeError:
+        return simulate(config, progress=progress)
+    result = cache.get(key)
+    if result is None:
+        result = simulate(config, progress=progress)
+        try:
+            cache.put(key, result)
+        except OSError:
+            pass
+    return result
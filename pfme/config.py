@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import datetime as dt
+import math
 
 from dataclasses import dataclass, field
 
 import argparse
 
+import numpy as np
+
 from pfme.asset import Asset, AssetProvider, ConstantGeomIncreaseAsset
 from pfme.metric import RunMetricType
 from pfme.strategy import StrategyType
@@ -29,6 +32,23 @@ class SimulationConfig:
     })
 
 
+    @property
+    def n_steps(self) -> int:
+        """Number of steps from start_year up to, not including, end_year."""
+        steps = (self.end_year - self.start_year) / self.increment
+        # A grid that divides the span evenly, up to rounding, doesn't get
+        # an extra step just below end_year
+        if math.isclose(steps, round(steps), rel_tol=1e-9):
+            return max(0, round(steps))
+        return max(0, math.ceil(steps))
+
+    def years(self) -> np.ndarray:
+        """Year of every step. Each is computed from its step index, so
+        fine grids don't accumulate the error of repeatedly adding
+        increment.
+        """
+        return self.start_year + np.arange(self.n_steps) * self.increment
+
     @staticmethod
     def from_namespace(args: argparse.Namespace) -> SimulationConfig:
         return SimulationConfig(**vars(args))
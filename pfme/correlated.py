@@ -0,0 +1,164 @@
+import math
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from pfme.asset import Asset, AssetProvider
+
+
+class ReturnsModel(ABC):
+    """Source of joint per-step growth factors for several assets.
+
+    Draws for every path, step and asset are made in one go and cached, so
+    all providers subscribed to the model read from the same draw.
+    """
+    assets: list[Asset]
+
+    def __init__(self):
+        self._cache_key: tuple[int, int, float] | None = None
+        self._cache: dict[Asset, np.ndarray] = {}
+
+    @abstractmethod
+    def _draw(self, n_paths: int, n_steps: int, increment: float) -> dict[Asset, np.ndarray]:
+        """Draw growth factors of shape (n_steps, n_paths) for every asset."""
+        ...
+
+    def growth_factors(self, asset: Asset, n_paths: int, n_steps: int, increment: float) -> np.ndarray:
+        """Per-step growth factors of asset, with shape (n_steps, n_paths).
+
+        Repeated calls with the same grid return the cached draw, so call
+        `clear` to get fresh draws for the same grid.
+        """
+        key = (n_paths, n_steps, increment)
+        if key != self._cache_key:
+            self._cache = self._draw(n_paths, n_steps, increment)
+            self._cache_key = key
+        return self._cache[asset]
+
+    def clear(self) -> None:
+        self._cache_key = None
+        self._cache = {}
+
+    def providers(self, starting_values: dict[Asset, float]) -> dict[Asset, "CorrelatedAsset"]:
+        """Build subscribed providers, for use as an asset_provider_mapping."""
+        return {
+            asset: CorrelatedAsset(self, asset, starting_value)
+            for asset, starting_value in starting_values.items()
+        }
+
+
+class CorrelatedReturns(ReturnsModel):
+    """Joint model of correlated log-returns for several assets.
+
+    Annual log-returns are multivariate normal with the given covariance.
+    The mean log-return of each asset is log(1 + growth_rate) - variance / 2,
+    matching GeometricBrownianMotionAsset.
+
+    The covariance is factored once on construction, and every draw is a
+    single batched operation.
+    """
+    assets: list[Asset]
+    growth_rates: dict[Asset, float]
+    covariance: np.ndarray
+    seed: int | None
+
+    def __init__(
+        self,
+        growth_rates: dict[Asset, float],
+        covariance: np.ndarray,
+        seed: int | None = None,
+    ):
+        super().__init__()
+        self.assets = list(growth_rates)
+        self.growth_rates = dict(growth_rates)
+        self.covariance = np.asarray(covariance, dtype=float)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        n = len(self.assets)
+        if self.covariance.shape != (n, n):
+            raise ValueError(
+                f"Covariance must have shape {(n, n)} to match the assets, got {self.covariance.shape}."
+            )
+        if not np.allclose(self.covariance, self.covariance.T):
+            raise ValueError("Covariance must be symmetric")
+
+        self._factor = self._factor_covariance(self.covariance)
+        rates = np.array([growth_rates[asset] for asset in self.assets])
+        self._log_drift = np.log1p(rates) - 0.5 * np.diag(self.covariance)
+
+    @staticmethod
+    def from_correlation(
+        growth_rates: dict[Asset, float],
+        volatilities: dict[Asset, float],
+        correlation: np.ndarray,
+        seed: int | None = None,
+    ) -> "CorrelatedReturns":
+        vols = np.array([volatilities[asset] for asset in growth_rates])
+        correlation = np.asarray(correlation, dtype=float)
+        if not np.allclose(np.diag(correlation), 1.0):
+            raise ValueError("Correlation matrix must have ones on the diagonal")
+        return CorrelatedReturns(growth_rates, correlation * np.outer(vols, vols), seed)
+
+    @staticmethod
+    def _factor_covariance(covariance: np.ndarray) -> np.ndarray:
+        """Return L with L @ L.T == covariance."""
+        try:
+            return np.linalg.cholesky(covariance)
+        except np.linalg.LinAlgError:
+            # Singular, e.g. an asset with zero volatility
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+            if eigenvalues.min() < -1e-12 * max(1.0, eigenvalues.max()):
+                raise ValueError("Covariance must be positive semi-definite")
+            return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+    def _draw(self, n_paths: int, n_steps: int, increment: float) -> dict[Asset, np.ndarray]:
+        shocks = self.rng.standard_normal((n_paths, n_steps, len(self.assets)))
+        log_returns = self._log_drift * increment + math.sqrt(increment) * (shocks @ self._factor.T)
+        factors = np.exp(log_returns)
+        return {
+            asset: np.ascontiguousarray(factors[:, :, column].T)
+            for column, asset in enumerate(self.assets)
+        }
+
+
+class CorrelatedAsset(AssetProvider):
+    """Asset whose returns come from a shared ReturnsModel."""
+    model: ReturnsModel
+    asset: Asset
+    starting_value: float
+
+    _value: float
+    _step: int
+    _increment: float
+    _growth_factors: np.ndarray
+
+    def __init__(self, model: ReturnsModel, asset: Asset, starting_value: float):
+        if asset not in model.assets:
+            raise ValueError(f"Asset {asset.name} is not part of the returns model.")
+        self.model = model
+        self.asset = asset
+        self.starting_value = starting_value
+        self._value = starting_value
+        self._step = 0
+        self._increment = math.nan
+        self._growth_factors = np.empty(0)
+
+    def prepare(self, n_steps: int, increment: float) -> None:
+        self._increment = increment
+        self._growth_factors = self.model.growth_factors(self.asset, 1, n_steps, increment)[:, 0]
+
+    def update_value(self, _year: float, increment: float) -> None:
+        if math.isnan(increment):
+            self._step = 0
+            self._value = self.starting_value
+            return
+
+        if increment != self._increment or self._step >= len(self._growth_factors):
+            raise ValueError("CorrelatedAsset must be prepared for the time grid it is run on")
+        self._value *= float(self._growth_factors[self._step])
+        self._step += 1
+
+    def value(self) -> float:
+        return self._value
@@ -0,0 +1,144 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+from pfme.config import SimulationConfig
+from pfme.flow import StepFlow
+from pfme.metric import MetricSink
+from pfme.portfolio import SlotMap
+from pfme.profiling import Profiler
+from pfme.progress import Progress
+from pfme.simulation import Simulation
+from pfme.stop import StopCondition
+from pfme.strategy import KeyType
+
+
+class EventSimulation(Simulation):
+    """Simulation that only steps through the events of a run.
+
+    Events are the first step, the change points declared by strategies,
+    and the first step of every report_increment years. Events are
+    simulated like in Simulation. The steps in between only compound:
+    their effect on asset values is built from the strategies' step_flow,
+    with income and expenses following their trajectories step by step,
+    and applied in one go, so the cost of a run grows with the number of
+    events rather than the number of steps.
+
+    Metrics are recorded and stop conditions checked at events only. If a
+    strategy can't declare its change points, or an asset provider has no
+    constant growth per step, every step is an event.
+    """
+    report_increment: float | None
+
+    def __init__(
+        self,
+        config: SimulationConfig,
+        progress: bool = True,
+        sink: MetricSink | None = None,
+        profiler: Profiler | None = None,
+        report_increment: float | None = 1.0,
+    ):
+        super().__init__(config, progress, sink, profiler)
+        self.report_increment = report_increment
+        self._events = np.empty(0, dtype=int)
+
+    def _plan(self) -> None:
+        super()._plan()
+        self._events = self._event_steps()
+
+    def _event_steps(self) -> np.ndarray:
+        """Indices of the event steps from step_index onwards."""
+        c = self.config
+        first = self.step_index
+        years = self.years[first:]
+        every_step = np.arange(first, len(self.years))
+
+        if any(provider.step_growth(c.increment) is None for provider in self.asset_providers.values()):
+            return every_step
+
+        events = [np.array([first])]
+        for strategy in self.strategies:
+            points = strategy.change_points(years, c.increment)
+            if points is None:
+                return every_step
+            events.append(np.asarray(points, dtype=int) + first)
+        if self.report_increment is not None:
+            # Tolerance for years that land just below a period boundary
+            periods = np.floor((years - c.start_year) / self.report_increment + 1e-9)
+            events.append(np.flatnonzero(np.diff(periods)) + 1 + first)
+        return np.unique(np.concatenate(events))
+
+    def _next_event(self) -> int:
+        i = np.searchsorted(self._events, self.step_index)
+        return int(self._events[i]) if i < len(self._events) else len(self.years)
+
+    @staticmethod
+    def _follow(
+        current: SlotMap[KeyType],
+        deltas: list[tuple[KeyType, list[float]]],
+        first: int,
+        n_steps: int,
+    ) -> dict[KeyType, np.ndarray]:
+        """Values of every key of current at each of the n_steps steps from
+        first, adding the trajectories' changes in the order step does.
+        """
+        steps = {key: np.full(n_steps, value) for key, value in current.items()}
+        for key, changes in deltas:
+            steps[key] = np.cumsum([current[key], *changes[first:first + n_steps]])[1:]
+        return steps
+
+    def skip(self, n_steps: int) -> None:
+        """Apply n_steps steps without events, starting at step_index."""
+        c = self.config
+        portfolio = self.portfolio
+        assets = list(portfolio.asset_holdings)
+        providers = list(portfolio.providers.values())
+
+        first = self.step_index
+        income = self._follow(portfolio.income, self._income_deltas, first, n_steps)
+        expenses = self._follow(portfolio.expenses, self._expense_deltas, first, n_steps)
+
+        flow = StepFlow(assets, n_steps, income, expenses)
+        for strategy in self.strategies:
+            strategy.step_flow(flow, portfolio, self.year, c.increment)
+        flow.grow([provider.step_growth(c.increment) for provider in providers])
+
+        values = flow.apply(np.array([portfolio.cash_of_asset_held(asset) for asset in assets]))
+        for key, steps in income.items():
+            portfolio.income[key] = float(steps[-1])
+        for key, steps in expenses.items():
+            portfolio.expenses[key] = float(steps[-1])
+        last_year = float(self.years[first + n_steps - 1])
+        for provider in providers:
+            provider.advance(last_year, c.increment, n_steps)
+        portfolio.update_prices()
+        for asset, value in zip(assets, values):
+            portfolio.asset_holdings[asset] = value / portfolio.asset_value_per_unit(asset)
+
+        for strategy in self.strategies:
+            strategy.advance(n_steps, c.increment)
+        self.step_index += n_steps
+
+    def run_until(self, year: float, stop: Sequence[StopCondition] = ()) -> None:
+        with self.profiling():
+            if not self.started:
+                self.start()
+            self.stopped_by = None
+            self.stopped_year = None
+            end = int(np.searchsorted(self.years, year))
+            with Progress(len(self.years), self.step_index, self.progress) as progress:
+                while self.step_index < end:
+                    step_year = self.year
+                    reached = self.step(stop)
+                    if reached is not None:
+                        self.stopped_by = reached
+                        self.stopped_year = step_year
+                        break
+
+                    quiet = min(self._next_event(), end) - self.step_index
+                    if quiet > 0:
+                        self.skip(quiet)
+                    if self.step_index >= progress.next_refresh:
+                        progress.refresh(self.step_index)
+                progress.refresh(self.step_index)
+            self.update_metrics()
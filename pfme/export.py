@@ -0,0 +1,56 @@
+"""Binary export of recorded metric columns."""
+import os
+
+from pathlib import Path
+
+import numpy as np
+
+from pfme.metric import RunMetric
+
+
+def save_npz(path: str | os.PathLike, metrics: list[RunMetric]) -> None:
+    """Save the columns of metrics to a compressed .npz file.
+
+    Arrays are stored as "<metric>/<column>", including "<metric>/year".
+    Columns with labels along their last axis also get a
+    "<metric>/<column>/labels" string array.
+    """
+    arrays = {}
+    for metric in metrics:
+        for name, values in metric.data().items():
+            arrays[f"{metric.name()}/{name}"] = values
+        for column in metric.schema:
+            if column.labels is not None:
+                arrays[f"{metric.name()}/{column.name}/labels"] = np.array(column.labels)
+    np.savez_compressed(path, **arrays)
+
+
+def save_parquet(directory: str | os.PathLike, metrics: list[RunMetric]) -> None:
+    """Save each metric as <directory>/<metric>.parquet.
+
+    Needs pyarrow. Columns with a per-step shape are stored as fixed-size
+    lists, with their labels in the field metadata.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow, install it with `pip install pyarrow`.")
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for metric in metrics:
+        data = metric.data()
+        fields = [pa.field("year", pa.float64())]
+        arrays = [pa.array(data["year"])]
+        for column in metric.schema:
+            values = data[column.name]
+            if values.ndim == 1:
+                array = pa.array(values)
+            else:
+                flat = pa.array(values.reshape(len(values), -1).ravel())
+                array = pa.FixedSizeListArray.from_arrays(flat, int(np.prod(values.shape[1:])))
+            metadata = {"labels": ",".join(column.labels)} if column.labels is not None else None
+            fields.append(pa.field(column.name, array.type, metadata=metadata))
+            arrays.append(array)
+        pq.write_table(pa.Table.from_arrays(arrays, schema=pa.schema(fields)), directory / f"{metric.name()}.parquet")
@@ -0,0 +1,83 @@
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.portfolio import Expense, Income
+
+
+class StepFlow:
+    """Effect of each of n_steps simulation steps on the value held in
+    each asset.
+
+    The effect is kept as an affine map, value -> matrix @ [value, 1], and
+    built up by applying operations in the order the engine would. Cash
+    added may differ per step, e.g. when it follows the income and
+    expenses of the steps, which the engine provides in `income` and
+    `expenses`; those amounts are kept aside in `per_step`, one column per
+    step, and transformed along with the map. Affine maps compose, so
+    n_steps identical steps are a single matrix power, and steps that only
+    differ in the cash added reduce to one vectorized sum.
+    """
+    assets: list[Asset]
+    n_steps: int
+    matrix: np.ndarray
+    # (n_assets, n_steps)
+    per_step: np.ndarray | None
+    # Key -> value at each of the steps
+    income: dict[Income, np.ndarray]
+    expenses: dict[Expense, np.ndarray]
+
+    def __init__(
+        self,
+        assets: list[Asset],
+        n_steps: int = 1,
+        income: dict[Income, np.ndarray] | None = None,
+        expenses: dict[Expense, np.ndarray] | None = None,
+    ):
+        self.assets = assets
+        self.n_steps = n_steps
+        self._index = {asset: i for i, asset in enumerate(assets)}
+        self.matrix = np.eye(len(assets) + 1)
+        self.per_step = None
+        self.income = income if income is not None else {key: np.zeros(n_steps) for key in Income}
+        self.expenses = expenses if expenses is not None else {key: np.zeros(n_steps) for key in Expense}
+
+    def total_expenses(self) -> np.ndarray:
+        return sum(self.expenses.values(), np.zeros(self.n_steps))
+
+    def add(self, asset: Asset, cash: float | np.ndarray) -> None:
+        """Add cash to the value held in asset, either the same amount
+        every step or an array of one amount per step.
+        """
+        if np.ndim(cash) == 0:
+            self.matrix[self._index[asset]] += cash * self.matrix[-1]
+            return
+        if self.per_step is None:
+            self.per_step = np.zeros((len(self.assets), self.n_steps))
+        self.per_step[self._index[asset]] += cash
+
+    def grow(self, factors: list[float]) -> None:
+        """Multiply the value held in each asset by its factor."""
+        factors = np.asarray(factors)
+        self.matrix[:-1] *= factors[:, np.newaxis]
+        if self.per_step is not None:
+            self.per_step *= factors[:, np.newaxis]
+
+    def apply(self, values: np.ndarray, n_steps: int | None = None) -> np.ndarray:
+        """Values held after n_steps steps of the flow, all of them by
+        default.
+        """
+        n_steps = self.n_steps if n_steps is None else n_steps
+        if self.per_step is None:
+            augmented = np.append(values, 1.0)
+            return (np.linalg.matrix_power(self.matrix, n_steps) @ augmented)[:-1]
+
+        linear = self.matrix[:-1, :-1]
+        added = self.per_step[:, :n_steps] + self.matrix[:-1, -1:]
+        factors = np.diag(linear)
+        if np.array_equal(linear, np.diag(factors)):
+            # Cash added at step k grows over the n_steps - 1 - k steps after it
+            powers = factors[:, np.newaxis] ** np.arange(n_steps - 1, -1, -1)
+            return factors ** n_steps * values + (powers * added).sum(axis=1)
+        for k in range(n_steps):
+            values = linear @ values + added[:, k]
+        return values
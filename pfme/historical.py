@@ -0,0 +1,156 @@
+import csv
+import hashlib
+import os
+
+from pathlib import Path
+
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.correlated import ReturnsModel
+
+CACHE_DIR_NAME = ".pfme_cache"
+
+
+def _cache_prefix(csv_path: Path) -> str:
+    """Start of the names of csv_path's cache files.
+
+    It includes a hash of the resolved path, so CSVs with the same stem,
+    like returns.csv and returns-uk.csv, or returns.csv in two
+    directories sharing a cache_dir, never touch each other's caches.
+    """
+    path_hash = hashlib.sha1(str(csv_path.resolve()).encode()).hexdigest()[:16]
+    return f"{csv_path.stem}-{path_hash}"
+
+
+def _cache_path(csv_path: Path, cache_dir: Path) -> Path:
+    """Cache file for the current contents of csv_path.
+
+    The name includes the size and modification time of the source, so
+    editing the CSV makes the old cache file unreachable.
+    """
+    stat = csv_path.stat()
+    fingerprint = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    return cache_dir / f"{_cache_prefix(csv_path)}-{fingerprint}.npy"
+
+
+def _parse_csv(csv_path: Path) -> np.ndarray:
+    """Parse the return columns of csv_path into a structured array.
+
+    Columns named after an Asset member hold the simple return of that
+    asset over each period (0.05 meaning +5%). Other columns, e.g. dates,
+    are ignored.
+    """
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader)]
+        columns = [i for i, name in enumerate(header) if name in Asset.__members__]
+        if not columns:
+            raise ValueError(f"No column of {csv_path} is named after an Asset.")
+        rows = [
+            tuple(float(row[i]) for i in columns)
+            for row in reader
+            if row
+        ]
+
+    dtype = np.dtype([(header[i], np.float64) for i in columns])
+    return np.array(rows, dtype=dtype)
+
+
+def load_returns(csv_path: str | os.PathLike, cache_dir: str | os.PathLike | None = None) -> np.ndarray:
+    """Load the return series of csv_path as a read-only memory-mapped array.
+
+    The CSV is parsed once into a binary .npy cache, by default in a
+    `.pfme_cache` directory next to it. Later loads, including from other
+    processes, map the cache file and share the OS page cache. The cache is
+    rebuilt when the CSV changes.
+    """
+    csv_path = Path(csv_path)
+    cache_dir = Path(cache_dir) if cache_dir is not None else csv_path.parent / CACHE_DIR_NAME
+    cache_path = _cache_path(csv_path, cache_dir)
+
+    if not cache_path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        returns = _parse_csv(csv_path)
+        # Write then rename, so concurrent loaders never map a partial file
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, returns)
+        os.replace(tmp_path, cache_path)
+        for stale in cache_dir.glob(f"{_cache_prefix(csv_path)}-*.npy"):
+            if stale != cache_path:
+                stale.unlink(missing_ok=True)
+
+    return np.load(cache_path, mmap_mode="r")
+
+
+class HistoricalReturns(ReturnsModel):
+    """Block bootstrap of historical return series.
+
+    Each path is built by concatenating blocks of block_length consecutive
+    periods, starting at random rows and wrapping around the end of the
+    series. All assets share the same blocks, which keeps their historical
+    co-movement. Each row covers `period` years; the simulation increment
+    doesn't need to match it, as returns are spread evenly within a row.
+
+    Subscribe providers with `providers`, as for CorrelatedReturns.
+    """
+    csv_path: Path
+    period: float
+    block_length: int
+    seed: int | None
+
+    def __init__(
+        self,
+        csv_path: str | os.PathLike,
+        period: float = 1.0,
+        block_length: int = 5,
+        seed: int | None = None,
+        cache_dir: str | os.PathLike | None = None,
+    ):
+        if block_length < 1:
+            raise ValueError(f"Block length must be at least one, got {block_length}.")
+        super().__init__()
+        self.csv_path = Path(csv_path)
+        self.period = period
+        self.block_length = block_length
+        self.seed = seed
+        self.cache_dir = cache_dir
+        self.rng = np.random.default_rng(seed)
+        self.returns = load_returns(self.csv_path, cache_dir)
+        self.assets = [Asset[name] for name in self.returns.dtype.names]
+
+    def __getstate__(self):
+        # Worker processes map the cache file themselves instead of receiving a copy
+        state = self.__dict__.copy()
+        del state["returns"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.returns = load_returns(self.csv_path, self.cache_dir)
+
+    def _draw(self, n_paths: int, n_steps: int, increment: float) -> dict[Asset, np.ndarray]:
+        n_rows = len(self.returns)
+        rows_needed = max(1, int(np.ceil(n_steps * increment / self.period)))
+        n_blocks = -(-rows_needed // self.block_length)
+
+        starts = self.rng.integers(0, n_rows, size=(n_paths, n_blocks, 1))
+        rows = (starts + np.arange(self.block_length)).reshape(n_paths, -1)[:, :rows_needed] % n_rows
+
+        # Cumulative log-growth is known at row boundaries and interpolated
+        # linearly onto the step grid; the weights are the same for every path
+        step_rows = np.minimum(np.arange(n_steps + 1) * increment / self.period, rows_needed)
+        lower = np.minimum(np.floor(step_rows).astype(int), rows_needed - 1)
+        weight = step_rows - lower
+
+        factors = {}
+        for asset in self.assets:
+            log_growth = np.log1p(np.asarray(self.returns[asset.name])[rows])
+            cumulative = np.concatenate(
+                [np.zeros((n_paths, 1)), np.cumsum(log_growth, axis=1)],
+                axis=1,
+            )
+            at_steps = cumulative[:, lower] * (1 - weight) + cumulative[:, lower + 1] * weight
+            factors[asset] = np.ascontiguousarray(np.exp(np.diff(at_steps, axis=1)).T)
+        return factors
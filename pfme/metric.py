@@ -1,14 +1,75 @@
+import copy
+
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import TypeVar
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+import numpy as np
 
 from pfme.asset import Asset
-from pfme.portfolio import Portfolio
+from pfme.portfolio import Expense, Income, Portfolio
+
+if TYPE_CHECKING:
+    from pfme.trace import Trace
+
+
+@dataclass(frozen=True)
+class Column:
+    """One column of a metric's storage, holding a value of `shape` per step."""
+    name: str
+    dtype: type | str
+    shape: tuple[int, ...] = ()
+    # Names along the last axis of shape, e.g. the asset of each entry
+    labels: tuple[str, ...] | None = None
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
 
 
 class RunMetric(ABC):
+    """Metric recorded once per simulation step.
+
+    Values are written into columns preallocated by `allocate`, as declared
+    by `declare_columns`. The default is a single object column holding
+    whatever `calculate` returns; subclasses with numeric values should
+    declare typed columns, and may override `write` to fill them without
+    building intermediate objects.
+    """
+    schema: list[Column]
+    years: np.ndarray
+    columns: dict[str, np.ndarray]
+    n_rows: int
+
+    # Whether derive_columns is implemented, so the engine derives the
+    # metric from the run's trace instead of recording it every step. Not
+    # inherited: a subclass may override calculate, so it is only derived
+    # if it sets the flag itself.
+    derivable: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "derivable" not in vars(cls):
+            cls.derivable = False
+
     def __init__(self):
-        self.values = []
+        self.schema = []
+        self.years = np.empty(0)
+        self.columns = {}
+        self.n_rows = 0
+
+    def new_run(self) -> "RunMetric":
+        """Instance with the same parameters and no recorded values, for one
+        run. The engine records into it, leaving the configured metric
+        untouched.
+        """
+        run = copy.copy(self)
+        RunMetric.__init__(run)
+        return run
 
     def name(self):
         return type(self).__name__
@@ -20,25 +81,108 @@ class RunMetric(ABC):
     def calculate(self, portfolio: Portfolio):
         ...
 
+    def declare_columns(self, assets: list[Asset]) -> list[Column]:
+        """Columns recorded for a run holding assets, in portfolio order."""
+        return [Column("value", object)]
+
+    def allocate(self, n_rows: int, assets: list[Asset]) -> None:
+        """Discard recorded values and preallocate storage for n_rows steps."""
+        self.schema = self.declare_columns(assets)
+        self.years = np.empty(n_rows)
+        self.columns = {
+            column.name: np.zeros((n_rows, *column.shape), dtype=column.dtype)
+            for column in self.schema
+        }
+        self.n_rows = 0
+
+    def _grow(self) -> None:
+        capacity = max(16, 2 * len(self.years))
+        self.years = np.resize(self.years, capacity)
+        for name, values in self.columns.items():
+            self.columns[name] = np.resize(values, (capacity, *values.shape[1:]))
+
+    def write(self, portfolio: Portfolio, row: int) -> None:
+        self.columns["value"][row] = self.calculate(portfolio)
+
+    def entry(self, portfolio: Portfolio, year: float) -> dict:
+        return {
+            "year": year,
+            "value": self.calculate(portfolio),
+        }
+
     def record(self, portfolio: Portfolio, year: float):
-        value = self.calculate(portfolio)
-        self.values.append(
+        if not self.schema:
+            self.allocate(16, list(portfolio.asset_holdings))
+        elif self.n_rows == len(self.years):
+            self._grow()
+        self.years[self.n_rows] = year
+        self.write(portfolio, self.n_rows)
+        self.n_rows += 1
+
+    def derive_columns(self, trace: dict[str, np.ndarray]) -> dict[str, np.ndarray] | None:
+        """Values of every column for all steps of a trace, as returned by
+        Trace.data, or None if the metric can't be derived. Metrics that
+        implement this set derivable, and so must their subclasses.
+        """
+        return None
+
+    def derive(self, trace: "Trace") -> None:
+        """Fill the columns from all recorded steps of trace."""
+        if not self.derivable:
+            raise ValueError(f"Metric {self.name()} can't be derived from a trace.")
+        data = trace.data()
+        self.allocate(trace.n_rows, trace.assets)
+        self.years[:] = data["years"]
+        for name, values in self.derive_columns(data).items():
+            self.columns[name][:] = values
+        self.n_rows = trace.n_rows
+
+    def value_at(self, row: int):
+        """JSON-compatible value recorded in row."""
+        return _to_python(self.columns["value"][row])
+
+    def data(self) -> dict[str, np.ndarray]:
+        """Recorded columns, including "year", trimmed to the recorded steps."""
+        data = {"year": self.years[:self.n_rows]}
+        for name, values in self.columns.items():
+            data[name] = values[:self.n_rows]
+        return data
+
+    @property
+    def values(self) -> list[dict]:
+        return [
             {
-                "year": year,
-                "value": value,
+                "year": float(self.years[row]),
+                "value": self.value_at(row),
             }
-        )
+            for row in range(self.n_rows)
+        ]
 
 
 RunMetricType = TypeVar('MetricType', bound=RunMetric)
 
 
+# Receives each metric entry as it is calculated, instead of RunMetric.values
+MetricSink = Callable[[RunMetric, dict], None]
+
+
 class TotalAssets(RunMetric):
+    derivable = True
+
     def calculate(self, portfolio: Portfolio):
         return portfolio.current_value()
 
+    def declare_columns(self, assets: list[Asset]) -> list[Column]:
+        return [Column("value", np.float64)]
+
+    def derive_columns(self, trace: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return {"value": trace["total_value"]}
+
 
 class HoldingsByAsset(RunMetric):
+    derivable = True
+    assets: list[Asset]
+
     def calculate(self, portfolio: Portfolio):
         return [
             {
@@ -49,8 +193,37 @@ class HoldingsByAsset(RunMetric):
             for asset, units in portfolio.asset_holdings.items()
         ]
 
+    def declare_columns(self, assets: list[Asset]) -> list[Column]:
+        self.assets = assets
+        labels = tuple(asset.name for asset in assets)
+        return [
+            Column("units", np.float64, (len(assets),), labels),
+            Column("unit_value", np.float64, (len(assets),), labels),
+        ]
+
+    def write(self, portfolio: Portfolio, row: int) -> None:
+        units = self.columns["units"][row]
+        unit_value = self.columns["unit_value"][row]
+        for i, asset in enumerate(self.assets):
+            units[i] = portfolio.asset_holdings[asset]
+            unit_value[i] = portfolio.asset_value_per_unit(asset)
+
+    def derive_columns(self, trace: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return {"units": trace["holdings"], "unit_value": trace["unit_prices"]}
+
+    def value_at(self, row: int):
+        return [
+            {
+                "asset": asset.name,
+                "units": float(self.columns["units"][row, i]),
+                "unit_value": float(self.columns["unit_value"][row, i]),
+            }
+            for i, asset in enumerate(self.assets)
+        ]
+
 
 class FIReached(RunMetric):
+    derivable = True
     withdrawal_rate: float
 
     def __init__(self, withdrawal_rate: float):
@@ -60,25 +233,69 @@ class FIReached(RunMetric):
     def calculate(self, portfolio: Portfolio):
         return (
             portfolio.current_value() * self.withdrawal_rate
-            >= sum(portfolio.expenses.values())
+            >= portfolio.total_expenses()
         )
 
+    def declare_columns(self, assets: list[Asset]) -> list[Column]:
+        return [Column("value", np.bool_)]
+
+    def derive_columns(self, trace: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return {"value": trace["total_value"] * self.withdrawal_rate >= trace["total_expenses"]}
+
 
 class CashflowStatement(RunMetric):
+    """Income and expenses of every kind, including those that are zero."""
+    derivable = True
+
     def calculate(self, portfolio: Portfolio):
         return {
             "income": [
                 {
                     "name": key.name,
-                    "value": value,
+                    "value": portfolio.income.get(key, 0.0),
+                }
+                for key in Income
+            ],
+            "expenses": [
+                {
+                    "name": key.name,
+                    "value": portfolio.expenses.get(key, 0.0),
+                }
+                for key in Expense
+            ]
+        }
+
+    def declare_columns(self, assets: list[Asset]) -> list[Column]:
+        return [
+            Column("income", np.float64, (len(Income),), tuple(key.name for key in Income)),
+            Column("expenses", np.float64, (len(Expense),), tuple(key.name for key in Expense)),
+        ]
+
+    def write(self, portfolio: Portfolio, row: int) -> None:
+        income = self.columns["income"][row]
+        for i, key in enumerate(Income):
+            income[i] = portfolio.income.get(key, 0.0)
+        expenses = self.columns["expenses"][row]
+        for i, key in enumerate(Expense):
+            expenses[i] = portfolio.expenses.get(key, 0.0)
+
+    def derive_columns(self, trace: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+        return {"income": trace["income"], "expenses": trace["expenses"]}
+
+    def value_at(self, row: int):
+        return {
+            "income": [
+                {
+                    "name": key.name,
+                    "value": float(self.columns["income"][row, i]),
                 }
-                for key, value in portfolio.income.items()
+                for i, key in enumerate(Income)
             ],
             "expenses": [
                 {
                     "name": key.name,
-                    "value": value,
+                    "value": float(self.columns["expenses"][row, i]),
                 }
-                for key, value in portfolio.expenses.items()
+                for i, key in enumerate(Expense)
             ]
         }
@@ -0,0 +1,180 @@
+"""Monte Carlo estimates that add paths until they are precise enough,
+e.g. the probability of having reached FI by a given year.
+"""
+import dataclasses
+import math
+
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset, GeometricBrownianMotionAsset
+from pfme.batch.asset import (
+    SAMPLING_METHODS,
+    BatchConstantGeomIncreaseAsset,
+    BatchCorrelatedAsset,
+    BatchGeometricBrownianMotionAsset,
+    BatchStochasticAsset,
+    reseed,
+)
+from pfme.batch.metric import BatchRunMetric, BatchUnitValue
+from pfme.batch.simulation import BatchSimulation
+from pfme.config import SimulationConfig
+
+# Providers whose expected value follows ConstantGeomIncreaseAsset with the
+# same starting value and growth rate
+_ANALYTIC_MEAN_PROVIDERS = (
+    ConstantGeomIncreaseAsset,
+    GeometricBrownianMotionAsset,
+    BatchConstantGeomIncreaseAsset,
+    BatchGeometricBrownianMotionAsset,
+)
+
+
+@dataclass
+class Estimate:
+    # Estimated mean of the metric over all paths
+    mean: float
+    # Half-width of the confidence interval around mean
+    half_width: float
+    n_paths: int
+    n_batches: int
+    # Whether half_width reached the tolerance within max_paths
+    converged: bool
+
+
+class _Moments:
+    """Running sums of samples y and controls x."""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_y = self.sum_x = 0.0
+        self.sum_yy = self.sum_xx = self.sum_xy = 0.0
+
+    def add(self, y: np.ndarray, x: np.ndarray) -> None:
+        self.n += len(y)
+        self.sum_y += float(y.sum())
+        self.sum_x += float(x.sum())
+        self.sum_yy += float(y @ y)
+        self.sum_xx += float(x @ x)
+        self.sum_xy += float(x @ y)
+
+    def estimate(self, expected_x: float | None) -> tuple[float, float]:
+        """Mean of y, and variance of one sample, both control-adjusted if
+        expected_x is given.
+        """
+        n = self.n
+        mean_y = self.sum_y / n
+        if n < 2:
+            return mean_y, math.inf
+        var_y = max(self.sum_yy - n * mean_y ** 2, 0.0) / (n - 1)
+        if expected_x is None:
+            return mean_y, var_y
+
+        mean_x = self.sum_x / n
+        var_x = max(self.sum_xx - n * mean_x ** 2, 0.0) / (n - 1)
+        if var_x == 0:
+            return mean_y, var_y
+        cov_xy = (self.sum_xy - n * mean_x * mean_y) / (n - 1)
+        beta = cov_xy / var_x
+        return mean_y - beta * (mean_x - expected_x), max(var_y - cov_xy * beta, 0.0)
+
+
+def _values_at(metric: BatchRunMetric, year: float) -> tuple[int, np.ndarray]:
+    for step, entry in enumerate(metric.values):
+        if math.isclose(entry["year"], year):
+            return step, np.asarray(entry["value"], dtype=np.float64)
+    raise ValueError(f"Metric {metric.name()} wasn't recorded at year {year}.")
+
+
+def estimate_until_converged(
+    config: SimulationConfig,
+    metric: BatchRunMetric,
+    year: float,
+    tolerance: float,
+    batch_size: int = 1024,
+    max_paths: int = 1_048_576,
+    confidence: float = 0.95,
+    sampling: str = "plain",
+    control: Asset | None = None,
+    seed: int | None = None,
+) -> Estimate:
+    """Estimate the mean of a per-path metric at year, e.g. P(FI reached)
+    with BatchFIReached, running batches of paths until the confidence
+    interval's half-width is at most tolerance or max_paths are simulated.
+
+    sampling is applied to every stochastic asset, see BatchStochasticAsset.
+    With "antithetic", each pair of paths counts as one sample.
+
+    control names an asset whose expected value per unit follows the
+    analytic path of ConstantGeomIncreaseAsset, e.g. one with geometric
+    Brownian motion returns. Its value at year is used as a control
+    variate, which narrows the interval by as much as the metric
+    correlates with the asset.
+
+    Every batch gives each random source, including shared returns
+    models, its own stream spawned from seed, so batches are independent
+    and the estimate is reproducible if seed is given. Assets drawing from
+    a returns model only support plain sampling. The interval assumes
+    independent samples, so for Sobol sampling, whose points are more even
+    than that, it is conservative.
+    """
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling {sampling!r}, expected one of {', '.join(SAMPLING_METHODS)}.")
+    if sampling == "antithetic" and batch_size % 2:
+        raise ValueError(f"Antithetic sampling needs an even batch_size, got {batch_size}.")
+    expected_x = None
+    if control is not None:
+        control_provider = config.asset_provider_mapping.get(control)
+        if not isinstance(control_provider, _ANALYTIC_MEAN_PROVIDERS):
+            raise ValueError(f"Asset {control.name} has no analytic expected value to control with.")
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    batch_seeds = np.random.SeedSequence(seed)
+    moments = _Moments()
+    n_paths = 0
+    n_batches = 0
+    mean, half_width = math.nan, math.inf
+    while n_paths < max_paths:
+        metrics = [metric]
+        if control is not None:
+            metrics.append(BatchUnitValue(control))
+        simulation = BatchSimulation(dataclasses.replace(config, metrics=metrics), batch_size)
+        for provider in simulation.asset_providers.values():
+            if isinstance(provider, BatchStochasticAsset):
+                provider.sampling = sampling
+            elif sampling != "plain" and isinstance(provider, BatchCorrelatedAsset):
+                raise ValueError(f"{type(provider).__name__} only supports plain sampling, got {sampling!r}.")
+        reseed(simulation.asset_providers.values(), batch_seeds.spawn(1)[0])
+        simulation.run()
+
+        step, y = _values_at(simulation.metrics[0], year)
+        if control is not None:
+            _, x = _values_at(simulation.metrics[1], year)
+            expected_x = float(ConstantGeomIncreaseAsset(
+                control_provider.starting_value,
+                control_provider.growth_rate,
+            ).trajectory(step, config.increment)[step])
+        else:
+            x = np.zeros_like(y)
+        if sampling == "antithetic":
+            half = batch_size // 2
+            y = (y[:half] + y[half:]) / 2
+            x = (x[:half] + x[half:]) / 2
+        moments.add(y, x)
+        n_paths += batch_size
+        n_batches += 1
+
+        mean, variance = moments.estimate(expected_x)
+        half_width = z * math.sqrt(variance / moments.n)
+        if half_width <= tolerance:
+            break
+
+    return Estimate(
+        mean=mean,
+        half_width=half_width,
+        n_paths=n_paths,
+        n_batches=n_batches,
+        converged=half_width <= tolerance,
+    )
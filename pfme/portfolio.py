@@ -1,5 +1,6 @@
+from collections.abc import Iterable, Iterator, MutableMapping
 from enum import Enum, auto
-from collections import defaultdict
+from typing import Generic, TypeVar
 
 from pfme.asset import Asset, AssetProviderType
 
@@ -15,21 +16,97 @@ class Income(Enum):
     UK_TRADING = auto()
 
 
+KeyType = TypeVar('KeyType', bound=Enum)
+
+
+class SlotMap(MutableMapping, Generic[KeyType]):
+    """Mapping from a fixed set of keys to float slots.
+
+    Every key starts at 0.0. The weighted total sum(weight * value) is kept
+    up to date on every assignment, so reading it is O(1). Weights default
+    to one, making the total a plain sum.
+    """
+    __slots__ = ("_index", "_keys", "_values", "_weights", "total")
+
+    _index: dict[KeyType, int]
+    _keys: list[KeyType]
+    _values: list[float]
+    _weights: list[float]
+    total: float
+
+    def __init__(self, keys: Iterable[KeyType], weights: Iterable[float] | None = None):
+        self._keys = list(keys)
+        self._index = {key: i for i, key in enumerate(self._keys)}
+        self._values = [0.0] * len(self._keys)
+        self._weights = [1.0] * len(self._keys) if weights is None else list(weights)
+        self.total = 0.0
+
+    def __getitem__(self, key: KeyType) -> float:
+        return self._values[self._index[key]]
+
+    def __setitem__(self, key: KeyType, value: float) -> None:
+        i = self._index[key]
+        self.total += (value - self._values[i]) * self._weights[i]
+        self._values[i] = value
+
+    def __delitem__(self, key: KeyType) -> None:
+        raise TypeError("Slots of a SlotMap can't be removed")
+
+    def __iter__(self) -> Iterator[KeyType]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def get(self, key: KeyType, default: float | None = None) -> float | None:
+        i = self._index.get(key)
+        return default if i is None else self._values[i]
+
+    def values(self) -> list[float]:
+        return self._values.copy()
+
+    def items(self) -> list[tuple[KeyType, float]]:
+        return list(zip(self._keys, self._values))
+
+    def weights(self) -> list[float]:
+        return self._weights.copy()
+
+    def weight(self, key: KeyType) -> float:
+        return self._weights[self._index[key]]
+
+    def set_weights(self, weights: Iterable[float]) -> None:
+        self._weights = list(weights)
+        self.total = sum(value * weight for value, weight in zip(self._values, self._weights))
+
+
 class Portfolio:
+    """Holdings, income and expenses of a single simulated path.
+
+    Unit prices are cached from the providers on construction and by
+    `update_prices`, which the engine calls whenever the providers move.
+    This keeps `current_value`, `total_income` and `total_expenses` O(1).
+    """
+    __slots__ = ("providers", "asset_holdings", "expenses", "income")
+
     providers: dict[Asset, AssetProviderType]
 
-    # Maps assets to number of units held
-    asset_holdings: dict[Asset, float]
-    expenses: dict[Expense, float]
-    income: dict[Income, float]
+    # Maps assets to number of units held, weighted by unit price
+    asset_holdings: SlotMap[Asset]
+    expenses: SlotMap[Expense]
+    income: SlotMap[Income]
 
     def __init__(self, providers: dict[Asset, AssetProviderType]):
         self.providers = providers
-        self.asset_holdings = {}
-        for asset in providers:
-            self.asset_holdings[asset] = 0.0
-        self.expenses = defaultdict(lambda: 0.0)
-        self.income = defaultdict(lambda: 0.0)
+        self.asset_holdings = SlotMap(providers, [provider.value() for provider in providers.values()])
+        self.expenses = SlotMap(Expense)
+        self.income = SlotMap(Income)
+
+    def update_prices(self) -> None:
+        """Read the current unit price of every asset from its provider."""
+        self.asset_holdings.set_weights([provider.value() for provider in self.providers.values()])
 
     def add(
         self,
@@ -45,18 +122,14 @@ class Portfolio:
             self.asset_holdings[asset] += units
 
         if cash is not None:
-            asset_provider = self.providers[asset]
-            cash_units = cash / asset_provider.value()
+            cash_units = cash / self.asset_holdings.weight(asset)
             self.asset_holdings[asset] += cash_units
 
     def current_value(self):
-        return sum(
-            self.providers[asset].value() * units
-            for asset, units in self.asset_holdings.items()
-        )
+        return self.asset_holdings.total
 
     def asset_value_per_unit(self, asset: Asset):
-        return self.providers[asset].value()
+        return self.asset_holdings.weight(asset)
 
     def units_of_asset_held(self, asset: Asset):
         return self.asset_holdings[asset]
@@ -65,7 +138,7 @@ class Portfolio:
         return self.units_of_asset_held(asset) * self.asset_value_per_unit(asset)
 
     def total_income(self):
-        return sum(self.income.values())
+        return self.income.total
 
     def total_expenses(self):
-        return sum(self.expenses.values())
+        return self.expenses.total
@@ -0,0 +1,41 @@
+import multiprocessing
+
+from tqdm.auto import tqdm
+
+
+class Progress:
+    """Progress bar over the steps of a run, cheap enough to check every step.
+
+    The bar is only touched once the run passes `next_refresh`, so it is
+    refreshed about `refreshes` times per run rather than once per step.
+    Disabled bars, and bars in worker processes, which have nowhere to
+    show them, never create a tqdm instance and have `next_refresh` at
+    infinity.
+    """
+    next_refresh: float
+
+    def __init__(self, total: int, initial: int = 0, enabled: bool = True, refreshes: int = 100):
+        self.enabled = enabled and multiprocessing.parent_process() is None
+        self.total = total
+        self._every = max(1, total // refreshes)
+        self._shown = initial
+        self._bar = None
+        self.next_refresh = float("inf")
+        if self.enabled:
+            self._bar = tqdm(total=total, initial=initial)
+            self.next_refresh = initial + self._every
+
+    def refresh(self, position: int) -> None:
+        """Show position, and schedule the next refresh."""
+        if self._bar is None:
+            return
+        self._bar.update(position - self._shown)
+        self._shown = position
+        self.next_refresh = position + self._every
+
+    def __enter__(self) -> "Progress":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._bar is not None:
+            self._bar.close()
@@ -0,0 +1,62 @@
+import importlib.util
+
+from types import ModuleType
+
+from pfme.config import SimulationConfig
+from pfme.metric import RunMetricType
+from pfme.profiling import Profiler
+from pfme.scenario import is_scenario_file, load_scenario
+from pfme.simulation import Simulation
+
+
+def load_scenario_module(config_path: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location("pfme._dynamically_loaded.config", config_path)
+
+    if spec is None:
+        raise ValueError(f"Config path didn't point to a valid python file: {config_path}.")
+    module = importlib.util.module_from_spec(spec)
+
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def config_from_module(module: ModuleType, config_path: str, **params) -> SimulationConfig:
+    """Call the scenario's get_config, passing params as keyword arguments."""
+    try:
+        get_config = module.get_config
+    except AttributeError:
+        raise ValueError(f"Config file didn't define get_config function: {config_path}.")
+
+    config = get_config(**params)
+
+    if not isinstance(config, SimulationConfig):
+        raise ValueError(
+            f"get_config did not return a SimulationConfig: {config_path}, {type(config)}."
+        )
+
+    return config
+
+
+def load_simulation_config(config_path: str) -> SimulationConfig:
+    """Load a declarative .toml or .json scenario, or run a scenario .py file."""
+    if is_scenario_file(config_path):
+        return load_scenario(config_path)
+    return config_from_module(load_scenario_module(config_path), config_path)
+
+
+def collect_metrics(metrics: list[RunMetricType]) -> dict:
+    captured_metrics = {}
+    for metric in metrics:
+        captured_metrics[metric.name()] = metric.values
+    return captured_metrics
+
+
+def simulate(config: SimulationConfig, progress: bool = True, profiler: Profiler | None = None) -> dict:
+    simulation = Simulation(
+        config=config,
+        progress=progress,
+        profiler=profiler,
+    )
+    simulation.run()
+    return collect_metrics(simulation.metrics)
@@ -0,0 +1,271 @@
+"""Declarative scenarios, loaded from TOML or JSON without running Python.
+
+A scenario document describes a SimulationConfig:
+
+    start_year = 2024.0
+    end_year = 2074.0
+    increment = 1.0
+
+    [[strategies]]
+    type = "CareerExponential"
+    starting_salary = 40000.0
+    yearly_salary_growth = 0.03
+
+    [[strategies]]
+    type = "LimitedDurationStrategy"
+    end = 10.0
+    child = { type = "BusinessConstant", yearly_profit = 5000.0 }
+
+    [[metrics]]
+    type = "TotalAssets"
+
+    [assets.ETF_GLOBAL_STOCK]
+    type = "GeometricBrownianMotionAsset"
+    starting_value = 100.0
+    growth_rate = 0.06
+    volatility = 0.15
+
+Every object is a table whose "type" names a registered class, and whose
+other keys are passed to its constructor. Values are converted according
+to the constructor's annotations: assets are given by name, and tables
+with a "type" build nested objects, like the child of
+LimitedDurationStrategy. Tables are rejected for any other parameter.
+Left out top-level keys take the defaults of SimulationConfig, and listed
+assets replace the default providers of just those assets.
+
+Returns models shared by several assets are listed by name under
+returns_models, and referred to by that name:
+
+    [returns_models.market]
+    type = "CorrelatedReturns"
+    growth_rates = { ETF_GLOBAL_STOCK = 0.06, SAVINGS_ACCOUNT_VARIABLE_RATE = 0.03 }
+    covariance = [[0.0225, 0.0015], [0.0015, 0.0025]]
+
+    [assets.ETF_GLOBAL_STOCK]
+    type = "CorrelatedAsset"
+    model = "market"
+    starting_value = 100.0
+
+The asset of a provider taking one, like CorrelatedAsset, defaults to
+the asset it is listed under.
+"""
+import functools
+import inspect
+import json
+import os
+import tomllib
+import typing
+
+from pathlib import Path
+from typing import Any, TypeVar
+
+from pfme.asset import (
+    Asset,
+    AssetProvider,
+    ConstantGeomIncreaseAsset,
+    GeometricBrownianMotionAsset,
+    StudentTAsset,
+)
+from pfme.config import SimulationConfig
+from pfme.correlated import CorrelatedAsset, CorrelatedReturns, ReturnsModel
+from pfme.historical import HistoricalReturns
+from pfme.metric import CashflowStatement, FIReached, HoldingsByAsset, RunMetric, TotalAssets
+from pfme.strategy import (
+    BusinessConstant,
+    CareerExponential,
+    EarnPostTaxIncome,
+    FixedYearlyInvestmentStrategy,
+    InvestFractionOfCashAfterBuffer,
+    LimitedDurationStrategy,
+    SimpleSpendingWithCreep,
+    Strategy,
+)
+
+# Type name -> class, per kind of component
+STRATEGIES: dict[str, type[Strategy]] = {}
+METRICS: dict[str, type[RunMetric]] = {}
+ASSET_PROVIDERS: dict[str, type[AssetProvider]] = {}
+RETURNS_MODELS: dict[str, type[ReturnsModel]] = {}
+
+_REGISTRIES: dict[type, dict[str, type]] = {
+    Strategy: STRATEGIES,
+    RunMetric: METRICS,
+    AssetProvider: ASSET_PROVIDERS,
+    ReturnsModel: RETURNS_MODELS,
+}
+
+_TOP_LEVEL_KEYS = {"start_year", "end_year", "increment", "strategies", "metrics", "assets", "returns_models"}
+
+
+def register(cls: type, name: str | None = None) -> type:
+    """Make cls available to scenarios as name, which defaults to the
+    class name. Returns cls, so it can be used as a class decorator.
+    """
+    for base, registry in _REGISTRIES.items():
+        if issubclass(cls, base):
+            registry[cls.__name__ if name is None else name] = cls
+            return cls
+    raise ValueError(f"{cls.__name__} isn't a Strategy, RunMetric, AssetProvider or ReturnsModel.")
+
+
+for _cls in [
+    LimitedDurationStrategy,
+    FixedYearlyInvestmentStrategy,
+    EarnPostTaxIncome,
+    CareerExponential,
+    BusinessConstant,
+    InvestFractionOfCashAfterBuffer,
+    SimpleSpendingWithCreep,
+    TotalAssets,
+    HoldingsByAsset,
+    FIReached,
+    CashflowStatement,
+    ConstantGeomIncreaseAsset,
+    GeometricBrownianMotionAsset,
+    StudentTAsset,
+    CorrelatedAsset,
+    CorrelatedReturns,
+    HistoricalReturns,
+]:
+    register(_cls)
+
+
+@functools.cache
+def _parameters(cls: type) -> dict[str, Any]:
+    """Constructor parameter name -> annotation, or Any if unannotated."""
+    hints = typing.get_type_hints(cls.__init__)
+    return {
+        name: hints.get(name, Any)
+        for name, parameter in inspect.signature(cls).parameters.items()
+        if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+    }
+
+
+def _registry_for(annotation: Any) -> dict[str, type] | None:
+    if isinstance(annotation, TypeVar):
+        annotation = annotation.__bound__
+    for base, registry in _REGISTRIES.items():
+        if isinstance(annotation, type) and issubclass(annotation, base):
+            return registry
+    return None
+
+
+def _convert(value: Any, annotation: Any, path: str, models: dict[str, ReturnsModel]) -> Any:
+    registry = _registry_for(annotation)
+    if registry is RETURNS_MODELS and isinstance(value, str):
+        try:
+            return models[value]
+        except KeyError:
+            raise ValueError(f"{path}: unknown returns model {value!r}, expected one of {', '.join(models)}")
+    if registry is not None:
+        return _build(value, registry, path, models)
+    if annotation is Asset:
+        return _asset(value, path)
+    if annotation is float and isinstance(value, (int, str)) and not isinstance(value, bool):
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f"{path}: expected a number, got {value!r}")
+    if typing.get_origin(annotation) is dict and isinstance(value, dict):
+        key_type, value_type = typing.get_args(annotation)
+        return {
+            _convert(key, key_type, f"{path}.{key}", models): _convert(item, value_type, f"{path}.{key}", models)
+            for key, item in value.items()
+        }
+    if typing.get_origin(annotation) is list and isinstance(value, list):
+        (item_type,) = typing.get_args(annotation)
+        return [_convert(item, item_type, f"{path}[{i}]", models) for i, item in enumerate(value)]
+    if isinstance(value, dict):
+        # Would reach the constructor as a plain dict and only fail mid-run
+        name = getattr(annotation, "__name__", str(annotation))
+        raise ValueError(f"{path}: a {name} can't be given as a table")
+    return value
+
+
+def _asset(name: Any, path: str) -> Asset:
+    try:
+        return Asset[name]
+    except (KeyError, TypeError):
+        raise ValueError(f"{path}: unknown asset {name!r}, expected one of {', '.join(Asset.__members__)}")
+
+
+def _build(spec: Any, registry: dict[str, type], path: str, models: dict[str, ReturnsModel]) -> Any:
+    if not isinstance(spec, dict) or "type" not in spec:
+        raise ValueError(f"{path}: expected a table with a type, got {spec!r}")
+    type_name = spec["type"]
+    try:
+        cls = registry[type_name]
+    except (KeyError, TypeError):
+        raise ValueError(f"{path}: unknown type {type_name!r}, expected one of {', '.join(registry)}")
+
+    parameters = _parameters(cls)
+    unknown = set(spec) - set(parameters) - {"type"}
+    if unknown:
+        raise ValueError(f"{path}: unknown parameters {', '.join(sorted(unknown))} of {type_name}")
+    kwargs = {
+        name: _convert(value, parameters[name], f"{path}.{name}", models)
+        for name, value in spec.items()
+        if name != "type"
+    }
+    try:
+        return cls(**kwargs)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{path}: {e}")
+
+
+def config_from_dict(data: dict[str, Any]) -> SimulationConfig:
+    """Build a SimulationConfig from a parsed scenario document."""
+    if not isinstance(data, dict):
+        raise ValueError(f"Scenario must be a table, got {type(data).__name__}")
+    unknown = set(data) - _TOP_LEVEL_KEYS
+    if unknown:
+        raise ValueError(f"Unknown scenario keys {', '.join(sorted(unknown))}")
+
+    models = {}
+    for name, spec in data.get("returns_models", {}).items():
+        models[name] = _build(spec, RETURNS_MODELS, f"returns_models.{name}", models)
+
+    kwargs = {
+        "strategies": [
+            _build(spec, STRATEGIES, f"strategies[{i}]", models)
+            for i, spec in enumerate(data.get("strategies", []))
+        ],
+        "metrics": [
+            _build(spec, METRICS, f"metrics[{i}]", models)
+            for i, spec in enumerate(data.get("metrics", []))
+        ],
+    }
+    for key in ("start_year", "end_year", "increment"):
+        if key in data:
+            kwargs[key] = _convert(data[key], float, key, models)
+    config = SimulationConfig(**kwargs)
+    # Listed assets are merged over the defaults, which strategies rely
+    # on, e.g. for CASH
+    for name, spec in data.get("assets", {}).items():
+        type_name = spec.get("type") if isinstance(spec, dict) else None
+        cls = ASSET_PROVIDERS.get(type_name) if isinstance(type_name, str) else None
+        if cls is not None and "asset" in _parameters(cls) and "asset" not in spec:
+            spec = {**spec, "asset": name}
+        config.asset_provider_mapping[_asset(name, f"assets.{name}")] = _build(spec, ASSET_PROVIDERS, f"assets.{name}", models)
+    return config
+
+
+def is_scenario_file(path: str | os.PathLike) -> bool:
+    return Path(path).suffix in (".toml", ".json")
+
+
+def load_scenario(path: str | os.PathLike) -> SimulationConfig:
+    """Load a .toml or .json scenario file."""
+    path = Path(path)
+    if path.suffix == ".toml":
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    elif path.suffix == ".json":
+        with open(path) as f:
+            data = json.load(f)
+    else:
+        raise ValueError(f"Scenario files must be .toml or .json: {path}.")
+    try:
+        return config_from_dict(data)
+    except ValueError as e:
+        raise ValueError(f"Invalid scenario {path}: {e}")
@@ -0,0 +1,159 @@
+"""Long-running simulation server.
+
+`python -m pfme.server --socket PATH` (or `--port N` for localhost TCP)
+keeps the interpreter and its imports warm and answers simulation
+requests, one JSON object per line:
+
+    {"id": 1, "config": "scenario.py", "params": {"amount": 1000}}
+
+is answered by
+
+    {"id": 1, "start_time": ..., "end_time": ..., "metrics": {...}}
+
+or {"id": 1, "error": "..."}. params are passed to the scenario's
+get_config as keyword arguments and may be left out; declarative .toml
+and .json scenarios take none. Requests are read by an asyncio front
+end and simulated in a pool of worker processes, which keep each
+scenario module loaded until its file changes. Connections may
+send any number of requests; responses come in request order.
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import socket
+
+from concurrent.futures import ProcessPoolExecutor
+from types import ModuleType
+from typing import Any
+
+from pfme.run import config_from_module, load_scenario_module, simulate
+from pfme.scenario import is_scenario_file, load_scenario
+
+# Scenario modules loaded by this process: path -> (mtime_ns, module)
+_scenario_modules: dict[str, tuple[int, ModuleType]] = {}
+
+
+def load_scenario_module_cached(config_path: str) -> ModuleType:
+    """Same as load_scenario_module, reusing the module until the file's
+    modification time changes.
+    """
+    path = os.path.abspath(config_path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _scenario_modules.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    module = load_scenario_module(path)
+    _scenario_modules[path] = (mtime_ns, module)
+    return module
+
+
+def run_request(request: dict[str, Any]) -> dict[str, Any]:
+    """Simulate one request, in a worker process."""
+    response = {"id": request.get("id")}
+    try:
+        config_path = request["config"]
+        if is_scenario_file(config_path):
+            if request.get("params"):
+                raise ValueError("Declarative scenarios don't take params")
+            config = load_scenario(config_path)
+        else:
+            module = load_scenario_module_cached(config_path)
+            config = config_from_module(module, config_path, **request.get("params", {}))
+
+        start_time = dt.datetime.now(dt.UTC)
+        metrics = simulate(config, progress=False)
+        end_time = dt.datetime.now(dt.UTC)
+    except Exception as e:
+        # Report the failure to the client; the worker carries on serving
+        response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    response["start_time"] = start_time.isoformat()
+    response["end_time"] = end_time.isoformat()
+    response["metrics"] = metrics
+    return response
+
+
+class SimulationServer:
+    """asyncio front end passing requests on to a pool of worker processes."""
+    executor: ProcessPoolExecutor
+
+    def __init__(self, workers: int = 1):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                except ValueError as e:
+                    response = {"id": None, "error": f"Invalid request: {e}"}
+                else:
+                    response = await loop.run_in_executor(self.executor, run_request, request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def start_unix(self, socket_path: str) -> asyncio.Server:
+        return await asyncio.start_unix_server(self.handle, path=socket_path)
+
+    async def start_tcp(self, port: int, host: str = "127.0.0.1") -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host=host, port=port)
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+def request(message: dict[str, Any], socket_path: str | None = None, port: int | None = None) -> dict[str, Any]:
+    """Send one request to a running server and wait for the response."""
+    if socket_path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(socket_path)
+    else:
+        connection = socket.create_connection(("127.0.0.1", port))
+    with connection, connection.makefile("rwb") as stream:
+        stream.write(json.dumps(message).encode() + b"\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    address = ap.add_mutually_exclusive_group(required=True)
+    address.add_argument("--socket", type=str, help="Path of the Unix socket to listen on.")
+    address.add_argument("--port", type=int, help="Port to listen on at 127.0.0.1.")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes running simulations.",
+    )
+    return ap.parse_args()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = SimulationServer(args.workers)
+    try:
+        if args.socket is not None:
+            listener = await server.start_unix(args.socket)
+        else:
+            listener = await server.start_tcp(args.port)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main() -> None:
+    asyncio.run(serve(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Reproducible Monte Carlo jobs split into shards.
+
+A job simulates n_paths paths of a config in fixed blocks of block_size
+paths. Every block draws its returns from its own random stream, derived
+from the job's master seed like SeedSequence.spawn, so a block's result
+depends only on the job and the block's index. Shards are contiguous
+ranges of blocks, run in local worker processes or, as self-contained
+job files, on other hosts:
+
+    python -m pfme.shard split --config scenario.py --paths 100000 --seed 1 --shards 8 --out jobs/
+    python -m pfme.shard run jobs/shard-0.pkl --out results/shard-0.pkl
+    python -m pfme.shard merge results/*.pkl --out merged.npz
+
+Merging folds the blocks together in block order, so the merged result
+is bit-identical however many shards the job was split into.
+"""
+import argparse
+import copy
+import datetime as dt
+import json
+import os
+import pickle
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from pfme.batch.asset import reseed
+from pfme.batch.metric import BatchAggregate, stack_values
+from pfme.batch.simulation import BatchSimulation
+from pfme.config import SimulationConfig
+from pfme.run import load_simulation_config
+
+
+@dataclass
+class Job:
+    config: SimulationConfig
+    n_paths: int
+    seed: int
+    # Part of the job's definition: changing it changes the random streams
+    block_size: int = 1024
+
+    @property
+    def n_blocks(self) -> int:
+        return -(-self.n_paths // self.block_size)
+
+    def block_paths(self, block: int) -> int:
+        return min(self.block_size, self.n_paths - block * self.block_size)
+
+    def block_seed(self, block: int) -> np.random.SeedSequence:
+        """Same as the block-th child of SeedSequence(seed).spawn."""
+        return np.random.SeedSequence(self.seed, spawn_key=(block,))
+
+
+@dataclass
+class Shard:
+    """Self-contained unit of work: a job and the blocks to run of it."""
+    job: Job
+    blocks: list[int]
+
+
+@dataclass
+class ShardResult:
+    # Block index -> result of every metric of the config, in order. Array
+    # metrics have shape (n_steps, block_paths); aggregates are reducers.
+    blocks: dict[int, list[Any]]
+    years: list[float]
+
+
+def split(job: Job, n_shards: int) -> list[Shard]:
+    """Split job into at most n_shards shards of nearly equal size."""
+    if n_shards < 1:
+        raise ValueError(f"Need at least one shard, got {n_shards}.")
+    return [
+        Shard(job, blocks.tolist())
+        for blocks in np.array_split(np.arange(job.n_blocks), min(n_shards, job.n_blocks))
+    ]
+
+
+def run_block(job: Job, block: int) -> tuple[list[Any], list[float]]:
+    config = copy.deepcopy(job.config)
+    simulation = BatchSimulation(config, job.block_paths(block))
+    reseed(simulation.asset_providers.values(), job.block_seed(block))
+    simulation.run()
+
+    results = []
+    for metric in simulation.metrics:
+        if isinstance(metric, BatchAggregate):
+            results.append(metric)
+        elif all(isinstance(entry["value"], np.ndarray) for entry in metric.values):
+            results.append(stack_values(metric))
+        else:
+            raise ValueError(f"Can only shard array-valued or aggregate metrics, got {metric.name()}.")
+    return results, config.years().tolist()
+
+
+def run_shard(shard: Shard) -> ShardResult:
+    blocks = {}
+    years = []
+    for block in shard.blocks:
+        blocks[block], years = run_block(shard.job, block)
+    return ShardResult(blocks, years)
+
+
+def merge(results: list[ShardResult]) -> tuple[list[Any], list[float]]:
+    """Combine shard results into one result per metric: arrays of shape
+    (n_steps, n_paths), or reducers of all paths.
+
+    Raises ValueError if a block is missing or present twice.
+    """
+    blocks = {}
+    for result in results:
+        for block, values in result.blocks.items():
+            if block in blocks:
+                raise ValueError(f"Block {block} is in more than one shard result")
+            blocks[block] = values
+    if sorted(blocks) != list(range(len(blocks))):
+        missing = sorted(set(range(max(blocks, default=-1) + 1)) - set(blocks))
+        raise ValueError(f"Shard results are missing blocks {missing}")
+
+    merged = []
+    for i, first in enumerate(blocks[0] if blocks else []):
+        if isinstance(first, BatchAggregate):
+            reducer = copy.deepcopy(first)
+            for block in range(1, len(blocks)):
+                reducer.merge(blocks[block][i])
+            merged.append(reducer)
+        else:
+            merged.append(np.concatenate([blocks[block][i] for block in range(len(blocks))], axis=1))
+    return merged, results[0].years if results else []
+
+
+def run_local(job: Job, workers: int = 1) -> tuple[list[Any], list[float]]:
+    """Run every block of job, over workers processes, and merge the results."""
+    shards = split(job, workers)
+    if workers <= 1:
+        return merge([run_shard(shard) for shard in shards])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return merge(list(executor.map(run_shard, shards)))
+
+
+def save(path: str | os.PathLike, obj: Shard | ShardResult) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+def load(path: str | os.PathLike) -> Shard | ShardResult:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    commands = ap.add_subparsers(dest="command", required=True)
+
+    split_parser = commands.add_parser("split", help="Write the shards of a job as job files.")
+    split_parser.add_argument(
+        "--config",
+        type=str,
+        required=True,
+        help="Path to a .toml or .json scenario, or a .py file defining a `get_config` function.",
+    )
+    split_parser.add_argument("--paths", type=int, required=True, help="Number of paths to simulate.")
+    split_parser.add_argument("--seed", type=int, required=True, help="Master seed of the job.")
+    split_parser.add_argument("--block-size", type=int, default=1024, help="Paths per block of the job.")
+    split_parser.add_argument("--shards", type=int, required=True, help="Number of job files to write.")
+    split_parser.add_argument("--out", type=str, required=True, help="Directory to write the job files to.")
+
+    run_parser = commands.add_parser("run", help="Run one job file.")
+    run_parser.add_argument("job", type=str, help="Path of the job file.")
+    run_parser.add_argument("--out", type=str, required=True, help="Path to write the shard result to.")
+
+    merge_parser = commands.add_parser("merge", help="Merge shard results.")
+    merge_parser.add_argument("results", type=str, nargs="+", help="Paths of the shard results.")
+    merge_parser.add_argument(
+        "--out",
+        type=str,
+        required=True,
+        help="Path of a .npz file for array metrics; reducer metrics are printed as JSON.",
+    )
+    return ap.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    start_time = dt.datetime.now(dt.UTC)
+
+    if args.command == "split":
+        job = Job(load_simulation_config(args.config), args.paths, args.seed, args.block_size)
+        os.makedirs(args.out, exist_ok=True)
+        outputs = []
+        for i, shard in enumerate(split(job, args.shards)):
+            outputs.append(os.path.join(args.out, f"shard-{i}.pkl"))
+            save(outputs[-1], shard)
+        summary = {"jobs": outputs}
+    elif args.command == "run":
+        save(args.out, run_shard(load(args.job)))
+        summary = {"result": args.out}
+    else:
+        merged, years = merge([load(path) for path in args.results])
+        arrays = {"year": np.array(years)}
+        reducers = {}
+        for i, result in enumerate(merged):
+            if isinstance(result, BatchAggregate):
+                reducers[f"{i}:{result.name()}"] = result.values
+            else:
+                arrays[f"metric_{i}"] = result
+        np.savez_compressed(args.out, **arrays)
+        summary = {"result": args.out, "reducers": reducers}
+
+    end_time = dt.datetime.now(dt.UTC)
+    print(json.dumps({
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "args": vars(args),
+        **summary,
+    }))
+
+
+if __name__ == "__main__":
+    main()
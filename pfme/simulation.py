@@ -1,26 +1,74 @@
+import contextlib
+import copy
 import math
+import pickle
+
+from collections.abc import Sequence
+from typing import Callable
 
 import numpy as np
-from tqdm.auto import tqdm
 
 from pfme.asset import Asset, AssetProviderType
 from pfme.config import SimulationConfig
-from pfme.metric import RunMetricType
-from pfme.portfolio import Portfolio
-from pfme.strategy import StrategyType
+from pfme.metric import MetricSink, RunMetricType
+from pfme.portfolio import KeyType, Portfolio
+from pfme.profiling import Profiler
+from pfme.progress import Progress
+from pfme.stop import StopCondition
+from pfme.strategy import StrategyType, overrides, trajectory_deltas
+from pfme.trace import Trace
 
 
 class Simulation:
+    """Steps a portfolio through the years of a SimulationConfig.
+
+    `run` goes from start to end in one call. The run can also be advanced
+    piecewise with `start`, `step` and `run_until`; everything it depends on
+    lives on this object, so `snapshot` captures the complete state and
+    `fork` continues from it with a different set of strategies.
+
+    Strategies, metrics and asset providers are run as per-run instances,
+    and the recorded metrics are read from `metrics` of the simulation.
+
+    Without a sink, the state of every step is recorded once into `trace`,
+    and metrics that can be derived from it are computed from the trace
+    at the end of `run_until`, or by `update_metrics`. Other metrics are
+    recorded every step.
+    """
     metrics: list[RunMetricType]
+    trace: Trace
     asset_providers: dict[Asset, AssetProviderType]
     strategies: list[StrategyType]
 
+    years: np.ndarray | None
+    portfolio: Portfolio | None
+    # Index into years of the next step to simulate
+    step_index: int
+    # Condition that ended the last call to run or run_until, and the year
+    # of the step it was met at
+    stopped_by: StopCondition | None
+    stopped_year: float | None
+
     def __init__(
         self,
-        config: SimulationConfig
+        config: SimulationConfig,
+        progress: bool = True,
+        sink: MetricSink | None = None,
+        profiler: Profiler | None = None,
     ):
-        self.metrics = config.metrics
-        self.strategies = config.strategies
+        """If sink is given, metric entries are passed to it as they are
+        calculated instead of being collected in RunMetric.values. If
+        profiler is given, it times the hooks of every component.
+        """
+        self.progress = progress
+        self.sink = sink
+        self.profiler = profiler
+        self._profiling = False
+        # The run works on its own instances, so config is never changed
+        # and can be shared by any number of runs
+        self.metrics = [metric.new_run() for metric in config.metrics]
+        self.trace = Trace()
+        self.strategies = [strategy.new_run() for strategy in config.strategies]
         self.config = config
 
         collected_assets = set()
@@ -29,27 +77,331 @@ class Simulation:
         for metric in self.metrics:
             collected_assets |= metric.requested_assets()
 
-        self.asset_providers = {
+        # Copied in one go, so that providers sharing a returns model share
+        # its copy
+        self.asset_providers = copy.deepcopy({
             asset: self.config.asset_provider_mapping[asset]
             for asset in collected_assets
-        }
+        })
+
+        self.years = None
+        self.portfolio = None
+        self.step_index = 0
+        self.stopped_by = None
+        self.stopped_year = None
 
-    def run(self) -> None:
+    @property
+    def started(self) -> bool:
+        return self.portfolio is not None
+
+    @property
+    def done(self) -> bool:
+        return self.started and self.step_index >= len(self.years)
+
+    @property
+    def year(self) -> float:
+        """Year of the next step to simulate."""
+        return float(self.years[self.step_index])
+
+    def start(self) -> None:
+        """Reset all components to the start year, ready for the first step."""
         c = self.config
-        portfolio = Portfolio(self.asset_providers)
-
-        for asset_provider in self.asset_providers.values():
-            asset_provider.update_value(c.start_year, math.nan)
-        for year in tqdm(np.arange(c.start_year, c.end_year, c.increment)):
-            year = float(year)
-            for strategy in self.strategies:
-                strategy.update_income(portfolio.income, year, c.increment)
-            for strategy in self.strategies:
-                strategy.update_expenses(portfolio.expenses, year, c.increment)
-            for strategy in self.strategies:
-                strategy.execute(portfolio, year, c.increment)
+        self.years = c.years()
+        # Python floats, so that steps don't box a NumPy scalar every time
+        self._year_values = self.years.tolist()
+        self.step_index = 0
+        self.portfolio = Portfolio(self.asset_providers)
 
+        for i, asset_provider in enumerate(self.asset_providers.values()):
+            asset_provider.prepare(len(self.years), c.increment)
+            self._timed(asset_provider.update_value, "asset_provider", i)(c.start_year, math.nan)
+        self.portfolio.update_prices()
+        if self.sink is None:
+            assets = list(self.portfolio.asset_holdings)
+            self.trace.allocate(len(self.years), assets)
             for metric in self.metrics:
-                metric.record(portfolio, year)
-            for asset_provider in self.asset_providers.values():
-                asset_provider.update_value(year, c.increment)
+                metric.allocate(len(self.years), assets)
+
+        # Strategies with a closed form are evaluated for the whole grid up
+        # front and applied as per-step changes, before the remaining ones
+        self._income_trajectories = []
+        self._expense_trajectories = []
+        for strategy in self.strategies:
+            self._add_trajectories(strategy, self.years)
+        self._plan()
+
+    def _add_trajectories(self, strategy: StrategyType, years: np.ndarray) -> None:
+        """Evaluate the closed forms of strategy from years[0] onwards,
+        padded with zeros for the steps before it.
+        """
+        padding = len(self.years) - len(years)
+        for trajectories, trajectory in (
+            (self._income_trajectories, strategy.income_trajectory(years)),
+            (self._expense_trajectories, strategy.expenses_trajectory(years)),
+        ):
+            if trajectory is not None:
+                trajectory = {
+                    key: np.concatenate([np.zeros(padding), values])
+                    for key, values in trajectory.items()
+                }
+                trajectories.append((strategy, trajectory))
+
+    def _plan(self) -> None:
+        self._income_deltas = self._deltas(self._income_trajectories)
+        self._expense_deltas = self._deltas(self._expense_trajectories)
+        analytic_income = {id(strategy) for strategy, _ in self._income_trajectories}
+        analytic_expenses = {id(strategy) for strategy, _ in self._expense_trajectories}
+        # Index of each strategy in self.strategies, to attribute its timings
+        self._income_strategies = [
+            (i, s) for i, s in enumerate(self.strategies) if id(s) not in analytic_income
+        ]
+        self._expense_strategies = [
+            (i, s) for i, s in enumerate(self.strategies) if id(s) not in analytic_expenses
+        ]
+        self._bind()
+
+    def _timed(self, hook: Callable, component: str, index: int) -> Callable:
+        """hook, wrapped to be timed if the run is profiled."""
+        if not self._profiling:
+            return hook
+        return self.profiler.wrap(hook, component, index)
+
+    def _bind(self) -> None:
+        """Bind the hooks called every step, per phase and in order,
+        leaving out strategy hooks that are the base class's no-op.
+        """
+        self._income_hooks = [
+            self._timed(s.update_income, "strategy", i)
+            for i, s in self._income_strategies
+            if overrides(s, "update_income")
+        ]
+        self._expense_hooks = [
+            self._timed(s.update_expenses, "strategy", i)
+            for i, s in self._expense_strategies
+            if overrides(s, "update_expenses")
+        ]
+        self._execute_hooks = [
+            self._timed(s.execute, "strategy", i)
+            for i, s in enumerate(self.strategies)
+            if overrides(s, "execute")
+        ]
+        if self.sink is None:
+            # (metric, its derive), for the metrics derived from the trace
+            self._derived_metrics = [
+                (metric, self._timed(metric.derive, "metric", i))
+                for i, metric in enumerate(self.metrics)
+                if metric.derivable
+            ]
+            self._metric_hooks = [
+                self._timed(metric.record, "metric", i)
+                for i, metric in enumerate(self.metrics)
+                if not metric.derivable
+            ]
+            if self._derived_metrics:
+                self._metric_hooks.insert(0, self._timed(self.trace.record, "trace", 0))
+        else:
+            self._metric_hooks = [self._timed(metric.entry, "metric", i) for i, metric in enumerate(self.metrics)]
+        self._provider_hooks = [
+            self._timed(provider.update_value, "asset_provider", i)
+            for i, provider in enumerate(self.asset_providers.values())
+        ]
+
+    @staticmethod
+    def _deltas(
+        trajectories: list[tuple[StrategyType, dict[KeyType, np.ndarray]]],
+    ) -> list[tuple[KeyType, list[float]]]:
+        return trajectory_deltas([trajectory for _, trajectory in trajectories])
+
+    def step(self, stop: Sequence[StopCondition] = ()) -> StopCondition | None:
+        """Simulate the year at step_index and move on to the next one.
+
+        Returns the first of the stop conditions met at this step, if any.
+        """
+        increment = self.config.increment
+        portfolio = self.portfolio
+        income = portfolio.income
+        expenses = portfolio.expenses
+        step = self.step_index
+        year = self._year_values[step]
+
+        for key, deltas in self._income_deltas:
+            income[key] += deltas[step]
+        for update_income in self._income_hooks:
+            update_income(income, year, increment)
+        for key, deltas in self._expense_deltas:
+            expenses[key] += deltas[step]
+        for update_expenses in self._expense_hooks:
+            update_expenses(expenses, year, increment)
+        for execute in self._execute_hooks:
+            execute(portfolio, year, increment)
+
+        if self.sink is None:
+            for record in self._metric_hooks:
+                record(portfolio, year)
+        else:
+            for metric, entry in zip(self.metrics, self._metric_hooks):
+                self.sink(metric, entry(portfolio, year))
+        reached = None
+        for condition in stop:
+            if condition.reached(portfolio, year):
+                reached = condition
+                break
+        for update_value in self._provider_hooks:
+            update_value(year, increment)
+        portfolio.update_prices()
+
+        self.step_index = step + 1
+        return reached
+
+    def run_until(self, year: float, stop: Sequence[StopCondition] = ()) -> None:
+        """Simulate every step before year, so the next step is the first
+        one at or after it.
+
+        Ends early after the first step meeting one of the stop conditions,
+        recorded in stopped_by and stopped_year.
+        """
+        with self.profiling():
+            if not self.started:
+                self.start()
+            self.stopped_by = None
+            self.stopped_year = None
+            end = int(np.searchsorted(self.years, year))
+            with Progress(len(self.years), self.step_index, self.progress) as progress:
+                while self.step_index < end:
+                    step_year = self._year_values[self.step_index]
+                    reached = self.step(stop)
+                    if self.step_index >= progress.next_refresh:
+                        progress.refresh(self.step_index)
+                    if reached is not None:
+                        self.stopped_by = reached
+                        self.stopped_year = step_year
+                        break
+                progress.refresh(self.step_index)
+            self.update_metrics()
+
+    def update_metrics(self) -> None:
+        """Derive the metrics computed from the trace up to the last step."""
+        if self.sink is not None or not self.started:
+            return
+        for metric, derive in self._derived_metrics:
+            if metric.n_rows != self.trace.n_rows:
+                derive(self.trace)
+
+    @contextlib.contextmanager
+    def profiling(self):
+        """Time the hooks of all components with the profiler, if any,
+        while in the context.
+        """
+        if self.profiler is None:
+            yield
+            return
+
+        self._profiling = True
+        # Hooks bound before were bound without the timing wrappers
+        if self.started:
+            self._bind()
+        try:
+            yield
+        finally:
+            self._profiling = False
+            if self.started:
+                self._bind()
+
+    def run(self, stop: Sequence[StopCondition] = ()) -> None:
+        """Simulate the remaining steps, starting first if needed, or up
+        to the first step meeting one of the stop conditions.
+        """
+        self.run_until(math.inf, stop)
+
+    def snapshot(self) -> "Simulation":
+        """Independent copy of the simulation in its current state.
+
+        Continuing either the copy or the original leaves the other
+        untouched. The sink, if any, is shared rather than copied.
+        """
+        # Runs never change the config, so it's shared
+        child = copy.deepcopy(self, {id(self.config): self.config})
+        child.sink = self.sink
+        return child
+
+    def fork(self, strategies: list[StrategyType] | None = None) -> "Simulation":
+        """Snapshot that continues with a different list of strategies.
+
+        strategies may mix strategies of this simulation, whose copies
+        carry on with their state, and new ones, which start at the next
+        step as if the simulation had begun there. Income and expenses set
+        by removed strategies stay at their last value, as they would if
+        the strategy had stopped updating them.
+        """
+        if strategies is None:
+            return self.snapshot()
+        if not self.started:
+            raise ValueError("Can only fork a simulation that was started")
+
+        memo = {id(self.config): self.config}
+        child = copy.deepcopy(self, memo)
+        child.sink = self.sink
+        # Strategies of this simulation map to their copies in the child
+        strategies = [
+            memo[id(strategy)] if id(strategy) in memo else strategy.new_run()
+            for strategy in strategies
+        ]
+
+        for strategy in strategies:
+            missing = strategy.requested_assets() - set(child.asset_providers)
+            if missing:
+                names = ", ".join(sorted(asset.name for asset in missing))
+                raise ValueError(f"Assets not simulated from the start can't be requested by a fork: {names}.")
+
+        kept = {id(strategy) for strategy in strategies}
+        child._income_trajectories = [(s, t) for s, t in child._income_trajectories if id(s) in kept]
+        child._expense_trajectories = [(s, t) for s, t in child._expense_trajectories if id(s) in kept]
+        carried = {id(strategy) for strategy in child.strategies}
+        for strategy in strategies:
+            if id(strategy) not in carried:
+                child._add_trajectories(strategy, child.years[child.step_index:])
+
+        child.strategies = strategies
+        child._plan()
+        return child
+
+    def __getstate__(self) -> dict:
+        # Sinks write to the process that created them, so aren't saved
+        state = self.__dict__.copy()
+        state["sink"] = None
+        return state
+
+    def save(self, path: str) -> None:
+        """Write the complete state to path, e.g. to resume in another process."""
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: str, progress: bool = True, sink: MetricSink | None = None) -> "Simulation":
+        with open(path, "rb") as f:
+            simulation = pickle.load(f)
+        simulation.progress = progress
+        simulation.sink = sink
+        return simulation
+
+
+def run_branches(
+    config: SimulationConfig,
+    year: float,
+    branches: dict[str, list[StrategyType]],
+) -> dict[str, Simulation]:
+    """Simulate config up to year once, then each branch's strategies from
+    year onwards, as in Simulation.fork.
+
+    Returns the finished simulation of every branch; their metrics cover
+    the whole run, shared prefix included.
+    """
+    trunk = Simulation(config, progress=False)
+    trunk.run_until(year)
+
+    finished = {}
+    for name, strategies in branches.items():
+        branch = trunk.fork(strategies)
+        branch.run()
+        finished[name] = branch
+    return finished
@@ -0,0 +1,98 @@
+"""Goal seeking over a strategy parameter, e.g. the smallest yearly
+investment that reaches FI by a given year.
+"""
+import copy
+import dataclasses
+import math
+
+from dataclasses import dataclass
+
+from pfme.config import SimulationConfig
+from pfme.simulation import Simulation
+from pfme.stop import StopCondition, YearReached
+from pfme.strategy import StrategyType
+
+
+@dataclass
+class Solution:
+    # Value closest to the boundary that still meets the goal
+    value: float
+    # Year of the step the goal was met at, with value
+    year: float
+    # Number of simulations run
+    probes: int
+
+
+def _probe(
+    config: SimulationConfig,
+    strategy: StrategyType,
+    parameter: str,
+    value: float,
+    stop: list[StopCondition],
+) -> Simulation:
+    # Probes run on copies, so every one starts from the same state,
+    # including the random generators of the asset providers
+    memo = {}
+    probe_config = copy.deepcopy(dataclasses.replace(config, metrics=[]), memo)
+    if id(strategy) not in memo:
+        raise ValueError("Strategy to solve for isn't part of the config")
+    setattr(memo[id(strategy)], parameter, value)
+
+    simulation = Simulation(probe_config, progress=False)
+    simulation.run(stop)
+    return simulation
+
+
+def goal_seek(
+    config: SimulationConfig,
+    strategy: StrategyType,
+    parameter: str,
+    low: float,
+    high: float,
+    goal: StopCondition,
+    by_year: float = math.inf,
+    tolerance: float = 1.0,
+    max_probes: int = 64,
+) -> Solution:
+    """Bisect strategy.parameter over [low, high] for the boundary at which
+    goal is met at or before by_year.
+
+    The goal must be met at exactly one end of the bracket, and whether it
+    is met must change only once in between. If it's met at high, the
+    smallest value meeting it is returned, otherwise the largest. Each
+    probe stops as soon as the goal is met or by_year has passed.
+    """
+    stop = [goal]
+    if by_year != math.inf:
+        stop.append(YearReached(by_year))
+    probes = 0
+
+    def met(value: float) -> tuple[bool, float | None]:
+        nonlocal probes
+        probes += 1
+        simulation = _probe(config, strategy, parameter, value, stop)
+        # With by_year between steps, YearReached fires at the step after
+        # it, where the goal may be met too late
+        reached = simulation.stopped_by is goal and simulation.stopped_year <= by_year
+        return reached, simulation.stopped_year
+
+    low_met, low_year = met(low)
+    high_met, high_year = met(high)
+    if low_met == high_met:
+        raise ValueError(
+            f"Goal is {'met' if low_met else 'not met'} at both {parameter}={low} and {parameter}={high}."
+        )
+
+    if high_met:
+        good, good_year, bad = high, high_year, low
+    else:
+        good, good_year, bad = low, low_year, high
+    while abs(good - bad) > tolerance and probes < max_probes:
+        middle = (good + bad) / 2
+        middle_met, middle_year = met(middle)
+        if middle_met:
+            good, good_year = middle, middle_year
+        else:
+            bad = middle
+
+    return Solution(value=good, year=good_year, probes=probes)
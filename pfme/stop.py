@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from pfme.metric import FIReached, RunMetricType
+from pfme.portfolio import Portfolio
+
+
+class StopCondition(ABC):
+    """Ends a run early once met.
+
+    Checked after every step, on the same state the metrics record for
+    that step.
+    """
+    @abstractmethod
+    def reached(self, portfolio: Portfolio, year: float) -> bool:
+        ...
+
+
+@dataclass
+class MetricIsTrue(StopCondition):
+    """Met at the first step where metric calculates a truthy value."""
+    metric: RunMetricType
+
+    def reached(self, portfolio: Portfolio, year: float) -> bool:
+        return bool(self.metric.calculate(portfolio))
+
+
+def fi_reached(withdrawal_rate: float) -> MetricIsTrue:
+    return MetricIsTrue(FIReached(withdrawal_rate))
+
+
+@dataclass
+class YearReached(StopCondition):
+    """Met at the first step at or after year."""
+    year: float
+
+    def reached(self, portfolio: Portfolio, year: float) -> bool:
+        return year >= self.year
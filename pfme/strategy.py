@@ -1,19 +1,44 @@
 import math
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, replace
 from typing import TypeVar
 
+import numpy as np
+
 from pfme.asset import Asset
+from pfme.flow import StepFlow
 from pfme.portfolio import Portfolio, Expense, Income
+from pfme.tax import UK_TAX_ENGINE, UkTaxEngine
 
 
 @dataclass
 class Strategy(ABC):
+    """Base of all strategies.
+
+    Fields with init=False hold the state of a run. The engine runs the
+    instance returned by new_run, so the configured strategy is never
+    changed and one config can drive any number of runs.
+    """
     @abstractmethod
     def requested_assets(self) -> list[Asset]:
         ...
 
+    def new_run(self) -> "Strategy":
+        """Instance holding fresh state for one run.
+
+        Strategies without state fields, and without strategies among their
+        fields, are stateless and returned as they are.
+        """
+        children = {
+            f.name: getattr(self, f.name).new_run()
+            for f in fields(self)
+            if f.init and isinstance(getattr(self, f.name), Strategy)
+        }
+        if not children and all(f.init for f in fields(self)):
+            return self
+        return replace(self, **children)
+
     def update_expenses(self, expenses: dict[Expense, float], year: float, increment: float):
         pass
 
@@ -23,9 +48,71 @@ class Strategy(ABC):
     def execute(self, portfolio: Portfolio, year: float, increment: float) -> None:
         ...
 
+    def income_trajectory(self, years: np.ndarray) -> dict[Income, np.ndarray] | None:
+        """Closed-form contribution to income at each of years, or None.
+
+        If a trajectory is returned, the engine applies it from the
+        precomputed arrays and doesn't call update_income.
+        """
+        return None
+
+    def expenses_trajectory(self, years: np.ndarray) -> dict[Expense, np.ndarray] | None:
+        """Closed-form contribution to expenses at each of years, or None.
+
+        If a trajectory is returned, the engine applies it from the
+        precomputed arrays and doesn't call update_expenses.
+        """
+        return None
+
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray | None:
+        """Indices of the steps among years at which the strategy starts
+        to act differently, or None if that could be any step.
+
+        Used by the event-driven engine, which only calls the strategy's
+        hooks at these steps and replays step_flow for the steps in
+        between. Changes that show up in the trajectories needn't be
+        listed.
+        """
+        return None
+
+    def step_flow(self, flow: StepFlow, portfolio: Portfolio, year: float, increment: float) -> None:
+        """Add the effect of execute at the steps up to the next change
+        point to flow, whose income and expenses follow the trajectories.
+
+        Only called if change_points doesn't return None.
+        """
+        pass
+
+    def advance(self, n_steps: int, increment: float) -> None:
+        """Bring state kept across steps forward over n_steps steps whose
+        effect was applied through step_flow.
+        """
+        pass
+
 
 StrategyType = TypeVar('StrategyType', bound=Strategy)
 
+HOOKS = ("update_income", "update_expenses", "execute")
+
+
+def overrides(strategy: Strategy, hook: str) -> bool:
+    """Whether the class of strategy replaces the base class's no-op hook."""
+    return getattr(type(strategy), hook) is not getattr(Strategy, hook)
+
+KeyType = TypeVar('KeyType', Income, Expense)
+
+
+def trajectory_deltas(trajectories: list[dict[KeyType, np.ndarray]]) -> list[tuple[KeyType, list[float]]]:
+    """Sum trajectories per key and turn them into per-step changes.
+
+    Adding the i-th change at step i reproduces the summed trajectory.
+    """
+    totals = {}
+    for trajectory in trajectories:
+        for key, values in trajectory.items():
+            totals[key] = totals.get(key, 0.0) + values
+    return [(key, np.diff(total, prepend=0.0).tolist()) for key, total in totals.items()]
+
 
 @dataclass
 class LimitedDurationStrategy(Strategy):
@@ -52,6 +139,30 @@ class LimitedDurationStrategy(Strategy):
             if self.start <= year <= self.end:
                 self.child.execute(portfolio, year, increment)
 
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray | None:
+        child_points = self.child.change_points(years, increment)
+        if child_points is None:
+            return None
+        if self.relative:
+            # Summed in the same order as execute does
+            times = np.cumsum(np.concatenate([[self.elapsed], np.full(len(years), increment)]))[1:]
+        else:
+            times = years
+        active = (self.start <= times) & (times <= self.end)
+        switches = np.flatnonzero(np.diff(active)) + 1
+        return np.union1d(switches, child_points)
+
+    def step_flow(self, flow: StepFlow, portfolio: Portfolio, year: float, increment: float) -> None:
+        time = self.elapsed + increment if self.relative else year
+        if self.start <= time <= self.end:
+            self.child.step_flow(flow, portfolio, year, increment)
+
+    def advance(self, n_steps: int, increment: float) -> None:
+        if self.relative:
+            for _ in range(n_steps):
+                self.elapsed += increment
+        self.child.advance(n_steps, increment)
+
 
 @dataclass
 class FixedYearlyInvestmentStrategy(Strategy):
@@ -62,68 +173,49 @@ class FixedYearlyInvestmentStrategy(Strategy):
         return {self.asset}
 
     def execute(self, portfolio: Portfolio, year: float, increment: float) -> None:
-        portfolio.add(asset=self.asset, cash=self.amount * increment)
+        portfolio.add(self.asset, cash=self.amount * increment)
+
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray:
+        return np.empty(0, dtype=int)
 
+    def step_flow(self, flow: StepFlow, portfolio: Portfolio, year: float, increment: float) -> None:
+        flow.add(self.asset, self.amount * increment)
 
+
+@dataclass
 class EarnPostTaxIncome(Strategy):
+    tax_engine: UkTaxEngine = field(default_factory=lambda: UK_TAX_ENGINE)
+
     def requested_assets(self) -> set[Asset]:
         return {Asset.CASH}
 
-    def execute(self, portfolio: Portfolio, year: float, increment: float) -> None:
-        TRADING_ALLOWANCE = 1000
-        PROPERTY_ALLOWANCE = 1000
-        POST_ALLOWANCE_TAX_BANDS = [
-            (0.2, 37_700),
-            (0.4, 125_140),
-            (0.45, math.inf),
-        ]
-        CLASS_1_NI_BANDS = [
-            (0.08, 4189 * 12),
-            (0.02, math.inf),
-        ]
-        CLASS_4_NI_BANDS = [
-            (0.00, 12570),
-            (0.06, 50270),
-            (0.02, math.inf),
-        ]
-
+    def cash_gained(self, portfolio: Portfolio, year: float) -> float:
         rental = portfolio.income[Income.UK_RENTAL]
         trading = portfolio.income[Income.UK_TRADING]
         salary = portfolio.income[Income.UK_SALARY]
 
-        taxable = (
-            max(0, rental - PROPERTY_ALLOWANCE)
-            + max(0, trading - TRADING_ALLOWANCE)
-            + salary
-        )
+        tax, national_insurance = self.tax_engine.tax_and_ni(rental, trading, salary, year)
 
-        personal_allowance = max(0, 1250 - max(taxable - 100000, 0) / 2)
+        return rental + trading + salary - tax - national_insurance - portfolio.total_expenses()
 
-        remaining_taxable = taxable - personal_allowance
-        tax = 0
-
-        for rate, upper_limit in POST_ALLOWANCE_TAX_BANDS:
-            taxable_at_rate = min(upper_limit, remaining_taxable)
-            tax += taxable_at_rate * rate
-            remaining_taxable -= taxable_at_rate
-
-        remaining_salary = salary
-        national_insurance = 0
+    def execute(self, portfolio: Portfolio, year: float, increment: float) -> None:
+        portfolio.add(Asset.CASH, cash=self.cash_gained(portfolio, year))
 
-        for rate, upper_limit in CLASS_1_NI_BANDS:
-            taxable_at_rate = min(upper_limit, remaining_salary)
-            national_insurance += taxable_at_rate * rate
-            remaining_salary -= taxable_at_rate
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray:
+        # Income and expenses come per step with the flow, leaving the
+        # starts of tax years
+        rules = np.searchsorted(list(self.tax_engine.tax_years), years, side="right")
+        return np.flatnonzero(np.diff(np.maximum(rules, 1))) + 1
 
-        remaining_trading = trading
+    def step_flow(self, flow: StepFlow, portfolio: Portfolio, year: float, increment: float) -> None:
+        rental = flow.income[Income.UK_RENTAL]
+        trading = flow.income[Income.UK_TRADING]
+        salary = flow.income[Income.UK_SALARY]
 
-        for rate, upper_limit in CLASS_4_NI_BANDS:
-            taxable_at_rate = min(upper_limit, remaining_trading)
-            national_insurance += taxable_at_rate * rate
-            remaining_salary -= taxable_at_rate
+        # The steps share year's tax rules, as they change at change points
+        tax, national_insurance = self.tax_engine.tax_and_ni_batch(rental, trading, salary, year)
 
-        cash_gained = rental + trading + salary - tax - national_insurance - portfolio.total_expenses()
-        portfolio.add(Asset.CASH, cash=cash_gained)
+        flow.add(Asset.CASH, rental + trading + salary - tax - national_insurance - flow.total_expenses())
 
 
 @dataclass
@@ -150,6 +242,15 @@ class CareerExponential(Strategy):
 
         income[Income.UK_SALARY] += salary_now - salary_before
 
+    def income_trajectory(self, years: np.ndarray) -> dict[Income, np.ndarray]:
+        return {
+            Income.UK_SALARY: (1 + self.yearly_salary_growth) ** (years - years[0]) * self.starting_salary,
+        }
+
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray:
+        # Salary growth is applied from the income trajectory
+        return np.empty(0, dtype=int)
+
 
 @dataclass
 class BusinessConstant(Strategy):
@@ -161,6 +262,9 @@ class BusinessConstant(Strategy):
     def update_income(self, income: dict[Income, float], year: float, increment: float):
         income[Income.UK_TRADING] = self.yearly_profit
 
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray:
+        return np.empty(0, dtype=int)
+
 
 @dataclass
 class InvestFractionOfCashAfterBuffer(Strategy):
@@ -177,7 +281,7 @@ class InvestFractionOfCashAfterBuffer(Strategy):
         return {Asset.CASH} | set(self.allocation.keys())
 
     def execute(self, portfolio: Portfolio, year: float, increment: float) -> None:
-        yearly_buffer = self.buffer_per_yearly_expenses * sum(portfolio.expenses.values())
+        yearly_buffer = self.buffer_per_yearly_expenses * portfolio.total_expenses()
         investable = (portfolio.cash_of_asset_held(Asset.CASH) - yearly_buffer) * increment
         if investable < 0:
             return
@@ -210,3 +314,12 @@ class SimpleSpendingWithCreep(Strategy):
         expenses_now = self.__at_time_t(year)
 
         expenses[Expense.LIVING] += expenses_now - expenses_pre
+
+    def expenses_trajectory(self, years: np.ndarray) -> dict[Expense, np.ndarray]:
+        return {
+            Expense.LIVING: self.initial_spending * (1 + self.creep_rate) ** (years - years[0]),
+        }
+
+    def change_points(self, years: np.ndarray, increment: float) -> np.ndarray:
+        # Spending creep is applied from the expenses trajectory
+        return np.empty(0, dtype=int)
@@ -0,0 +1,131 @@
+"""Run a scenario over a grid of parameters.
+
+The scenario's get_config is called with one keyword argument per grid
+parameter, e.g. a grid of {"amount": [1000, 2000], "growth": [0.04, 0.06]}
+runs get_config(amount=1000, growth=0.04) and the three other
+combinations. Runs are spread over a process pool; each worker loads the
+scenario file once and then runs chunks of grid points.
+"""
+import argparse
+import datetime as dt
+import itertools
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from types import ModuleType
+from typing import Any
+
+from pfme.run import config_from_module, load_scenario_module, simulate
+
+# Scenario module of the current worker process, set by _init_worker
+_worker_module: ModuleType | None = None
+_worker_config_path: str | None = None
+
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--config",
+        type=str,
+        required=True,
+        help=(
+            "Path to a .py file defining a `get_config` function, taking the grid parameters as "
+            "keyword arguments, and returning a SimulationConfig."
+        ),
+    )
+    ap.add_argument(
+        "--grid",
+        type=str,
+        required=True,
+        help="Path to a JSON file mapping each parameter name to the list of values to sweep.",
+    )
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes. With 1, runs in this process.",
+    )
+    ap.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Grid points sent to a worker at once. Defaults to about four chunks per worker.",
+    )
+    return ap.parse_args()
+
+
+def load_grid(grid_path: str) -> dict[str, list[Any]]:
+    with open(grid_path) as f:
+        grid = json.load(f)
+
+    if not isinstance(grid, dict) or not all(isinstance(values, list) for values in grid.values()):
+        raise ValueError(f"Grid file must map parameter names to lists of values: {grid_path}.")
+    return grid
+
+
+def expand_grid(grid: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """All combinations of the grid values, with the last parameter varying fastest."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def _init_worker(config_path: str) -> None:
+    global _worker_module, _worker_config_path
+    _worker_module = load_scenario_module(config_path)
+    _worker_config_path = config_path
+
+
+def _run_point(params: dict[str, Any]) -> dict[str, Any]:
+    config = config_from_module(_worker_module, _worker_config_path, **params)
+    return {
+        "params": params,
+        "metrics": simulate(config, progress=False),
+    }
+
+
+def sweep(
+    config_path: str,
+    grid: dict[str, list[Any]],
+    workers: int = 1,
+    chunksize: int | None = None,
+) -> list[dict[str, Any]]:
+    """Simulate every grid point, returning results in grid order."""
+    points = expand_grid(grid)
+
+    if workers <= 1:
+        _init_worker(config_path)
+        return [_run_point(params) for params in points]
+
+    if chunksize is None:
+        chunksize = max(1, len(points) // (4 * workers))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(config_path,),
+    ) as executor:
+        return list(executor.map(_run_point, points, chunksize=chunksize))
+
+
+def main() -> None:
+    args = parse_args()
+
+    grid = load_grid(args.grid)
+
+    start_time = dt.datetime.now(dt.UTC)
+    results = sweep(args.config, grid, workers=args.workers, chunksize=args.chunksize)
+    end_time = dt.datetime.now(dt.UTC)
+
+    result_dict = {
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "args": vars(args),
+        "grid": grid,
+        "results": results,
+    }
+
+    print(json.dumps(result_dict))
+
+
+if __name__ == "__main__":
+    main()
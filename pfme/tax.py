@@ -0,0 +1,142 @@
+import math
+
+from bisect import bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+TRADING_ALLOWANCE = 1000
+PROPERTY_ALLOWANCE = 1000
+POST_ALLOWANCE_TAX_BANDS = [
+    (0.2, 37_700),
+    (0.4, 125_140),
+    (0.45, math.inf),
+]
+CLASS_1_NI_BANDS = [
+    (0.08, 4189 * 12),
+    (0.02, math.inf),
+]
+CLASS_4_NI_BANDS = [
+    (0.00, 12570),
+    (0.06, 50270),
+    (0.02, math.inf),
+]
+
+
+class BandTable:
+    """Marginal rates over consecutive bands, compiled for lookups.
+
+    Bands are (rate, width) pairs from the bottom up. The table stores the
+    lower threshold of each band and the total due at that threshold, so
+    the amount due on any income is one lookup plus one multiply-add.
+    Negative amounts are charged at the lowest rate, like walking the bands
+    would.
+    """
+    bands: list[tuple[float, float]]
+    thresholds: list[float]
+    rates: list[float]
+    base: list[float]
+
+    def __init__(self, bands: list[tuple[float, float]]):
+        if bands[-1][1] != math.inf:
+            # Nothing is due above the last band
+            bands = [*bands, (0.0, math.inf)]
+        self.bands = list(bands)
+
+        self.thresholds = [0.0]
+        self.base = [0.0]
+        for rate, width in bands[:-1]:
+            self.thresholds.append(self.thresholds[-1] + width)
+            self.base.append(self.base[-1] + rate * width)
+        self.rates = [rate for rate, _ in bands]
+
+        self._thresholds = np.array(self.thresholds)
+        self._rates = np.array(self.rates)
+        self._base = np.array(self.base)
+
+    def __call__(self, amount: float) -> float:
+        i = max(bisect_right(self.thresholds, amount) - 1, 0)
+        return self.base[i] + (amount - self.thresholds[i]) * self.rates[i]
+
+    def batch(self, amounts: np.ndarray) -> np.ndarray:
+        i = np.maximum(np.searchsorted(self._thresholds, amounts, side="right") - 1, 0)
+        return self._base[i] + (amounts - self._thresholds[i]) * self._rates[i]
+
+
+@dataclass(frozen=True)
+class UkTaxYear:
+    income_tax: BandTable
+    class_1_ni: BandTable
+    class_4_ni: BandTable
+    personal_allowance: float = 1250
+    # Income above which the personal allowance is reduced by 1 for every 2
+    allowance_taper_start: float = 100_000
+    trading_allowance: float = TRADING_ALLOWANCE
+    property_allowance: float = PROPERTY_ALLOWANCE
+
+
+UK_TAX_YEARS = {
+    2024: UkTaxYear(
+        income_tax=BandTable(POST_ALLOWANCE_TAX_BANDS),
+        class_1_ni=BandTable(CLASS_1_NI_BANDS),
+        class_4_ni=BandTable(CLASS_4_NI_BANDS),
+    ),
+}
+
+
+class UkTaxEngine:
+    """Income tax and national insurance, with rules per tax year.
+
+    Each year uses the rules of the latest tax year starting at or before
+    it; years before the first tax year use the first one.
+    """
+    tax_years: dict[int, UkTaxYear]
+
+    def __init__(self, tax_years: dict[int, UkTaxYear] = UK_TAX_YEARS):
+        if not tax_years:
+            raise ValueError("Need rules for at least one tax year")
+        self.tax_years = dict(sorted(tax_years.items()))
+        self._starts = list(self.tax_years)
+        self._rules = list(self.tax_years.values())
+
+    def rules_for(self, year: float) -> UkTaxYear:
+        return self._rules[max(bisect_right(self._starts, year) - 1, 0)]
+
+    def tax_and_ni(self, rental: float, trading: float, salary: float, year: float) -> tuple[float, float]:
+        rules = self.rules_for(year)
+        taxable = (
+            max(0, rental - rules.property_allowance)
+            + max(0, trading - rules.trading_allowance)
+            + salary
+        )
+        personal_allowance = max(
+            0, rules.personal_allowance - max(taxable - rules.allowance_taper_start, 0) / 2
+        )
+
+        tax = rules.income_tax(taxable - personal_allowance)
+        national_insurance = rules.class_1_ni(salary) + rules.class_4_ni(trading)
+        return tax, national_insurance
+
+    def tax_and_ni_batch(
+        self,
+        rental: np.ndarray,
+        trading: np.ndarray,
+        salary: np.ndarray,
+        year: float,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        rules = self.rules_for(year)
+        taxable = (
+            np.maximum(0, rental - rules.property_allowance)
+            + np.maximum(0, trading - rules.trading_allowance)
+            + salary
+        )
+        personal_allowance = np.maximum(
+            0, rules.personal_allowance - np.maximum(taxable - rules.allowance_taper_start, 0) / 2
+        )
+
+        tax = rules.income_tax.batch(taxable - personal_allowance)
+        national_insurance = rules.class_1_ni.batch(salary) + rules.class_4_ni.batch(trading)
+        return tax, national_insurance
+
+
+UK_TAX_ENGINE = UkTaxEngine()
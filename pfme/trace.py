@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.metric import RunMetricType
+from pfme.portfolio import Expense, Income, Portfolio
+
+
+class Trace:
+    """Core state of a run, recorded once per step into preallocated columns.
+
+    Each row holds the units held and unit price of every asset, income and
+    expenses of every kind in enum order, and the totals the portfolio
+    keeps. Derivable metrics, which implement `derive_columns`, are
+    computed from it in one vectorized pass, after the run or over a saved
+    trace, without re-simulating.
+    """
+    assets: list[Asset]
+    years: np.ndarray
+    # (n_rows, n_assets)
+    holdings: np.ndarray
+    unit_prices: np.ndarray
+    # (n_rows, len(Income)) and (n_rows, len(Expense))
+    income: np.ndarray
+    expenses: np.ndarray
+    # (n_rows,), as kept by the portfolio
+    total_value: np.ndarray
+    total_expenses: np.ndarray
+    n_rows: int
+
+    def __init__(self):
+        self.allocate(0, [])
+
+    def allocate(self, n_rows: int, assets: list[Asset]) -> None:
+        """Discard recorded rows and preallocate storage for n_rows steps."""
+        self.assets = assets
+        self.years = np.empty(n_rows)
+        self.holdings = np.zeros((n_rows, len(assets)))
+        self.unit_prices = np.zeros((n_rows, len(assets)))
+        self.income = np.zeros((n_rows, len(Income)))
+        self.expenses = np.zeros((n_rows, len(Expense)))
+        self.total_value = np.zeros(n_rows)
+        self.total_expenses = np.zeros(n_rows)
+        self.n_rows = 0
+
+    def record(self, portfolio: Portfolio, year: float) -> None:
+        row = self.n_rows
+        self.years[row] = year
+        self.holdings[row] = portfolio.asset_holdings.values()
+        self.unit_prices[row] = portfolio.asset_holdings.weights()
+        self.income[row] = portfolio.income.values()
+        self.expenses[row] = portfolio.expenses.values()
+        self.total_value[row] = portfolio.current_value()
+        self.total_expenses[row] = portfolio.total_expenses()
+        self.n_rows = row + 1
+
+    def data(self) -> dict[str, np.ndarray]:
+        """Recorded columns, trimmed to the recorded steps."""
+        return {
+            name: getattr(self, name)[:self.n_rows]
+            for name in ("years", "holdings", "unit_prices", "income", "expenses", "total_value", "total_expenses")
+        }
+
+    def evaluate(self, metric: RunMetricType) -> RunMetricType:
+        """Run instance of metric, computed from the recorded steps."""
+        run = metric.new_run()
+        run.derive(self)
+        return run
+
+    def save(self, path: str | os.PathLike) -> None:
+        np.savez_compressed(path, assets=np.array([asset.name for asset in self.assets]), **self.data())
+
+    @staticmethod
+    def load(path: str | os.PathLike) -> "Trace":
+        with np.load(path) as arrays:
+            trace = Trace()
+            trace.assets = [Asset[name] for name in arrays["assets"].tolist()]
+            for name in ("years", "holdings", "unit_prices", "income", "expenses", "total_value", "total_expenses"):
+                setattr(trace, name, arrays[name])
+        trace.n_rows = len(trace.years)
+        return trace
@@ -0,0 +1,55 @@
+"""Configs shared by the tests."""
+from pfme.asset import Asset, AssetProvider, ConstantGeomIncreaseAsset
+from pfme.config import SimulationConfig
+from pfme.metric import RunMetric
+from pfme.strategy import (
+    CareerExponential,
+    EarnPostTaxIncome,
+    InvestFractionOfCashAfterBuffer,
+    SimpleSpendingWithCreep,
+    Strategy,
+)
+
+
+def fi_strategies(
+    buffer_per_yearly_expenses: float = 1.0,
+    allocation: dict[Asset, float] | None = None,
+) -> list[Strategy]:
+    """A growing salary and spending, with the cash above a buffer invested,
+    by default all in the ETF.
+    """
+    return [
+        CareerExponential(40_000.0, 0.03),
+        SimpleSpendingWithCreep(20_000.0, 0.02),
+        EarnPostTaxIncome(),
+        InvestFractionOfCashAfterBuffer(
+            buffer_per_yearly_expenses,
+            {Asset.ETF_GLOBAL_STOCK: 1.0} if allocation is None else allocation,
+        ),
+    ]
+
+
+def make_config(
+    strategies: list[Strategy],
+    metrics: list[RunMetric] | None = None,
+    increment: float = 1.0,
+    start_year: float = 2024.0,
+    end_year: float = 2054.0,
+    etf: AssetProvider | None = None,
+    savings: AssetProvider | None = None,
+) -> SimulationConfig:
+    """Config holding cash, the ETF and the savings account, which grow at
+    constant rates unless other providers are given.
+    """
+    return SimulationConfig(
+        metrics=[] if metrics is None else metrics,
+        strategies=strategies,
+        increment=increment,
+        start_year=start_year,
+        end_year=end_year,
+        asset_provider_mapping={
+            Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+            Asset.ETF_GLOBAL_STOCK: etf or ConstantGeomIncreaseAsset(100.0, 0.06),
+            Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: savings or ConstantGeomIncreaseAsset(100.0, 0.04),
+        },
+    )
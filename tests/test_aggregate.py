@@ -0,0 +1,149 @@
+import math
+
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.aggregate import Moments, QuantileSketch, YearlyDistribution, YearlyFrequency
+from pfme.asset import GeometricBrownianMotionAsset
+from pfme.batch.metric import BatchFIReached, BatchProbability, BatchQuantiles, BatchTotalAssets, stack_values
+from pfme.batch.simulation import BatchSimulation
+
+import configs
+
+
+class TestQuantileSketch(TestCase):
+    def test_quantiles_within_relative_accuracy(self):
+        rng = np.random.default_rng(0)
+        values = np.concatenate([rng.lognormal(10.0, 1.0, 5_000), -rng.lognormal(5.0, 1.0, 1_000), np.zeros(100)])
+        sketch = QuantileSketch(0.01)
+        sketch.add(values)
+
+        self.assertEqual(len(values), sketch.count)
+        for q in [0.0, 0.01, 0.05, 0.1, 0.16, 0.2, 0.5, 0.95, 1.0]:
+            expected = np.quantile(values, q, method="lower")
+            estimate = sketch.quantile(q)
+            self.assertLessEqual(abs(estimate - expected), 0.01 * abs(expected) + 1e-12, q)
+
+    def test_merge_is_exact(self):
+        rng = np.random.default_rng(1)
+        values = rng.normal(1_000.0, 500.0, 3_000)
+        whole = QuantileSketch()
+        whole.add(values)
+        merged = QuantileSketch()
+        for part in np.array_split(values, 7):
+            sketch = QuantileSketch()
+            sketch.add(part)
+            merged.merge(sketch)
+
+        self.assertEqual(whole.positive, merged.positive)
+        self.assertEqual(whole.negative, merged.negative)
+        self.assertEqual(whole.zero_count, merged.zero_count)
+        for q in [0.05, 0.5, 0.95]:
+            self.assertEqual(whole.quantile(q), merged.quantile(q))
+
+    def test_rejects_mismatched_accuracy(self):
+        with self.assertRaises(ValueError):
+            QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+    def test_empty(self):
+        self.assertTrue(math.isnan(QuantileSketch().quantile(0.5)))
+
+
+class TestMoments(TestCase):
+    def test_merge_matches_numpy(self):
+        values = np.random.default_rng(2).normal(5.0, 2.0, 1_001)
+        moments = Moments()
+        for part in np.array_split(values, 4):
+            partial = Moments()
+            partial.add(part)
+            moments.merge(partial)
+        self.assertEqual(len(values), moments.count)
+        self.assertAlmostEqual(values.mean(), moments.mean, places=10)
+        self.assertAlmostEqual(values.var(ddof=1), moments.variance(), places=8)
+
+
+class TestYearly(TestCase):
+    def test_add_path_and_merge(self):
+        years = np.array([2024.0, 2025.0])
+        left, right = YearlyDistribution(), YearlyDistribution()
+        left.add_path(years, np.array([1.0, 2.0]))
+        right.add_path(years, np.array([3.0, 4.0]))
+        left.merge(right)
+        summary = left.summary((0.5,))
+        self.assertEqual([2024.0, 2025.0], [entry["year"] for entry in summary])
+        self.assertEqual([2, 2], [entry["value"]["count"] for entry in summary])
+        self.assertEqual([2.0, 3.0], [entry["value"]["mean"] for entry in summary])
+
+        with self.assertRaises(ValueError):
+            other = YearlyDistribution()
+            other.add(0, 2030.0, 1.0)
+            left.merge(other)
+
+    def test_frequency(self):
+        frequency = YearlyFrequency()
+        frequency.add(0, 2024.0, np.array([True, False, False, False]))
+        other = YearlyFrequency()
+        other.add(0, 2024.0, np.array([True, True]))
+        other.add(1, 2025.0, np.array([True, False]))
+        frequency.merge(other)
+        self.assertEqual(
+            [{"year": 2024.0, "value": 0.5}, {"year": 2025.0, "value": 0.5}],
+            frequency.summary(),
+        )
+
+
+def stock(seed: int) -> GeometricBrownianMotionAsset:
+    return GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=seed)
+
+
+class TestBatchAggregates(TestCase):
+    def test_matches_stored_paths(self):
+        stored = BatchSimulation(
+            configs.make_config(
+                configs.fi_strategies(),
+                [BatchTotalAssets(), BatchFIReached(0.04)],
+                end_year=2044.0,
+                etf=stock(3),
+            ),
+            n_paths=500,
+        )
+        stored.run()
+        aggregated = BatchSimulation(
+            configs.make_config(
+                configs.fi_strategies(),
+                [BatchQuantiles(BatchTotalAssets()), BatchProbability(BatchFIReached(0.04))],
+                end_year=2044.0,
+                etf=stock(3),
+            ),
+            n_paths=500,
+        )
+        aggregated.run()
+
+        total_assets = stack_values(stored.metrics[0])
+        fi_reached = stack_values(stored.metrics[1])
+        quantiles, probability = aggregated.metrics
+        self.assertEqual(len(total_assets), len(quantiles.values))
+        for row, entry in enumerate(quantiles.values):
+            self.assertEqual(stored.metrics[0].values[row]["year"], entry["year"])
+            for q in [0.05, 0.5, 0.95]:
+                expected = np.quantile(total_assets[row], q, method="lower")
+                self.assertLessEqual(abs(entry["value"][f"p{100 * q:g}"] - expected), 0.01 * abs(expected) + 1e-9)
+            self.assertAlmostEqual(total_assets[row].mean(), entry["value"]["mean"], delta=1e-6 * abs(entry["value"]["mean"]) + 1e-9)
+        np.testing.assert_allclose(fi_reached.mean(axis=1), [entry["value"] for entry in probability.values])
+
+    def test_merge_across_workers(self):
+        whole = BatchProbability(BatchFIReached(0.04))
+        for seed in [4, 5]:
+            config = configs.make_config(configs.fi_strategies(), [whole], end_year=2044.0, etf=stock(seed))
+            BatchSimulation(config, n_paths=50).run()
+
+        merged = BatchProbability(BatchFIReached(0.04))
+        for seed in [4, 5]:
+            partial = BatchProbability(BatchFIReached(0.04))
+            config = configs.make_config(configs.fi_strategies(), [partial], end_year=2044.0, etf=stock(seed))
+            BatchSimulation(config, n_paths=50).run()
+            merged.merge(partial)
+
+        self.assertEqual(whole.values, merged.values)
+        self.assertEqual(100, whole.statistics.counts[0])
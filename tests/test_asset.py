@@ -2,7 +2,12 @@ import math
 
 from unittest import TestCase
 
-from pfme.asset import Asset, ConstantGeomIncreaseAsset
+from pfme.asset import (
+    Asset,
+    ConstantGeomIncreaseAsset,
+    GeometricBrownianMotionAsset,
+    StudentTAsset,
+)
 
 
 class TestConstantGeomIncreaseAsset(TestCase):
@@ -20,3 +25,41 @@ class TestConstantGeomIncreaseAsset(TestCase):
 
         provider.update_value(2024.5, 0.5)
         self.assertAlmostEqual(115.36897329871668, provider.value())
+
+
+class TestStochasticAsset(TestCase):
+    def test_zero_volatility_matches_constant_growth(self):
+        provider = GeometricBrownianMotionAsset(100.0, 0.10, 0.0, seed=1)
+        provider.prepare(2, 1.0)
+
+        provider.update_value(2023, math.nan)
+        self.assertAlmostEqual(100.0, provider.value())
+
+        provider.update_value(2024, 1.0)
+        self.assertAlmostEqual(110.0, provider.value())
+
+        # Increment the provider wasn't prepared for
+        provider.update_value(2024.5, 0.5)
+        self.assertAlmostEqual(115.36897329871668, provider.value())
+
+    def test_seeded_runs_are_reproducible(self):
+        for make in [
+            lambda: GeometricBrownianMotionAsset(100.0, 0.05, 0.2, seed=42),
+            lambda: StudentTAsset(100.0, 0.05, 0.2, 4.0, seed=42),
+        ]:
+            trajectories = []
+            for _ in range(2):
+                provider = make()
+                provider.prepare(10, 1.0)
+                provider.update_value(2023, math.nan)
+                trajectory = []
+                for year in range(2024, 2034):
+                    provider.update_value(year, 1.0)
+                    trajectory.append(provider.value())
+                trajectories.append(trajectory)
+            self.assertEqual(trajectories[0], trajectories[1])
+            self.assertEqual(10, len(set(trajectories[0])))
+
+    def test_student_t_needs_finite_variance(self):
+        with self.assertRaises(ValueError):
+            StudentTAsset(100.0, 0.05, 0.2, 2.0)
@@ -0,0 +1,139 @@
+import importlib.util
+import math
+
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from pfme.asset import Asset, GeometricBrownianMotionAsset, StudentTAsset
+from pfme.batch.asset import BatchGeometricBrownianMotionAsset, to_batch_asset_provider
+from pfme.batch.metric import BatchTotalAssets, stack_values
+from pfme.batch.simulation import BatchSimulation
+from pfme.batch.strategy import BatchBusinessConstant, BatchLimitedDurationStrategy
+from pfme.config import SimulationConfig
+from pfme.correlated import CorrelatedReturns
+from pfme.metric import FIReached, RunMetric, TotalAssets
+from pfme.simulation import Simulation
+from pfme.strategy import BusinessConstant, LimitedDurationStrategy, Strategy
+
+import configs
+
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+
+def strategies() -> list[Strategy]:
+    strategies = configs.fi_strategies(0.5, {Asset.ETF_GLOBAL_STOCK: 0.8, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.2})
+    strategies.insert(1, LimitedDurationStrategy(BusinessConstant(5_000.0), end=10.0))
+    return strategies
+
+
+def metrics() -> list[RunMetric]:
+    return [TotalAssets(), FIReached(0.04)]
+
+
+class TestBatchSimulation(TestCase):
+    def test_matches_scalar_simulation(self):
+        for increment in [1.0, 0.25]:
+            scalar = Simulation(configs.make_config(strategies(), metrics(), increment))
+            scalar.run()
+
+            batch = BatchSimulation(configs.make_config(strategies(), metrics(), increment), n_paths=4)
+            batch.run()
+
+            expected = [entry["value"] for entry in scalar.metrics[0].values]
+            total_assets = stack_values(batch.metrics[0])
+            self.assertEqual((len(expected), 4), total_assets.shape)
+            for path in range(4):
+                np.testing.assert_allclose(expected, total_assets[:, path], rtol=1e-12)
+
+            expected_fi = [entry["value"] for entry in scalar.metrics[1].values]
+            np.testing.assert_array_equal(expected_fi, stack_values(batch.metrics[1])[:, 0])
+
+    def test_does_not_mutate_config_strategies(self):
+        config = configs.make_config(strategies(), metrics())
+        BatchSimulation(config, n_paths=2).run()
+        self.assertIsNone(config.strategies[0].start_year)
+
+    def test_batched_config_runs_twice_alike(self):
+        batch_strategies = strategies()
+        batch_strategies[1] = BatchLimitedDurationStrategy(BatchBusinessConstant(5_000.0), end=10.0)
+        config = configs.make_config(batch_strategies, [BatchTotalAssets()])
+
+        runs = []
+        for _ in range(2):
+            batch = BatchSimulation(config, n_paths=2)
+            batch.run()
+            runs.append(stack_values(batch.metrics[0]))
+        np.testing.assert_array_equal(runs[0], runs[1])
+        self.assertEqual(len(config.years()), len(runs[0]))
+        self.assertEqual([], config.metrics[0].values)
+        self.assertEqual(0.0, config.strategies[1].elapsed)
+
+    def test_rejects_empty_batch(self):
+        with self.assertRaises(ValueError):
+            BatchSimulation(configs.make_config(strategies(), metrics()), n_paths=0)
+
+
+class TestBatchStochasticAsset(TestCase):
+    def test_first_path_matches_scalar_provider(self):
+        for scalar in [
+            GeometricBrownianMotionAsset(100.0, 0.05, 0.2, seed=7),
+            StudentTAsset(100.0, 0.05, 0.2, 5.0, seed=7),
+        ]:
+            batch = to_batch_asset_provider(scalar)
+            scalar.prepare(12, 0.5)
+            batch.prepare(3, 12, 0.5)
+            scalar.update_value(2024.0, math.nan)
+            batch.update_value(2024.0, math.nan)
+            for step in range(12):
+                scalar.update_value(2024.5 + 0.5 * step, 0.5)
+                batch.update_value(2024.5 + 0.5 * step, 0.5)
+                self.assertEqual((3,), batch.value().shape)
+                self.assertAlmostEqual(scalar.value(), batch.value()[0], places=9)
+            self.assertEqual(3, len(set(batch.value())))
+
+    def test_antithetic_sampling_pairs_negated_shocks(self):
+        batch = to_batch_asset_provider(GeometricBrownianMotionAsset(100.0, 0.05, 0.2, seed=7))
+        batch.sampling = "antithetic"
+        shocks = batch.sample_shocks(6, 4)
+        self.assertEqual((6, 4), shocks.shape)
+        np.testing.assert_array_equal(shocks[:3], -shocks[3:])
+
+    def test_rejects_unknown_sampling(self):
+        with self.assertRaises(ValueError):
+            BatchGeometricBrownianMotionAsset(100.0, 0.05, 0.2, sampling="latin")
+
+    @skipIf(HAS_SCIPY, "scipy is installed")
+    def test_sobol_sampling_fails_on_construction_without_scipy(self):
+        with self.assertRaises(ImportError):
+            BatchGeometricBrownianMotionAsset(100.0, 0.05, 0.2, sampling="sobol")
+        batch = BatchGeometricBrownianMotionAsset(100.0, 0.05, 0.2)
+        with self.assertRaises(ImportError):
+            batch.sampling = "sobol"
+
+    def test_correlated_first_path_matches_scalar_simulation(self):
+        def make_correlated_config() -> SimulationConfig:
+            model = CorrelatedReturns.from_correlation(
+                growth_rates={Asset.ETF_GLOBAL_STOCK: 0.06, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.04},
+                volatilities={Asset.ETF_GLOBAL_STOCK: 0.2, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.05},
+                correlation=np.array([[1.0, 0.5], [0.5, 1.0]]),
+                seed=11,
+            )
+            providers = model.providers({
+                Asset.ETF_GLOBAL_STOCK: 100.0,
+                Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 100.0,
+            })
+            return configs.make_config(
+                strategies(),
+                metrics(),
+                etf=providers[Asset.ETF_GLOBAL_STOCK],
+                savings=providers[Asset.SAVINGS_ACCOUNT_VARIABLE_RATE],
+            )
+
+        scalar = Simulation(make_correlated_config())
+        scalar.run()
+        batch = BatchSimulation(make_correlated_config(), n_paths=5)
+        batch.run()
+
+        expected = [entry["value"] for entry in scalar.metrics[0].values]
+        np.testing.assert_allclose(expected, stack_values(batch.metrics[0])[:, 0], rtol=1e-9)
@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+from pfme.bench import (
+    BENCHMARKS,
+    Benchmark,
+    find_slowdowns,
+    load_baseline,
+    run_benchmark,
+    save_baseline,
+    simulation_benchmark,
+    few_strategies,
+)
+
+
+class TestBench(TestCase):
+    def test_run_benchmark(self):
+        calls = []
+
+        def setup():
+            return lambda: calls.append(bytearray(1_000_000))
+
+        result = run_benchmark(Benchmark("allocate", setup, steps=10), repeat=2)
+        self.assertEqual(3, len(calls))
+        self.assertEqual("allocate", result["name"])
+        self.assertAlmostEqual(10 / result["seconds"], result["steps_per_second"])
+        self.assertGreaterEqual(result["peak_bytes"], 1_000_000)
+
+    def test_simulation_benchmark_runs(self):
+        result = run_benchmark(simulation_benchmark("yearly", 1.0, few_strategies), repeat=1)
+        self.assertEqual(50, result["steps"])
+
+    def test_names_are_unique(self):
+        names = [benchmark.name for benchmark in BENCHMARKS]
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_find_slowdowns(self):
+        baseline = [
+            {"name": "a", "steps_per_second": 100.0},
+            {"name": "b", "steps_per_second": 100.0},
+            {"name": "c", "steps_per_second": 100.0},
+        ]
+        results = [
+            {"name": "a", "steps_per_second": 85.0},
+            {"name": "b", "steps_per_second": 70.0},
+            {"name": "d", "steps_per_second": 1.0},
+        ]
+        slowdowns = find_slowdowns(results, baseline, threshold=0.2)
+        self.assertEqual(["b"], [slowdown["name"] for slowdown in slowdowns])
+        self.assertAlmostEqual(0.7, slowdowns[0]["ratio"])
+
+    def test_baseline_round_trip(self):
+        results = [{"name": "a", "steps": 1, "seconds": 0.5, "steps_per_second": 2.0, "peak_bytes": 10}]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline(path, results)
+            self.assertEqual(results, load_baseline(path))
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import time
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+from unittest import TestCase, mock
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset, GeometricBrownianMotionAsset
+from pfme.cache import cached_simulate, config_key, ResultCache
+from pfme.metric import TotalAssets
+from pfme.portfolio import Portfolio
+from pfme.run import config_from_module, load_scenario_module, simulate
+from pfme.strategy import EarnPostTaxIncome, FixedYearlyInvestmentStrategy, Strategy
+
+import configs
+
+
+def strategies(amount: float = 100.0) -> list[Strategy]:
+    return [FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, amount), EarnPostTaxIncome()]
+
+
+@dataclass
+class Callback(Strategy):
+    """Strategy holding a function, which configs can't be described by."""
+    on_execute: Callable[[], None]
+
+    def requested_assets(self) -> set[Asset]:
+        return set()
+
+    def execute(self, portfolio: Portfolio, year: float, increment: float) -> None:
+        self.on_execute()
+
+
+SCENARIO = """
+from dataclasses import dataclass
+
+from pfme.asset import Asset
+from pfme.config import SimulationConfig
+from pfme.strategy import Strategy
+
+
+@dataclass
+class AddCash(Strategy):
+    amount: float
+
+    def requested_assets(self):
+        return {Asset.CASH}
+
+    def execute(self, portfolio, year, increment):
+        portfolio.add(Asset.CASH, cash=MULTIPLIER * self.amount)
+
+
+def get_config():
+    return SimulationConfig(metrics=[], strategies=[AddCash(100.0)])
+"""
+
+
+class TestConfigKey(TestCase):
+    def test_equal_configs_share_key(self):
+        keys = [config_key(configs.make_config(strategies(), [TotalAssets()])) for _ in range(2)]
+        self.assertEqual(*keys)
+        keys = [
+            config_key(
+                configs.make_config(strategies(), [TotalAssets()], etf=GeometricBrownianMotionAsset(100.0, 0.05, 0.2, seed=1))
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(*keys)
+
+    def test_any_change_changes_key(self):
+        base = config_key(configs.make_config(strategies(), [TotalAssets()]))
+        self.assertNotEqual(base, config_key(configs.make_config(strategies(101.0), [TotalAssets()])))
+        etf = ConstantGeomIncreaseAsset(100.0, 0.05)
+        self.assertNotEqual(base, config_key(configs.make_config(strategies(), [TotalAssets()], etf=etf)))
+        config = configs.make_config(strategies(), [TotalAssets()])
+        config.increment = 0.5
+        self.assertNotEqual(base, config_key(config))
+
+    def test_scenario_code_changes_key(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "scenario.py"
+            keys = []
+            for multiplier in (1, 2):
+                path.write_text(f"MULTIPLIER = {multiplier}\n{SCENARIO}")
+                config = config_from_module(load_scenario_module(str(path)), str(path))
+                keys.append(config_key(config))
+        self.assertNotEqual(*keys)
+
+    def test_unseeded_configs_never_share_key(self):
+        keys = [
+            config_key(
+                configs.make_config(strategies(), [TotalAssets()], etf=GeometricBrownianMotionAsset(100.0, 0.05, 0.2))
+            )
+            for _ in range(2)
+        ]
+        self.assertNotEqual(*keys)
+
+
+class TestResultCache(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeat_run_is_served_from_cache(self):
+        cache = ResultCache(self.tmp.name)
+        first = cached_simulate(configs.make_config(strategies(), [TotalAssets()]), cache, progress=False)
+
+        config = configs.make_config(strategies(), [TotalAssets()])
+        second = cached_simulate(config, cache, progress=False)
+        self.assertEqual(first, second)
+        self.assertEqual(0, config.metrics[0].n_rows)
+
+    def test_evicts_least_recently_used(self):
+        cache = ResultCache(self.tmp.name, max_bytes=250)
+        payload = ["x" * 100]
+        cache.put("a", payload)
+        cache.put("b", payload)
+        # Make "a" the most recently used entry
+        past = time.time() - 10
+        os.utime(os.path.join(self.tmp.name, "b.json"), (past, past))
+        cache.get("a")
+
+        cache.put("c", payload)
+        self.assertEqual(payload, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(payload, cache.get("c"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ResultCache(self.tmp.name)
+        path = os.path.join(self.tmp.name, "a.json")
+        with open(path, "w") as f:
+            f.write('[{"year": 20')
+        self.assertIsNone(cache.get("a"))
+        self.assertFalse(os.path.exists(path))
+
+    def test_read_only_cache_still_serves_hits(self):
+        cache = ResultCache(self.tmp.name)
+        cache.put("a", [1])
+        with mock.patch("os.utime", side_effect=PermissionError):
+            self.assertEqual([1], cache.get("a"))
+
+    def test_undescribable_config_runs_uncached(self):
+        cache = ResultCache(self.tmp.name)
+        config = configs.make_config(strategies(), [TotalAssets()])
+        config.strategies.append(Callback(lambda: None))
+        self.assertRaises(TypeError, config_key, config)
+        expected = simulate(configs.make_config(strategies(), [TotalAssets()]), progress=False)
+        self.assertEqual(expected, cached_simulate(config, cache, progress=False))
+        self.assertEqual([], os.listdir(self.tmp.name))
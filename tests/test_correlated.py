@@ -0,0 +1,79 @@
+import math
+
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.correlated import CorrelatedReturns
+
+
+def make_model(seed: int = 3) -> CorrelatedReturns:
+    return CorrelatedReturns.from_correlation(
+        growth_rates={
+            Asset.ETF_GLOBAL_STOCK: 0.06,
+            Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.04,
+            Asset.CASH: 0.0,
+        },
+        volatilities={
+            Asset.ETF_GLOBAL_STOCK: 0.2,
+            Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.05,
+            Asset.CASH: 0.0,
+        },
+        correlation=np.array([
+            [1.0, 0.6, 0.0],
+            [0.6, 1.0, 0.0],
+            [0.0, 0.0, 1.0],
+        ]),
+        seed=seed,
+    )
+
+
+class TestCorrelatedReturns(TestCase):
+    def test_draws_have_requested_correlation(self):
+        model = make_model()
+        stock = np.log(model.growth_factors(Asset.ETF_GLOBAL_STOCK, 20_000, 5, 1.0))
+        savings = np.log(model.growth_factors(Asset.SAVINGS_ACCOUNT_VARIABLE_RATE, 20_000, 5, 1.0))
+        cash = model.growth_factors(Asset.CASH, 20_000, 5, 1.0)
+
+        self.assertAlmostEqual(0.6, np.corrcoef(stock.ravel(), savings.ravel())[0, 1], delta=0.02)
+        self.assertAlmostEqual(0.2, stock.std(), delta=0.005)
+        np.testing.assert_allclose(cash, 1.0)
+
+    def test_subscribers_share_cached_draw(self):
+        model = make_model()
+        first = model.growth_factors(Asset.ETF_GLOBAL_STOCK, 4, 10, 1.0)
+        model.growth_factors(Asset.CASH, 4, 10, 1.0)
+        self.assertIs(first, model.growth_factors(Asset.ETF_GLOBAL_STOCK, 4, 10, 1.0))
+
+        model.clear()
+        self.assertFalse(np.array_equal(first, model.growth_factors(Asset.ETF_GLOBAL_STOCK, 4, 10, 1.0)))
+
+    def test_models_keep_separate_draws(self):
+        model = make_model(seed=1)
+        other = make_model(seed=2)
+        first = model.growth_factors(Asset.ETF_GLOBAL_STOCK, 4, 10, 1.0)
+        self.assertFalse(np.array_equal(first, other.growth_factors(Asset.ETF_GLOBAL_STOCK, 4, 10, 1.0)))
+        self.assertIs(first, model.growth_factors(Asset.ETF_GLOBAL_STOCK, 4, 10, 1.0))
+
+    def test_provider_follows_model(self):
+        model = make_model()
+        providers = model.providers({Asset.ETF_GLOBAL_STOCK: 100.0})
+        provider = providers[Asset.ETF_GLOBAL_STOCK]
+        provider.prepare(3, 1.0)
+        factors = model.growth_factors(Asset.ETF_GLOBAL_STOCK, 1, 3, 1.0)[:, 0]
+
+        provider.update_value(2024.0, math.nan)
+        for step in range(3):
+            provider.update_value(2025.0 + step, 1.0)
+        self.assertAlmostEqual(100.0 * np.prod(factors), provider.value())
+
+        with self.assertRaises(ValueError):
+            provider.update_value(2028.0, 1.0)
+
+    def test_rejects_invalid_covariance(self):
+        growth_rates = {Asset.ETF_GLOBAL_STOCK: 0.06, Asset.CASH: 0.0}
+        with self.assertRaises(ValueError):
+            CorrelatedReturns(growth_rates, np.array([[1.0, 2.0], [2.0, 1.0]]))
+        with self.assertRaises(ValueError):
+            CorrelatedReturns(growth_rates, np.eye(3))
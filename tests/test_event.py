@@ -0,0 +1,154 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.asset import Asset, GeometricBrownianMotionAsset
+from pfme.event import EventSimulation
+from pfme.flow import StepFlow
+from pfme.metric import HoldingsByAsset, RunMetric, TotalAssets
+from pfme.portfolio import Income
+from pfme.simulation import Simulation
+from pfme.strategy import (
+    BusinessConstant,
+    CareerExponential,
+    EarnPostTaxIncome,
+    FixedYearlyInvestmentStrategy,
+    InvestFractionOfCashAfterBuffer,
+    LimitedDurationStrategy,
+    SimpleSpendingWithCreep,
+    Strategy,
+)
+
+import configs
+
+
+def strategies() -> list[Strategy]:
+    """Constant cash flows, with a change point at the start and end of the
+    limited strategy.
+    """
+    return [
+        BusinessConstant(30_000.0),
+        SimpleSpendingWithCreep(10_000.0, 0.0),
+        EarnPostTaxIncome(),
+        FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 5_000.0),
+        LimitedDurationStrategy(
+            FixedYearlyInvestmentStrategy(Asset.SAVINGS_ACCOUNT_VARIABLE_RATE, 2_000.0),
+            start=5.5,
+            end=10.0,
+        ),
+    ]
+
+
+def metrics() -> list[RunMetric]:
+    return [TotalAssets(), HoldingsByAsset()]
+
+
+class TestStepFlow(TestCase):
+    def test_cash_added_per_step(self):
+        flow = StepFlow([Asset.CASH, Asset.ETF_GLOBAL_STOCK], n_steps=4)
+        flow.add(Asset.CASH, np.array([1.0, 2.0, 3.0, 4.0]))
+        flow.add(Asset.ETF_GLOBAL_STOCK, 10.0)
+        flow.grow([1.0, 1.1])
+
+        values = np.array([5.0, 1.0])
+        expected = values.copy()
+        for cash in [1.0, 2.0, 3.0, 4.0]:
+            expected = (expected + [cash, 10.0]) * [1.0, 1.1]
+        np.testing.assert_allclose(expected, flow.apply(values))
+
+    def test_repeated_steps(self):
+        flow = StepFlow([Asset.CASH, Asset.ETF_GLOBAL_STOCK])
+        flow.add(Asset.ETF_GLOBAL_STOCK, 10.0)
+        flow.grow([1.0, 1.1])
+
+        values = np.array([5.0, 0.0])
+        expected = values.copy()
+        for _ in range(7):
+            expected = expected + [0.0, 10.0]
+            expected = expected * [1.0, 1.1]
+        np.testing.assert_allclose(expected, flow.apply(values, 7))
+
+
+class TestEventSimulation(TestCase):
+    def test_matches_stepping_every_step(self):
+        stepped = Simulation(configs.make_config(strategies(), metrics(), 1 / 12, end_year=2064.0), progress=False)
+        stepped.run()
+        evented = EventSimulation(configs.make_config(strategies(), metrics(), 1 / 12, end_year=2064.0), progress=False)
+        evented.run()
+
+        # One event per report year, plus the start and end of the limited strategy
+        self.assertEqual(42, len(evented._events))
+        stepped_values = {entry["year"]: entry["value"] for entry in stepped.metrics[0].values}
+        self.assertEqual(42, len(evented.metrics[0].values))
+        for entry in evented.metrics[0].values:
+            self.assertAlmostEqual(1.0, entry["value"] / stepped_values[entry["year"]], places=10)
+        self.assertTrue(evented.done)
+
+        stepped_units = {entry["year"]: entry["value"] for entry in stepped.metrics[1].values}
+        last = evented.metrics[1].values[-1]
+        for expected, actual in zip(stepped_units[last["year"]], last["value"]):
+            self.assertAlmostEqual(1.0, actual["units"] / expected["units"], places=10)
+
+    def test_trajectories_are_followed_between_events(self):
+        growing = [
+            CareerExponential(40_000.0, 0.03),
+            SimpleSpendingWithCreep(20_000.0, 0.02),
+            EarnPostTaxIncome(),
+            FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 5_000.0),
+        ]
+        stepped = Simulation(configs.make_config(growing, metrics(), 1 / 12, end_year=2064.0), progress=False)
+        stepped.run()
+        evented = EventSimulation(configs.make_config(growing, metrics(), 1 / 12, end_year=2064.0), progress=False)
+        evented.run()
+
+        # Only the report years, although income and expenses change every step
+        self.assertEqual(40, len(evented._events))
+        stepped_values = {entry["year"]: entry["value"] for entry in stepped.metrics[0].values}
+        for entry in evented.metrics[0].values:
+            self.assertAlmostEqual(1.0, entry["value"] / stepped_values[entry["year"]], places=10)
+        self.assertAlmostEqual(1.0, evented.portfolio.income[Income.UK_SALARY] / stepped.portfolio.income[Income.UK_SALARY], places=12)
+        self.assertAlmostEqual(1.0, evented.portfolio.total_expenses() / stepped.portfolio.total_expenses(), places=12)
+
+    def test_strategy_state_is_carried_over_skipped_steps(self):
+        config = configs.make_config(strategies(), metrics(), 1 / 12, end_year=2064.0)
+        simulation = EventSimulation(config, progress=False)
+        simulation.run()
+        self.assertAlmostEqual(40.0, simulation.strategies[-1].elapsed)
+        self.assertEqual(0.0, config.strategies[-1].elapsed)
+
+    def test_steps_every_step_without_change_points(self):
+        steady = [
+            BusinessConstant(30_000.0),
+            EarnPostTaxIncome(),
+            InvestFractionOfCashAfterBuffer(1.0, {Asset.ETF_GLOBAL_STOCK: 1.0}),
+        ]
+        simulation = EventSimulation(configs.make_config(steady, metrics(), 0.25, end_year=2064.0), progress=False)
+        simulation.run()
+        self.assertEqual(160, len(simulation._events))
+        self.assertEqual(160, len(simulation.metrics[0].values))
+
+    def test_steps_every_step_with_random_assets(self):
+        config = configs.make_config(
+            strategies(),
+            metrics(),
+            0.25,
+            end_year=2064.0,
+            etf=GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=1),
+        )
+        simulation = EventSimulation(config, progress=False)
+        simulation.run()
+        self.assertEqual(160, len(simulation._events))
+
+    def test_run_until_stops_inside_quiet_steps(self):
+        simulation = EventSimulation(configs.make_config(strategies(), metrics(), 1 / 12, end_year=2064.0), progress=False)
+        simulation.run_until(2030.6)
+        reference = Simulation(configs.make_config(strategies(), metrics(), 1 / 12, end_year=2064.0), progress=False)
+        reference.run_until(2030.6)
+        self.assertEqual(reference.step_index, simulation.step_index)
+        simulation.run()
+
+        stepped = Simulation(configs.make_config(strategies(), metrics(), 1 / 12, end_year=2064.0), progress=False)
+        stepped.run()
+        stepped_values = {entry["year"]: entry["value"] for entry in stepped.metrics[0].values}
+        last = simulation.metrics[0].values[-1]
+        self.assertAlmostEqual(1.0, last["value"] / stepped_values[last["year"]], places=10)
@@ -0,0 +1,89 @@
+import math
+import os
+import pickle
+import tempfile
+
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.asset import Asset
+from pfme.historical import CACHE_DIR_NAME, HistoricalReturns, load_returns
+
+
+class TestHistoricalReturns(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = Path(self.tmp.name) / "returns.csv"
+        self.write_csv([0.10, -0.05, 0.20, 0.03], [0.02, 0.02, 0.03, 0.01])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_csv(self, stock: list[float], savings: list[float]):
+        lines = ["year,ETF_GLOBAL_STOCK,SAVINGS_ACCOUNT_VARIABLE_RATE"]
+        lines += [f"{2000 + i},{s},{r}" for i, (s, r) in enumerate(zip(stock, savings))]
+        self.csv_path.write_text("\n".join(lines) + "\n")
+
+    def test_load_returns_memory_maps_cache(self):
+        returns = load_returns(self.csv_path)
+        self.assertIsInstance(returns, np.memmap)
+        self.assertEqual(("ETF_GLOBAL_STOCK", "SAVINGS_ACCOUNT_VARIABLE_RATE"), returns.dtype.names)
+        np.testing.assert_allclose([0.10, -0.05, 0.20, 0.03], returns["ETF_GLOBAL_STOCK"])
+        self.assertEqual(1, len(list((Path(self.tmp.name) / CACHE_DIR_NAME).glob("*.npy"))))
+
+    def test_cache_rebuilt_when_source_changes(self):
+        load_returns(self.csv_path)
+        self.write_csv([0.5, 0.5], [0.1, 0.1])
+        stat = self.csv_path.stat()
+        os.utime(self.csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        returns = load_returns(self.csv_path)
+        np.testing.assert_allclose([0.5, 0.5], returns["ETF_GLOBAL_STOCK"])
+        self.assertEqual(1, len(list((Path(self.tmp.name) / CACHE_DIR_NAME).glob("*.npy"))))
+
+    def test_caches_of_other_csvs_are_kept(self):
+        other_dir = Path(self.tmp.name) / "other"
+        other_dir.mkdir()
+        cache_dir = Path(self.tmp.name) / "shared-cache"
+        others = [Path(self.tmp.name) / "returns-uk.csv", other_dir / "returns.csv"]
+        for other in others:
+            other.write_text(self.csv_path.read_text().replace("0.1,", "0.4,"))
+
+        for path in [*others, self.csv_path]:
+            load_returns(path, cache_dir)
+        self.assertEqual(3, len(list(cache_dir.glob("*.npy"))))
+        for other in others:
+            np.testing.assert_allclose([0.40, -0.05, 0.20, 0.03], load_returns(other, cache_dir)["ETF_GLOBAL_STOCK"])
+
+    def test_bootstrap_uses_historical_rows(self):
+        model = HistoricalReturns(self.csv_path, block_length=2, seed=0)
+        self.assertEqual([Asset.ETF_GLOBAL_STOCK, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE], model.assets)
+
+        stock = model.growth_factors(Asset.ETF_GLOBAL_STOCK, 50, 7, 1.0)
+        savings = model.growth_factors(Asset.SAVINGS_ACCOUNT_VARIABLE_RATE, 50, 7, 1.0)
+        self.assertEqual((7, 50), stock.shape)
+        np.testing.assert_allclose(
+            np.isin(np.round(stock - 1, 12), [0.10, -0.05, 0.20, 0.03]), True
+        )
+        # Both assets are drawn from the same rows
+        pairs = {(round(a - 1, 12), round(b - 1, 12)) for a, b in zip(stock.ravel(), savings.ravel())}
+        self.assertLessEqual(pairs, {(0.10, 0.02), (-0.05, 0.02), (0.20, 0.03), (0.03, 0.01)})
+
+    def test_finer_increment_spreads_returns(self):
+        model = HistoricalReturns(self.csv_path, block_length=4, seed=1)
+        monthly = model.growth_factors(Asset.ETF_GLOBAL_STOCK, 3, 24, 1 / 12)
+        yearly = np.prod(monthly.reshape(2, 12, 3), axis=1)
+        self.assertTrue(np.all(np.isin(np.round(yearly - 1, 9), [0.10, -0.05, 0.20, 0.03])))
+
+    def test_provider_and_pickling(self):
+        model = HistoricalReturns(self.csv_path, seed=2)
+        provider = model.providers({Asset.ETF_GLOBAL_STOCK: 100.0})[Asset.ETF_GLOBAL_STOCK]
+        provider.prepare(2, 1.0)
+        provider.update_value(2024.0, math.nan)
+        provider.update_value(2025.0, 1.0)
+        self.assertNotAlmostEqual(100.0, provider.value())
+
+        restored = pickle.loads(pickle.dumps(model))
+        self.assertIsInstance(restored.returns, np.memmap)
@@ -0,0 +1,84 @@
+import argparse
+import io
+import json
+
+from unittest import TestCase
+
+from pfme.__main__ import simulate_ndjson
+from pfme.asset import Asset, ConstantGeomIncreaseAsset
+from pfme.config import SimulationConfig
+from pfme.metric import FIReached, TotalAssets
+from pfme.strategy import FixedYearlyInvestmentStrategy
+
+
+class TestSimulateNdjson(TestCase):
+    def test_streams_entries_without_keeping_them(self):
+        config = SimulationConfig(
+            metrics=[TotalAssets(), FIReached(0.04)],
+            strategies=[FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0)],
+            start_year=2024.0,
+            end_year=2027.0,
+            asset_provider_mapping={
+                Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.0),
+            },
+        )
+        out = io.StringIO()
+        simulate_ndjson(config, argparse.Namespace(config="scenario.py"), out)
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual("start", lines[0]["type"])
+        self.assertEqual({"config": "scenario.py"}, lines[0]["args"])
+        self.assertEqual("end", lines[-1]["type"])
+        self.assertEqual(
+            [
+                {"type": "metric", "metric": "TotalAssets", "year": 2024.0, "value": 100.0},
+                {"type": "metric", "metric": "FIReached", "year": 2024.0, "value": True},
+            ],
+            lines[1:3],
+        )
+        self.assertEqual(6, len(lines[1:-1]))
+        self.assertEqual([], config.metrics[0].values)
+
+    def test_profile_in_end_line(self):
+        config = SimulationConfig(
+            metrics=[TotalAssets()],
+            strategies=[FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0)],
+            start_year=2024.0,
+            end_year=2027.0,
+            asset_provider_mapping={
+                Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.0),
+            },
+        )
+        out = io.StringIO()
+        simulate_ndjson(config, argparse.Namespace(config="scenario.py", profile=True), out)
+
+        end = json.loads(out.getvalue().splitlines()[-1])
+        calls = {(row["component"], row["method"]): row["calls"] for row in end["profile"]}
+        self.assertEqual(3, calls[("strategy", "execute")])
+        self.assertEqual(3, calls[("metric", "entry")])
+        self.assertEqual(4, calls[("asset_provider", "update_value")])
+
+    def test_flushes_every_line(self):
+        class Recording(io.StringIO):
+            def __init__(self):
+                super().__init__()
+                self.flushed = []
+
+            def flush(self):
+                self.flushed.append(self.getvalue())
+                super().flush()
+
+        config = SimulationConfig(
+            metrics=[TotalAssets()],
+            strategies=[FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0)],
+            start_year=2024.0,
+            end_year=2027.0,
+            asset_provider_mapping={
+                Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.0),
+            },
+        )
+        out = Recording()
+        simulate_ndjson(config, argparse.Namespace(config="scenario.py"), out)
+
+        lines = out.getvalue().splitlines(keepends=True)
+        self.assertEqual(["".join(lines[:i + 1]) for i in range(len(lines))], out.flushed)
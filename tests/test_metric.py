@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset
+from pfme.export import save_npz
+from pfme.metric import CashflowStatement, FIReached, HoldingsByAsset, TotalAssets
+from pfme.portfolio import Expense, Portfolio
+from pfme.simulation import Simulation
+from pfme.strategy import FixedYearlyInvestmentStrategy, SimpleSpendingWithCreep
+
+import configs
+
+
+class TestColumnarMetrics(TestCase):
+    def setUp(self):
+        self.config = configs.make_config(
+            [FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0), SimpleSpendingWithCreep(10.0, 0.0)],
+            [TotalAssets(), HoldingsByAsset(), FIReached(0.04), CashflowStatement()],
+            increment=0.5,
+            end_year=2026.0,
+            etf=ConstantGeomIncreaseAsset(100.0, 0.0),
+        )
+
+    def test_columns_are_preallocated_for_run(self):
+        simulation = Simulation(self.config, progress=False)
+        simulation.run()
+        total_assets, holdings, fi_reached, cashflow = simulation.metrics
+
+        np.testing.assert_allclose([2024.0, 2024.5, 2025.0, 2025.5], total_assets.data()["year"])
+        np.testing.assert_allclose([50.0, 100.0, 150.0, 200.0], total_assets.data()["value"])
+        self.assertEqual(np.bool_, fi_reached.data()["value"].dtype)
+        self.assertEqual((4, 2), holdings.data()["units"].shape)
+        self.assertEqual((4, len(Expense)), cashflow.data()["expenses"].shape)
+
+    def test_values_keep_json_layout(self):
+        simulation = Simulation(self.config, progress=False)
+        simulation.run()
+        total_assets, holdings, fi_reached, cashflow = simulation.metrics
+
+        self.assertEqual({"year": 2024.0, "value": 50.0}, total_assets.values[0])
+        self.assertIs(False, fi_reached.values[-1]["value"])
+        held = {entry["asset"]: entry["units"] for entry in holdings.values[-1]["value"]}
+        self.assertAlmostEqual(2.0, held["ETF_GLOBAL_STOCK"])
+        self.assertIn({"name": "LIVING", "value": 10.0}, cashflow.values[0]["value"]["expenses"])
+
+    def test_record_without_allocation_grows(self):
+        metric = TotalAssets()
+        portfolio = Portfolio({Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0)})
+        for year in range(40):
+            portfolio.add(Asset.CASH, cash=1.0)
+            metric.record(portfolio, float(year))
+        self.assertEqual(40, len(metric.values))
+        self.assertEqual({"year": 39.0, "value": 40.0}, metric.values[-1])
+
+    def test_save_npz(self):
+        simulation = Simulation(self.config, progress=False)
+        simulation.run()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.npz")
+            save_npz(path, simulation.metrics)
+            with np.load(path) as data:
+                np.testing.assert_allclose(simulation.metrics[0].data()["value"], data["TotalAssets/value"])
+                self.assertEqual(
+                    ["CASH", "ETF_GLOBAL_STOCK"],
+                    sorted(data["HoldingsByAsset/units/labels"].tolist()),
+                )
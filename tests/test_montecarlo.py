@@ -0,0 +1,121 @@
+import importlib.util
+
+from unittest import TestCase, skipIf, skipUnless
+
+import numpy as np
+
+from pfme.asset import Asset, GeometricBrownianMotionAsset, StudentTAsset
+from pfme.batch.metric import BatchFIReached, BatchTotalAssets
+from pfme.correlated import CorrelatedReturns
+from pfme.metric import TotalAssets
+from pfme.montecarlo import estimate_until_converged
+from pfme.simulation import Simulation
+from pfme.strategy import FixedYearlyInvestmentStrategy, Strategy
+
+import configs
+
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+
+def strategies() -> list[Strategy]:
+    """Buying 1000 of the ETF every year."""
+    return [FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 1_000.0)]
+
+
+def expected_total_assets() -> float:
+    """Total assets in 2034 on the deterministic path, which is also their
+    expected value, as they are linear in the ETF's growth factors.
+    """
+    config = configs.make_config(strategies(), [TotalAssets()], end_year=2035.0)
+    simulation = Simulation(config, progress=False)
+    simulation.run()
+    return simulation.metrics[0].values[10]["value"]
+
+
+class TestEstimateUntilConverged(TestCase):
+    def setUp(self):
+        self.config = configs.make_config(
+            strategies(),
+            end_year=2035.0,
+            etf=GeometricBrownianMotionAsset(100.0, 0.06, 0.2, seed=1),
+            savings=StudentTAsset(100.0, 0.04, 0.05, 5.0, seed=2),
+        )
+
+    def test_stops_once_interval_is_narrow_enough(self):
+        config = configs.make_config(
+            configs.fi_strategies(),
+            end_year=2050.0,
+            etf=GeometricBrownianMotionAsset(100.0, 0.06, 0.2, seed=1),
+        )
+        estimate = estimate_until_converged(config, BatchFIReached(0.04), 2046.0, tolerance=0.03, batch_size=256, seed=1)
+        self.assertTrue(estimate.converged)
+        self.assertLessEqual(estimate.half_width, 0.03)
+        self.assertEqual(256 * estimate.n_batches, estimate.n_paths)
+        self.assertGreater(estimate.n_batches, 1)
+        self.assertTrue(0.0 < estimate.mean < 1.0)
+
+    def test_gives_up_at_max_paths(self):
+        estimate = estimate_until_converged(
+            self.config, BatchTotalAssets(), 2034.0, tolerance=1e-9, batch_size=128, max_paths=256,
+        )
+        self.assertFalse(estimate.converged)
+        self.assertEqual(2, estimate.n_batches)
+
+    def test_variance_reduction_narrows_interval(self):
+        def half_width(**kwargs) -> float:
+            return estimate_until_converged(
+                self.config, BatchTotalAssets(), 2034.0, tolerance=0.0, batch_size=512, max_paths=512, seed=1, **kwargs,
+            ).half_width
+
+        plain = half_width()
+        self.assertLess(half_width(sampling="antithetic"), plain / 2)
+        self.assertLess(half_width(control=Asset.ETF_GLOBAL_STOCK), plain / 2)
+
+    def test_estimates_cover_expected_value(self):
+        expected = expected_total_assets()
+        for kwargs in [{}, {"sampling": "antithetic"}, {"control": Asset.ETF_GLOBAL_STOCK}]:
+            estimate = estimate_until_converged(
+                self.config, BatchTotalAssets(), 2034.0, tolerance=50.0, batch_size=512, seed=1, **kwargs,
+            )
+            self.assertTrue(estimate.converged)
+            self.assertAlmostEqual(expected, estimate.mean, delta=2 * estimate.half_width, msg=kwargs)
+
+    def test_rejects_invalid_options(self):
+        with self.assertRaises(ValueError):
+            estimate_until_converged(self.config, BatchTotalAssets(), 2034.0, 1.0, batch_size=3, sampling="antithetic")
+        with self.assertRaises(ValueError):
+            estimate_until_converged(self.config, BatchTotalAssets(), 2034.0, 1.0, control=Asset.SAVINGS_ACCOUNT_VARIABLE_RATE)
+        with self.assertRaises(ValueError):
+            estimate_until_converged(self.config, BatchTotalAssets(), 2050.0, 1.0, batch_size=2)
+
+    def test_batches_of_correlated_returns_differ(self):
+        model = CorrelatedReturns({Asset.ETF_GLOBAL_STOCK: 0.06}, np.array([[0.04]]), seed=3)
+        config = configs.make_config(
+            strategies(),
+            end_year=2035.0,
+            etf=model.providers({Asset.ETF_GLOBAL_STOCK: 100.0})[Asset.ETF_GLOBAL_STOCK],
+        )
+
+        def estimate(max_paths: int):
+            return estimate_until_converged(
+                config, BatchTotalAssets(), 2034.0, tolerance=0.0, batch_size=64, max_paths=max_paths, seed=5,
+            )
+
+        one, two = estimate(64), estimate(128)
+        # A replayed second batch would leave the mean unchanged
+        self.assertNotEqual(one.mean, two.mean)
+        self.assertEqual(one.mean, estimate(64).mean)
+        with self.assertRaises(ValueError):
+            estimate_until_converged(config, BatchTotalAssets(), 2034.0, 1.0, batch_size=64, sampling="antithetic")
+
+    @skipUnless(HAS_SCIPY, "needs scipy")
+    def test_sobol_sampling(self):
+        estimate = estimate_until_converged(
+            self.config, BatchTotalAssets(), 2034.0, tolerance=0.0, batch_size=512, max_paths=512, sampling="sobol", seed=1,
+        )
+        self.assertAlmostEqual(expected_total_assets(), estimate.mean, delta=3 * estimate.half_width)
+
+    @skipIf(HAS_SCIPY, "scipy is installed")
+    def test_sobol_sampling_needs_scipy(self):
+        with self.assertRaises(ImportError):
+            estimate_until_converged(self.config, BatchTotalAssets(), 2034.0, 1.0, sampling="sobol")
@@ -1,7 +1,7 @@
 from unittest import TestCase
 
 from pfme.asset import Asset, ConstantGeomIncreaseAsset
-from pfme.portfolio import Portfolio
+from pfme.portfolio import Expense, Income, Portfolio, SlotMap
 
 
 class TestPortfolio(TestCase):
@@ -21,3 +21,46 @@ class TestPortfolio(TestCase):
         self.assertAlmostEqual(100.0, p.providers[asset].value())
         p.add(asset, cash=200.0)
         self.assertAlmostEqual(7.0, p.asset_holdings[asset])
+
+    def test_totals_follow_updates(self):
+        stock = ConstantGeomIncreaseAsset(100.0, 1.0)
+        cash = ConstantGeomIncreaseAsset(1.0, 0.0)
+        p = Portfolio(providers={Asset.ETF_GLOBAL_STOCK: stock, Asset.CASH: cash})
+
+        p.add(Asset.ETF_GLOBAL_STOCK, units=2.0)
+        p.add(Asset.CASH, cash=50.0)
+        self.assertAlmostEqual(250.0, p.current_value())
+
+        stock.update_value(2025.0, 1.0)
+        p.update_prices()
+        self.assertAlmostEqual(200.0, p.asset_value_per_unit(Asset.ETF_GLOBAL_STOCK))
+        self.assertAlmostEqual(450.0, p.current_value())
+
+        p.income[Income.UK_SALARY] += 1_000.0
+        p.income[Income.UK_TRADING] = 500.0
+        p.income[Income.UK_TRADING] = 200.0
+        p.expenses[Expense.LIVING] += 300.0
+        self.assertAlmostEqual(1_200.0, p.total_income())
+        self.assertAlmostEqual(300.0, p.total_expenses())
+        self.assertEqual(0.0, p.expenses[Expense.RENT])
+
+
+class TestSlotMap(TestCase):
+    def test_mapping_interface(self):
+        m = SlotMap(Expense, weights=[2.0, 3.0])
+        self.assertEqual(list(Expense), list(m))
+        self.assertEqual(0.0, m[Expense.RENT])
+
+        m[Expense.RENT] = 1.0
+        m[Expense.LIVING] += 2.0
+        self.assertAlmostEqual(8.0, m.total)
+        self.assertEqual([(Expense.RENT, 1.0), (Expense.LIVING, 2.0)], m.items())
+        self.assertIsNone(m.get(Income.UK_SALARY))
+
+        m.set_weights([1.0, 1.0])
+        self.assertAlmostEqual(3.0, m.total)
+
+        with self.assertRaises(KeyError):
+            m[Income.UK_SALARY] = 1.0
+        with self.assertRaises(TypeError):
+            del m[Expense.RENT]
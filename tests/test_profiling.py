@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset
+from pfme.config import SimulationConfig
+from pfme.metric import TotalAssets
+from pfme.profiling import Profiler
+from pfme.simulation import Simulation
+from pfme.strategy import BusinessConstant, FixedYearlyInvestmentStrategy
+
+
+class TestProfiler(TestCase):
+    def config(self):
+        return SimulationConfig(
+            metrics=[TotalAssets()],
+            strategies=[
+                BusinessConstant(1_000.0),
+                FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0),
+            ],
+            start_year=2024.0,
+            end_year=2034.0,
+            asset_provider_mapping={
+                Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+                Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.05),
+            },
+        )
+
+    def test_counts_calls_per_component(self):
+        config = self.config()
+        profiler = Profiler()
+        Simulation(config, progress=False, profiler=profiler).run()
+
+        rows = {(row["component"], row["index"], row["method"]): row for row in profiler.report()}
+        self.assertEqual(10, rows[("strategy", 0, "update_income")]["calls"])
+        self.assertEqual("BusinessConstant", rows[("strategy", 0, "update_income")]["type"])
+        self.assertEqual(10, rows[("strategy", 1, "execute")]["calls"])
+        self.assertEqual(10, rows[("trace", 0, "record")]["calls"])
+        # TotalAssets is derived from the trace once, after the run
+        self.assertEqual(1, rows[("metric", 0, "derive")]["calls"])
+        self.assertEqual(11, rows[("asset_provider", 0, "update_value")]["calls"])
+        self.assertTrue(all(row["seconds"] >= 0.0 for row in rows.values()))
+        seconds = [row["seconds"] for row in profiler.report()]
+        self.assertEqual(sorted(seconds, reverse=True), seconds)
+
+    def test_hooks_are_restored(self):
+        simulation = Simulation(self.config(), progress=False, profiler=Profiler())
+        simulation.run()
+
+        for strategy in simulation.strategies:
+            self.assertNotIn("execute", vars(strategy))
+        self.assertNotIn("derive", vars(simulation.metrics[0]))
+        self.assertNotIn("record", vars(simulation.trace))
+
+    def test_repeated_strategy_is_profiled_per_position(self):
+        config = self.config()
+        business = config.strategies[0]
+        config.strategies = [business, business, config.strategies[1]]
+        profiler = Profiler()
+        simulation = Simulation(config, progress=False, profiler=profiler)
+        simulation.run()
+
+        rows = {(row["component"], row["index"], row["method"]): row for row in profiler.report()}
+        self.assertEqual(10, rows[("strategy", 0, "update_income")]["calls"])
+        self.assertEqual(10, rows[("strategy", 1, "update_income")]["calls"])
+        # The stateless strategy is the config's own instance, left untouched
+        self.assertIs(business, simulation.strategies[0])
+        self.assertNotIn("update_income", vars(business))
+
+    def test_results_match_unprofiled_run(self):
+        plain = Simulation(self.config(), progress=False)
+        plain.run()
+        profiled = Simulation(self.config(), progress=False, profiler=Profiler())
+        profiled.run()
+        self.assertEqual(10, len(profiled.metrics[0].values))
+        self.assertEqual(plain.metrics[0].values, profiled.metrics[0].values)
@@ -0,0 +1,189 @@
+import json
+import math
+import os
+import tempfile
+
+from unittest import TestCase
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset, GeometricBrownianMotionAsset
+from pfme.correlated import CorrelatedReturns
+from pfme.metric import TotalAssets
+from pfme.run import load_simulation_config, simulate
+from pfme.scenario import config_from_dict, load_scenario, register
+from pfme.strategy import (
+    BusinessConstant,
+    InvestFractionOfCashAfterBuffer,
+    LimitedDurationStrategy,
+    Strategy,
+)
+
+SCENARIO_TOML = """
+start_year = 2024
+end_year = 2034
+increment = 0.5
+
+[[strategies]]
+type = "CareerExponential"
+starting_salary = 40000
+yearly_salary_growth = 0.03
+
+[[strategies]]
+type = "LimitedDurationStrategy"
+end = 5
+child = { type = "BusinessConstant", yearly_profit = 5000.0 }
+
+[[strategies]]
+type = "SimpleSpendingWithCreep"
+initial_spending = 20000.0
+creep_rate = 0.02
+
+[[strategies]]
+type = "EarnPostTaxIncome"
+
+[[strategies]]
+type = "InvestFractionOfCashAfterBuffer"
+buffer_per_yearly_expenses = 0.5
+allocation = { ETF_GLOBAL_STOCK = 0.8, SAVINGS_ACCOUNT_VARIABLE_RATE = 0.2 }
+
+[[metrics]]
+type = "TotalAssets"
+
+[[metrics]]
+type = "FIReached"
+withdrawal_rate = 0.04
+
+[assets.CASH]
+type = "ConstantGeomIncreaseAsset"
+starting_value = 1.0
+growth_rate = 0.0
+
+[assets.ETF_GLOBAL_STOCK]
+type = "GeometricBrownianMotionAsset"
+starting_value = 100.0
+growth_rate = 0.06
+volatility = 0.15
+seed = 3
+
+[assets.SAVINGS_ACCOUNT_VARIABLE_RATE]
+type = "ConstantGeomIncreaseAsset"
+starting_value = 100.0
+growth_rate = 0.04
+"""
+
+
+class TestScenario(TestCase):
+    def write(self, directory: str, name: str, content: str) -> str:
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_load_toml(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = load_scenario(self.write(directory, "scenario.toml", SCENARIO_TOML))
+
+        self.assertEqual((2024.0, 2034.0, 0.5), (config.start_year, config.end_year, config.increment))
+        self.assertIsInstance(config.start_year, float)
+        limited = config.strategies[1]
+        self.assertIsInstance(limited, LimitedDurationStrategy)
+        self.assertEqual(BusinessConstant(5_000.0), limited.child)
+        self.assertEqual(5.0, limited.end)
+        self.assertEqual(-math.inf, limited.start)
+        invest = config.strategies[4]
+        self.assertIsInstance(invest, InvestFractionOfCashAfterBuffer)
+        self.assertEqual({Asset.ETF_GLOBAL_STOCK: 0.8, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.2}, invest.allocation)
+        self.assertIsInstance(config.metrics[0], TotalAssets)
+        self.assertEqual(0.04, config.metrics[1].withdrawal_rate)
+        etf = config.asset_provider_mapping[Asset.ETF_GLOBAL_STOCK]
+        self.assertIsInstance(etf, GeometricBrownianMotionAsset)
+        self.assertEqual(3, etf.seed)
+
+    def test_json_matches_toml(self):
+        import tomllib
+        data = tomllib.loads(SCENARIO_TOML)
+        with tempfile.TemporaryDirectory() as directory:
+            toml_path = self.write(directory, "scenario.toml", SCENARIO_TOML)
+            json_path = self.write(directory, "scenario.json", json.dumps(data))
+            self.assertEqual(
+                simulate(load_simulation_config(toml_path), progress=False),
+                simulate(load_simulation_config(json_path), progress=False),
+            )
+
+    def test_defaults(self):
+        config = config_from_dict({"metrics": [{"type": "TotalAssets"}]})
+        self.assertEqual([], config.strategies)
+        self.assertIsInstance(config.asset_provider_mapping[Asset.CASH], ConstantGeomIncreaseAsset)
+
+    def test_assets_are_merged_over_defaults(self):
+        etf = {"type": "ConstantGeomIncreaseAsset", "starting_value": 1.0, "growth_rate": 0.0}
+        config = config_from_dict({"assets": {"ETF_GLOBAL_STOCK": etf}})
+        self.assertEqual(1.0, config.asset_provider_mapping[Asset.ETF_GLOBAL_STOCK].starting_value)
+        self.assertIsInstance(config.asset_provider_mapping[Asset.CASH], ConstantGeomIncreaseAsset)
+
+    def test_assets_share_returns_model(self):
+        config = config_from_dict({
+            "returns_models": {
+                "market": {
+                    "type": "CorrelatedReturns",
+                    "growth_rates": {"ETF_GLOBAL_STOCK": 0.06, "SAVINGS_ACCOUNT_VARIABLE_RATE": 0.03},
+                    "covariance": [[0.0225, 0.0015], [0.0015, 0.0025]],
+                    "seed": 1,
+                },
+            },
+            "assets": {
+                "ETF_GLOBAL_STOCK": {"type": "CorrelatedAsset", "model": "market", "starting_value": 100.0},
+                "SAVINGS_ACCOUNT_VARIABLE_RATE": {"type": "CorrelatedAsset", "model": "market", "starting_value": 1.0},
+            },
+        })
+        etf = config.asset_provider_mapping[Asset.ETF_GLOBAL_STOCK]
+        savings = config.asset_provider_mapping[Asset.SAVINGS_ACCOUNT_VARIABLE_RATE]
+        self.assertIsInstance(etf.model, CorrelatedReturns)
+        self.assertIs(etf.model, savings.model)
+        self.assertEqual((Asset.ETF_GLOBAL_STOCK, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE), (etf.asset, savings.asset))
+
+    def test_readme_example_runs(self):
+        with open(os.path.join(os.path.dirname(__file__), "..", "README.md")) as f:
+            readme = f.read()
+        example = readme.split("```toml\n", 1)[1].split("```", 1)[0]
+        with tempfile.TemporaryDirectory() as directory:
+            config = load_scenario(self.write(directory, "scenario.toml", example))
+        result = simulate(config, progress=False)
+        self.assertEqual(len(config.years()), len(result["FIReached"]))
+
+    def test_errors_name_the_offending_entry(self):
+        cases = [
+            ({"strategies": [{"type": "Nope"}]}, "strategies[0]"),
+            ({"strategies": [{"yearly_profit": 1.0}]}, "strategies[0]"),
+            ({"strategies": [{"type": "BusinessConstant", "profit": 1.0}]}, "profit"),
+            ({"strategies": [{"type": "BusinessConstant"}]}, "strategies[0]"),
+            ({"strategies": [{"type": "FixedYearlyInvestmentStrategy", "asset": "GOLD", "amount": 1.0}]}, "GOLD"),
+            ({"metrics": [{"type": "CareerExponential"}]}, "metrics[0]"),
+            ({"assets": {"GOLD": {"type": "ConstantGeomIncreaseAsset"}}}, "assets.GOLD"),
+            ({"end_year": "soon"}, "end_year"),
+            ({"strategies": [{"type": "EarnPostTaxIncome", "tax_engine": {"rates": []}}]}, "tax_engine"),
+            ({"assets": {"ETF_GLOBAL_STOCK": {"type": "CorrelatedAsset", "model": "nope", "starting_value": 1.0}}}, "nope"),
+            ({"extra": 1}, "extra"),
+        ]
+        for data, message in cases:
+            with self.assertRaisesRegex(ValueError, message.replace("[", r"\[").replace("]", r"\]")):
+                config_from_dict(data)
+
+    def test_register(self):
+        class Idle(Strategy):
+            def requested_assets(self):
+                return set()
+
+            def execute(self, portfolio, year, increment):
+                pass
+
+        register(Idle, "test_scenario.Idle")
+        config = config_from_dict({"strategies": [{"type": "test_scenario.Idle"}]})
+        self.assertIsInstance(config.strategies[0], Idle)
+        with self.assertRaises(ValueError):
+            register(int)
+
+    def test_invalid_file_reports_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write(directory, "scenario.json", json.dumps({"metrics": [{"type": "Nope"}]}))
+            with self.assertRaisesRegex(ValueError, "scenario.json"):
+                load_scenario(path)
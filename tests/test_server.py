@@ -0,0 +1,91 @@
+import asyncio
+import os
+import tempfile
+
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from pfme.server import SimulationServer, load_scenario_module_cached, request, run_request
+
+SCENARIO = """
+from pfme.asset import Asset, ConstantGeomIncreaseAsset
+from pfme.config import SimulationConfig
+from pfme.metric import TotalAssets
+from pfme.strategy import FixedYearlyInvestmentStrategy
+
+
+def get_config(amount=100.0):
+    return SimulationConfig(
+        metrics=[TotalAssets()],
+        strategies=[FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, amount)],
+        start_year=2024.0,
+        end_year=2027.0,
+        asset_provider_mapping={
+            Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.0),
+        },
+    )
+"""
+
+
+class TestScenarioCache(TestCase):
+    def test_reloads_on_modification(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "scenario.py"
+            path.write_text(SCENARIO)
+            first = load_scenario_module_cached(str(path))
+            self.assertIs(first, load_scenario_module_cached(str(path)))
+
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertIsNot(first, load_scenario_module_cached(str(path)))
+
+    def test_errors_are_reported(self):
+        response = run_request({"id": 3, "config": "/nonexistent/scenario.py"})
+        self.assertEqual(3, response["id"])
+        self.assertIn("FileNotFoundError", response["error"])
+
+
+class TestSimulationServer(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = str(Path(self.tmp.name) / "scenario.py")
+        Path(self.config_path).write_text(SCENARIO)
+        self.socket_path = str(Path(self.tmp.name) / "pfme.sock")
+
+        self.server = SimulationServer(workers=2)
+        self.listener = await self.server.start_unix(self.socket_path)
+
+    async def asyncTearDown(self):
+        self.listener.close()
+        await self.listener.wait_closed()
+        self.server.close()
+        self.tmp.cleanup()
+
+    async def test_concurrent_requests(self):
+        responses = await asyncio.gather(*[
+            asyncio.to_thread(
+                request,
+                {"id": i, "config": self.config_path, "params": {"amount": 100.0 * i}},
+                self.socket_path,
+            )
+            for i in range(1, 4)
+        ])
+        for i, response in enumerate(responses, start=1):
+            self.assertEqual(i, response["id"])
+            self.assertEqual(
+                [100.0 * i, 200.0 * i, 300.0 * i],
+                [entry["value"] for entry in response["metrics"]["TotalAssets"]],
+            )
+            self.assertIn("start_time", response)
+
+    async def test_several_requests_on_one_connection(self):
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        writer.write(b'{"id": 1, "config": "%s"}\nnot json\n' % self.config_path.encode())
+        await writer.drain()
+        first = await reader.readline()
+        second = await reader.readline()
+        writer.close()
+        await writer.wait_closed()
+
+        self.assertIn(b'"metrics"', first)
+        self.assertIn(b"Invalid request", second)
@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.asset import Asset, GeometricBrownianMotionAsset
+from pfme.batch.metric import BatchFIReached, BatchQuantiles, BatchTotalAssets
+from pfme.correlated import CorrelatedAsset, CorrelatedReturns
+from pfme.metric import HoldingsByAsset, TotalAssets
+from pfme.shard import Job, load, merge, run_local, run_shard, save, split
+from pfme.strategy import Strategy
+
+import configs
+
+
+def savings() -> CorrelatedAsset:
+    """Savings account whose returns come from a correlated model."""
+    model = CorrelatedReturns.from_correlation(
+        growth_rates={Asset.ETF_GLOBAL_STOCK: 0.06, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.04},
+        volatilities={Asset.ETF_GLOBAL_STOCK: 0.2, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.05},
+        correlation=np.array([[1.0, 0.3], [0.3, 1.0]]),
+        seed=0,
+    )
+    return model.providers({Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 100.0})[Asset.SAVINGS_ACCOUNT_VARIABLE_RATE]
+
+
+def strategies() -> list[Strategy]:
+    return configs.fi_strategies(1.0, {Asset.ETF_GLOBAL_STOCK: 0.7, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.3})
+
+
+def make_job(seed: int = 1) -> Job:
+    config = configs.make_config(
+        strategies(),
+        [TotalAssets(), BatchFIReached(0.04), BatchQuantiles(BatchTotalAssets())],
+        end_year=2040.0,
+        etf=GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=0),
+        savings=savings(),
+    )
+    return Job(config, n_paths=50, seed=seed, block_size=8)
+
+
+class TestShard(TestCase):
+    def test_identical_for_any_shard_count(self):
+        (assets, fi, quantiles), years = run_local(make_job())
+        self.assertEqual((16, 50), assets.shape)
+        self.assertEqual(list(np.arange(2024.0, 2040.0)), years)
+        # Paths differ from each other
+        self.assertEqual(50, len(set(assets[-1])))
+
+        for n_shards in [2, 3, 7, 20]:
+            results = [run_shard(shard) for shard in split(make_job(), n_shards)]
+            (other_assets, other_fi, other_quantiles), _ = merge(results[::-1])
+            self.assertEqual(assets.tobytes(), other_assets.tobytes())
+            self.assertEqual(fi.tobytes(), other_fi.tobytes())
+            self.assertEqual(quantiles.values, other_quantiles.values)
+
+    def test_seed_changes_paths(self):
+        (assets, _, _), _ = run_local(make_job(seed=1))
+        (other_assets, _, _), _ = run_local(make_job(seed=2))
+        self.assertFalse(np.array_equal(assets, other_assets))
+
+    def test_worker_processes(self):
+        (assets, _, _), _ = run_local(make_job())
+        (other_assets, _, _), _ = run_local(make_job(), workers=2)
+        self.assertEqual(assets.tobytes(), other_assets.tobytes())
+
+    def test_job_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results = []
+            for i, shard in enumerate(split(make_job(), 3)):
+                job_path = os.path.join(directory, f"shard-{i}.pkl")
+                save(job_path, shard)
+                result_path = os.path.join(directory, f"result-{i}.pkl")
+                save(result_path, run_shard(load(job_path)))
+                results.append(load(result_path))
+            (assets, _, _), _ = merge(results)
+
+        (expected, _, _), _ = run_local(make_job())
+        self.assertEqual(expected.tobytes(), assets.tobytes())
+
+    def test_merge_rejects_missing_and_duplicate_blocks(self):
+        results = [run_shard(shard) for shard in split(make_job(), 3)]
+        with self.assertRaises(ValueError):
+            merge(results[:1] + results[2:])
+        with self.assertRaises(ValueError):
+            merge(results + results[:1])
+
+    def test_rejects_unshardable_metric(self):
+        with self.assertRaises(ValueError):
+            run_local(Job(configs.make_config(strategies(), [HoldingsByAsset()], savings=savings()), n_paths=4, seed=0))
+
+    def test_split(self):
+        shards = split(make_job(), 3)
+        self.assertEqual(list(range(7)), [block for shard in shards for block in shard.blocks])
+        self.assertEqual(7, len(split(make_job(), 100)))
+        self.assertEqual(2, make_job().block_paths(6))
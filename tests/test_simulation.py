@@ -0,0 +1,344 @@
+import contextlib
+import os
+import tempfile
+
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+from pfme.asset import Asset, ConstantGeomIncreaseAsset, GeometricBrownianMotionAsset
+from pfme.config import SimulationConfig
+from pfme.metric import CashflowStatement, FIReached, TotalAssets
+from pfme.portfolio import Expense, Income
+from pfme.progress import Progress
+from pfme.simulation import Simulation, run_branches
+from pfme.stop import YearReached, fi_reached
+from pfme.strategy import (
+    BusinessConstant,
+    CareerExponential,
+    EarnPostTaxIncome,
+    FixedYearlyInvestmentStrategy,
+    InvestFractionOfCashAfterBuffer,
+    LimitedDurationStrategy,
+    SimpleSpendingWithCreep,
+)
+
+
+class TestAnalyticTrajectories(TestCase):
+    def test_closed_form_strategies_match_stepwise_updates(self):
+        strategies = [
+            CareerExponential(30_000.0, 0.05),
+            SimpleSpendingWithCreep(15_000.0, 0.02),
+            BusinessConstant(1_000.0),
+        ]
+        config = SimulationConfig(
+            metrics=[CashflowStatement()],
+            strategies=strategies,
+            increment=0.25,
+            start_year=2024.0,
+            end_year=2034.0,
+            asset_provider_mapping={Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0)},
+        )
+        simulation = Simulation(config, progress=False)
+        simulation.run()
+
+        stepwise = [CareerExponential(30_000.0, 0.05), SimpleSpendingWithCreep(15_000.0, 0.02)]
+        income = {Income.UK_SALARY: 0.0}
+        expenses = {Expense.LIVING: 0.0}
+        self.assertEqual(40, len(simulation.metrics[0].values))
+        for entry in simulation.metrics[0].values:
+            stepwise[0].update_income(income, entry["year"], 0.25)
+            stepwise[1].update_expenses(expenses, entry["year"], 0.25)
+            recorded_income = {item["name"]: item["value"] for item in entry["value"]["income"]}
+            recorded_expenses = {item["name"]: item["value"] for item in entry["value"]["expenses"]}
+            self.assertAlmostEqual(income[Income.UK_SALARY], recorded_income["UK_SALARY"], places=6)
+            self.assertAlmostEqual(1_000.0, recorded_income["UK_TRADING"])
+            self.assertAlmostEqual(expenses[Expense.LIVING], recorded_expenses["LIVING"], places=6)
+
+        # The engine used the trajectories, not the stateful hooks
+        self.assertIsNone(simulation.strategies[0].start_year)
+        self.assertIsNone(simulation.strategies[1].start_year)
+
+    def test_constant_growth_asset_reruns_from_start(self):
+        config = SimulationConfig(
+            metrics=[TotalAssets()],
+            strategies=[BusinessConstant(0.0)],
+            start_year=2024.0,
+            end_year=2030.0,
+            asset_provider_mapping={Asset.CASH: ConstantGeomIncreaseAsset(2.0, 0.1)},
+        )
+        for _ in range(2):
+            simulation = Simulation(config, progress=False)
+            simulation.run()
+            self.assertAlmostEqual(2.0 * 1.1 ** 6, simulation.asset_providers[Asset.CASH].value())
+        self.assertEqual(2.0, config.asset_provider_mapping[Asset.CASH].value())
+
+
+class TestSnapshotAndFork(TestCase):
+    @staticmethod
+    def config(strategies):
+        return SimulationConfig(
+            metrics=[TotalAssets(), CashflowStatement()],
+            strategies=strategies,
+            start_year=2024.0,
+            end_year=2044.0,
+            asset_provider_mapping={
+                Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+                Asset.ETF_GLOBAL_STOCK: GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=3),
+            },
+        )
+
+    @staticmethod
+    def strategies():
+        return [
+            CareerExponential(30_000.0, 0.03),
+            SimpleSpendingWithCreep(15_000.0, 0.02),
+            EarnPostTaxIncome(),
+            InvestFractionOfCashAfterBuffer(1.0, {Asset.ETF_GLOBAL_STOCK: 1.0}),
+        ]
+
+    def test_resumed_snapshot_matches_uninterrupted_run(self):
+        full = Simulation(self.config(self.strategies()), progress=False)
+        full.run()
+
+        trunk = Simulation(self.config(self.strategies()), progress=False)
+        trunk.run_until(2034.0)
+        self.assertEqual(2034.0, trunk.year)
+        snapshot = trunk.snapshot()
+        trunk.run()
+        snapshot.run()
+
+        for metric in (trunk.metrics[0], snapshot.metrics[0]):
+            self.assertEqual(full.metrics[0].values, metric.values)
+
+    def test_fork_matches_run_with_strategy_from_fork_year(self):
+        reference = Simulation(
+            self.config([
+                *self.strategies(),
+                LimitedDurationStrategy(
+                    FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 1_000.0),
+                    start=2034.0,
+                    relative=False,
+                ),
+            ]),
+            progress=False,
+        )
+        reference.run()
+
+        trunk = Simulation(self.config(self.strategies()), progress=False)
+        trunk.run_until(2034.0)
+        branches = {
+            "base": trunk.fork(),
+            "invest": trunk.fork([
+                *trunk.strategies,
+                FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 1_000.0),
+            ]),
+        }
+        for branch in branches.values():
+            branch.run()
+
+        reference_values = [entry["value"] for entry in reference.metrics[0].values]
+        invest_values = [entry["value"] for entry in branches["invest"].metrics[0].values]
+        base_values = [entry["value"] for entry in branches["base"].metrics[0].values]
+        for expected, actual in zip(reference_values, invest_values):
+            self.assertAlmostEqual(expected, actual, places=6)
+        self.assertEqual(reference_values[:10], base_values[:10])
+        self.assertLess(base_values[-1], invest_values[-1])
+        # The trunk itself is untouched by its branches
+        self.assertFalse(trunk.done)
+        self.assertEqual(10, trunk.step_index)
+
+    def test_fork_starts_new_closed_form_strategies_at_fork_year(self):
+        trunk = Simulation(self.config([CareerExponential(30_000.0, 0.0)]), progress=False)
+        trunk.run_until(2030.0)
+        branch = trunk.fork([CareerExponential(40_000.0, 0.1)])
+        branch.run()
+
+        salaries = [
+            {item["name"]: item["value"] for item in entry["value"]["income"]}["UK_SALARY"]
+            for entry in branch.metrics[1].values
+        ]
+        self.assertEqual([30_000.0] * 6, salaries[:6])
+        # The removed strategy's salary stays at its last value
+        self.assertAlmostEqual(30_000.0 + 40_000.0, salaries[6])
+        self.assertAlmostEqual(30_000.0 + 40_000.0 * 1.1 ** 3, salaries[9])
+
+    def test_fork_rejects_assets_not_simulated(self):
+        trunk = Simulation(self.config([BusinessConstant(0.0)]), progress=False)
+        trunk.run_until(2030.0)
+        with self.assertRaises(ValueError):
+            trunk.fork([FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 1_000.0)])
+
+    def test_save_and_load(self):
+        full = Simulation(self.config(self.strategies()), progress=False)
+        full.run()
+
+        trunk = Simulation(self.config(self.strategies()), progress=False)
+        trunk.run_until(2030.0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.pkl")
+            trunk.save(path)
+            resumed = Simulation.load(path, progress=False)
+        resumed.run()
+        self.assertEqual(full.metrics[0].values, resumed.metrics[0].values)
+
+    def test_run_branches(self):
+        branches = run_branches(
+            self.config(self.strategies()),
+            2034.0,
+            {
+                "base": self.strategies(),
+                "frugal": [CareerExponential(30_000.0, 0.03), SimpleSpendingWithCreep(10_000.0, 0.0)],
+            },
+        )
+        self.assertEqual({"base", "frugal"}, set(branches))
+        for branch in branches.values():
+            self.assertTrue(branch.done)
+            self.assertEqual(20, len(branch.metrics[0].values))
+
+
+class TestStopConditions(TestCase):
+    def test_stops_at_first_year_fi_is_reached(self):
+        config = SimulationConfig(
+            metrics=[FIReached(0.04)],
+            strategies=[
+                SimpleSpendingWithCreep(1_000.0, 0.0),
+                FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 5_000.0),
+            ],
+            start_year=2024.0,
+            end_year=2074.0,
+            asset_provider_mapping={
+                Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+                Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(1.0, 0.0),
+            },
+        )
+        simulation = Simulation(config, progress=False)
+        goal = fi_reached(0.04)
+        simulation.run([YearReached(2060.0), goal])
+
+        # 25 yearly expenses are invested after five years
+        self.assertIs(goal, simulation.stopped_by)
+        self.assertEqual(2028.0, simulation.stopped_year)
+        self.assertEqual([False] * 4 + [True], [entry["value"] for entry in simulation.metrics[0].values])
+
+        simulation.run([YearReached(2030.0)])
+        self.assertEqual(2030.0, simulation.stopped_year)
+        simulation.run()
+        self.assertIsNone(simulation.stopped_by)
+        self.assertTrue(simulation.done)
+
+
+class TestRunState(TestCase):
+    def test_config_is_reusable_and_unchanged(self):
+        limited = LimitedDurationStrategy(CareerExponential(30_000.0, 0.05), start=2.0)
+        spending = SimpleSpendingWithCreep(15_000.0, 0.02)
+        config = SimulationConfig(
+            metrics=[TotalAssets(), CashflowStatement()],
+            strategies=[limited, spending, EarnPostTaxIncome()],
+            start_year=2024.0,
+            end_year=2034.0,
+            asset_provider_mapping={
+                Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+                Asset.ETF_GLOBAL_STOCK: GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=3),
+            },
+        )
+
+        runs = [Simulation(config, progress=False) for _ in range(2)]
+        for simulation in runs:
+            simulation.run()
+
+        self.assertEqual(runs[0].metrics[0].values, runs[1].metrics[0].values)
+        self.assertEqual(10, len(runs[0].metrics[0].values))
+        self.assertEqual([], config.metrics[0].values)
+        self.assertEqual(0.0, limited.elapsed)
+        self.assertIsNone(limited.child.start_year)
+        self.assertEqual(10.0, runs[0].strategies[0].elapsed)
+        self.assertIsNot(limited.child, runs[0].strategies[0].child)
+
+    def test_stateless_strategies_are_shared(self):
+        strategy = BusinessConstant(1_000.0)
+        self.assertIs(strategy, strategy.new_run())
+        limited = LimitedDurationStrategy(strategy)
+        self.assertIs(strategy, limited.new_run().child)
+
+
+class TestDispatchPlan(TestCase):
+    def test_only_overridden_hooks_are_called(self):
+        config = SimulationConfig(
+            metrics=[TotalAssets()],
+            strategies=[
+                BusinessConstant(1_000.0),
+                CareerExponential(30_000.0, 0.05),
+                FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 100.0),
+                LimitedDurationStrategy(BusinessConstant(1.0)),
+            ],
+            start_year=2024.0,
+            end_year=2026.0,
+            asset_provider_mapping={
+                Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0),
+                Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, 0.0),
+            },
+        )
+        simulation = Simulation(config, progress=False)
+        simulation.start()
+        strategies = simulation.strategies
+
+        # CareerExponential's income comes from its trajectory
+        self.assertEqual([strategies[0].update_income], simulation._income_hooks)
+        self.assertEqual([], simulation._expense_hooks)
+        self.assertEqual([strategies[2].execute, strategies[3].execute], simulation._execute_hooks)
+
+
+def _worker_progress_enabled() -> bool:
+    return Progress(10).enabled
+
+
+class TestTimeGrid(TestCase):
+    def test_years_are_derived_from_step_index(self):
+        config = SimulationConfig(metrics=[], strategies=[], increment=1 / 365, start_year=2024.0, end_year=2084.0)
+        years = config.years()
+        self.assertEqual(60 * 365, config.n_steps)
+        self.assertEqual(config.n_steps, len(years))
+        self.assertEqual(2024.0 + 21899 * (1 / 365), years[-1])
+        self.assertLess(years[-1], config.end_year)
+
+    def test_uneven_grid_covers_end_year(self):
+        config = SimulationConfig(metrics=[], strategies=[], increment=0.4, start_year=2024.0, end_year=2025.0)
+        self.assertEqual([2024.0, 2024.4, 2024.8], config.years().tolist())
+        config.end_year = 2023.0
+        self.assertEqual(0, config.n_steps)
+
+    def test_simulation_runs_on_config_grid(self):
+        config = SimulationConfig(
+            metrics=[TotalAssets()],
+            strategies=[],
+            increment=1 / 12,
+            start_year=2024.0,
+            end_year=2034.0,
+            asset_provider_mapping={Asset.CASH: ConstantGeomIncreaseAsset(1.0, 0.0)},
+        )
+        simulation = Simulation(config, progress=False)
+        simulation.run()
+        self.assertEqual(config.years().tolist(), [entry["year"] for entry in simulation.metrics[0].values])
+
+
+class TestProgress(TestCase):
+    def test_disabled_progress_never_refreshes(self):
+        with Progress(1_000, enabled=False) as progress:
+            self.assertIsNone(progress._bar)
+            self.assertEqual(float("inf"), progress.next_refresh)
+            progress.refresh(10)
+
+    def test_refreshes_are_throttled(self):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+            with Progress(10_000, refreshes=10) as progress:
+                refreshes = 0
+                for position in range(1, 10_001):
+                    if position >= progress.next_refresh:
+                        progress.refresh(position)
+                        refreshes += 1
+                self.assertEqual(10, refreshes)
+                self.assertEqual(10_000, progress._bar.n)
+
+    def test_disabled_in_worker_processes(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertFalse(executor.submit(_worker_progress_enabled).result())
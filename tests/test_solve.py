@@ -0,0 +1,95 @@
+from unittest import TestCase
+
+from pfme.asset import Asset
+from pfme.metric import TotalAssets
+from pfme.solve import _probe, goal_seek
+from pfme.stop import fi_reached
+from pfme.strategy import (
+    CareerExponential,
+    EarnPostTaxIncome,
+    FixedYearlyInvestmentStrategy,
+    InvestFractionOfCashAfterBuffer,
+    SimpleSpendingWithCreep,
+    Strategy,
+)
+
+import configs
+
+
+def strategies(*investing: Strategy) -> list[Strategy]:
+    """Flat salary and spending, followed by the given investing strategies."""
+    return [
+        CareerExponential(60_000.0, 0.0),
+        SimpleSpendingWithCreep(20_000.0, 0.0),
+        EarnPostTaxIncome(),
+        *investing,
+    ]
+
+
+class TestGoalSeek(TestCase):
+    def test_smallest_investment_reaching_fi_by_year(self):
+        investment = FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 0.0)
+        config = configs.make_config(strategies(investment), [TotalAssets()], end_year=2074.0)
+        goal = fi_reached(0.04)
+
+        solution = goal_seek(config, investment, "amount", 0.0, 100_000.0, goal, by_year=2044.0, tolerance=10.0)
+
+        self.assertLessEqual(solution.year, 2044.0)
+        stop = [goal]
+        just_below = _probe(config, investment, "amount", solution.value - 10.0, stop)
+        self.assertTrue(just_below.stopped_year is None or just_below.stopped_year > 2044.0)
+        # The config itself is left as it was
+        self.assertEqual(0.0, investment.amount)
+        self.assertEqual([], config.metrics[0].values)
+
+    def test_by_year_between_steps(self):
+        investment = FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 0.0)
+        config = configs.make_config(strategies(investment), [TotalAssets()], end_year=2074.0)
+        goal = fi_reached(0.04)
+
+        solution = goal_seek(config, investment, "amount", 0.0, 100_000.0, goal, by_year=2030.5, tolerance=10.0)
+
+        self.assertLessEqual(solution.year, 2030.0)
+        on_grid = goal_seek(config, investment, "amount", 0.0, 100_000.0, goal, by_year=2030.0, tolerance=10.0)
+        self.assertEqual(on_grid.value, solution.value)
+
+    def test_largest_buffer_reaching_fi_by_year(self):
+        invest = InvestFractionOfCashAfterBuffer(0.0, {Asset.ETF_GLOBAL_STOCK: 1.0})
+        config = configs.make_config(strategies(invest), [TotalAssets()], end_year=2074.0)
+        goal = fi_reached(0.04)
+
+        solution = goal_seek(
+            config, invest, "buffer_per_yearly_expenses", 0.0, 50.0, goal, by_year=2042.0, tolerance=0.01,
+        )
+
+        self.assertLessEqual(solution.year, 2042.0)
+        above = _probe(config, invest, "buffer_per_yearly_expenses", solution.value + 0.01, [goal])
+        self.assertTrue(above.stopped_year is None or above.stopped_year > 2042.0)
+
+    def test_probes_stop_early(self):
+        investment = FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 30_000.0)
+        config = configs.make_config(strategies(investment), [TotalAssets()], end_year=2074.0)
+        goal = fi_reached(0.04)
+
+        simulation = _probe(config, investment, "amount", 30_000.0, [goal])
+        self.assertIs(goal, simulation.stopped_by)
+        self.assertFalse(simulation.done)
+        self.assertEqual(simulation.stopped_year, simulation.years[simulation.step_index - 1])
+
+    def test_unbracketed_goal(self):
+        investment = FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 0.0)
+        config = configs.make_config(strategies(investment), [TotalAssets()], end_year=2074.0)
+        with self.assertRaises(ValueError):
+            goal_seek(config, investment, "amount", 0.0, 1.0, fi_reached(0.04), by_year=2030.0)
+
+    def test_strategy_not_in_config(self):
+        config = configs.make_config(strategies(), [TotalAssets()], end_year=2074.0)
+        with self.assertRaises(ValueError):
+            goal_seek(
+                config,
+                FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, 0.0),
+                "amount",
+                0.0,
+                1.0,
+                fi_reached(0.04),
+            )
@@ -0,0 +1,58 @@
+import tempfile
+
+from pathlib import Path
+from unittest import TestCase
+
+from pfme.sweep import expand_grid, sweep
+
+SCENARIO = """
+from pfme.asset import Asset, ConstantGeomIncreaseAsset
+from pfme.config import SimulationConfig
+from pfme.metric import TotalAssets
+from pfme.strategy import FixedYearlyInvestmentStrategy
+
+
+def get_config(amount, growth_rate):
+    return SimulationConfig(
+        metrics=[TotalAssets()],
+        strategies=[FixedYearlyInvestmentStrategy(Asset.ETF_GLOBAL_STOCK, amount)],
+        start_year=2024.0,
+        end_year=2027.0,
+        asset_provider_mapping={
+            Asset.ETF_GLOBAL_STOCK: ConstantGeomIncreaseAsset(100.0, growth_rate),
+        },
+    )
+"""
+
+
+class TestSweep(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_path = str(Path(self.tmp.name) / "scenario.py")
+        Path(self.config_path).write_text(SCENARIO)
+        self.grid = {"amount": [100.0, 200.0], "growth_rate": [0.0, 1.0]}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_expand_grid(self):
+        self.assertEqual(
+            [
+                {"amount": 100.0, "growth_rate": 0.0},
+                {"amount": 100.0, "growth_rate": 1.0},
+                {"amount": 200.0, "growth_rate": 0.0},
+                {"amount": 200.0, "growth_rate": 1.0},
+            ],
+            expand_grid(self.grid),
+        )
+
+    def test_pool_matches_in_process(self):
+        in_process = sweep(self.config_path, self.grid, workers=1)
+        pooled = sweep(self.config_path, self.grid, workers=2, chunksize=1)
+        self.assertEqual(in_process, pooled)
+
+        final_values = [result["metrics"]["TotalAssets"][-1]["value"] for result in in_process]
+        # 3 yearly investments, growing 0% or 100% per year
+        self.assertAlmostEqual(300.0, final_values[0])
+        self.assertAlmostEqual(100.0 * (4 + 2 + 1), final_values[1])
+        self.assertAlmostEqual(600.0, final_values[2])
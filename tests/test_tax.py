@@ -0,0 +1,68 @@
+import math
+
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.tax import (
+    BandTable,
+    CLASS_4_NI_BANDS,
+    POST_ALLOWANCE_TAX_BANDS,
+    UK_TAX_ENGINE,
+    UK_TAX_YEARS,
+    UkTaxEngine,
+    UkTaxYear,
+)
+
+
+def walk_bands(amount: float, bands: list[tuple[float, float]]) -> float:
+    remaining = amount
+    total = 0.0
+    for rate, upper_limit in bands:
+        taxable_at_rate = min(upper_limit, remaining)
+        total += taxable_at_rate * rate
+        remaining -= taxable_at_rate
+    return total
+
+
+class TestBandTable(TestCase):
+    def test_matches_walking_bands(self):
+        amounts = [-5_000.0, 0.0, 100.0, 12_570.0, 37_700.0, 50_000.0, 62_840.0, 162_840.0, 1e6]
+        for bands in [POST_ALLOWANCE_TAX_BANDS, CLASS_4_NI_BANDS]:
+            table = BandTable(bands)
+            for amount in amounts:
+                self.assertAlmostEqual(walk_bands(amount, bands), table(amount), places=6)
+            np.testing.assert_allclose(
+                [walk_bands(amount, bands) for amount in amounts],
+                table.batch(np.array(amounts)),
+            )
+
+    def test_finite_top_band(self):
+        table = BandTable([(0.1, 100.0), (0.2, 100.0)])
+        self.assertAlmostEqual(30.0, table(1_000.0))
+        self.assertAlmostEqual(walk_bands(150.0, [(0.1, 100.0), (0.2, 100.0)]), table(150.0))
+
+
+class TestUkTaxEngine(TestCase):
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(0)
+        rental, trading, salary = rng.uniform(0, 200_000, size=(3, 200))
+        tax, ni = UK_TAX_ENGINE.tax_and_ni_batch(rental, trading, salary, 2030.0)
+        for i in range(200):
+            expected_tax, expected_ni = UK_TAX_ENGINE.tax_and_ni(rental[i], trading[i], salary[i], 2030.0)
+            self.assertAlmostEqual(expected_tax, tax[i], places=6)
+            self.assertAlmostEqual(expected_ni, ni[i], places=6)
+
+    def test_rules_per_tax_year(self):
+        no_tax = UkTaxYear(
+            income_tax=BandTable([(0.0, math.inf)]),
+            class_1_ni=BandTable([(0.0, math.inf)]),
+            class_4_ni=BandTable([(0.0, math.inf)]),
+        )
+        engine = UkTaxEngine({**UK_TAX_YEARS, 2030: no_tax})
+
+        self.assertIs(UK_TAX_YEARS[2024], engine.rules_for(2000.0))
+        self.assertIs(UK_TAX_YEARS[2024], engine.rules_for(2029.9))
+        self.assertIs(no_tax, engine.rules_for(2030.0))
+        self.assertEqual((0.0, 0.0), engine.tax_and_ni(0.0, 0.0, 80_000.0, 2031.0))
+        self.assertGreater(engine.tax_and_ni(0.0, 0.0, 80_000.0, 2029.0)[0], 0.0)
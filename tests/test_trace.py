@@ -0,0 +1,122 @@
+import os
+import tempfile
+
+from unittest import TestCase
+
+import numpy as np
+
+from pfme.asset import Asset, GeometricBrownianMotionAsset
+from pfme.metric import CashflowStatement, FIReached, HoldingsByAsset, RunMetric, TotalAssets
+from pfme.portfolio import Portfolio
+from pfme.simulation import Simulation
+from pfme.strategy import Strategy
+from pfme.trace import Trace
+
+import configs
+
+
+class Recorded(RunMetric):
+    """Wraps a metric so that it's recorded every step, like a metric
+    that can't be derived.
+    """
+    def __init__(self, metric: RunMetric):
+        self.metric = metric
+        super().__init__()
+
+    def calculate(self, portfolio: Portfolio):
+        return self.metric.calculate(portfolio)
+
+    def declare_columns(self, assets):
+        return self.metric.declare_columns(assets)
+
+    def write(self, portfolio: Portfolio, row: int) -> None:
+        self.metric.columns = self.columns
+        self.metric.write(portfolio, row)
+
+    def value_at(self, row: int):
+        self.metric.columns = self.columns
+        return self.metric.value_at(row)
+
+
+def strategies() -> list[Strategy]:
+    return configs.fi_strategies(0.5, {Asset.ETF_GLOBAL_STOCK: 0.8, Asset.SAVINGS_ACCOUNT_VARIABLE_RATE: 0.2})
+
+
+def stock() -> GeometricBrownianMotionAsset:
+    return GeometricBrownianMotionAsset(100.0, 0.06, 0.15, seed=4)
+
+
+def metrics() -> list[RunMetric]:
+    return [TotalAssets(), HoldingsByAsset(), FIReached(0.04), CashflowStatement()]
+
+
+class TestTrace(TestCase):
+    def test_derived_metrics_match_recorded_ones(self):
+        config = configs.make_config(strategies(), metrics(), 0.5, end_year=2044.0, etf=stock())
+        derived = Simulation(config, progress=False)
+        derived.run()
+        recorded_metrics = [Recorded(metric) for metric in metrics()]
+        config = configs.make_config(strategies(), recorded_metrics, 0.5, end_year=2044.0, etf=stock())
+        recorded = Simulation(config, progress=False)
+        recorded.run()
+
+        self.assertEqual(40, derived.trace.n_rows)
+        for derived_metric, recorded_metric in zip(derived.metrics, recorded.metrics):
+            self.assertTrue(derived_metric.derivable)
+            self.assertFalse(recorded_metric.derivable)
+            self.assertEqual(recorded_metric.values, derived_metric.values)
+            for name, values in recorded_metric.data().items():
+                np.testing.assert_array_equal(values, derived_metric.data()[name])
+
+    def test_piecewise_runs_derive_up_to_last_step(self):
+        config = configs.make_config(strategies(), [TotalAssets()], 0.5, end_year=2044.0, etf=stock())
+        simulation = Simulation(config, progress=False)
+        simulation.run_until(2030.0)
+        self.assertEqual(12, len(simulation.metrics[0].values))
+        simulation.step()
+        self.assertEqual(12, len(simulation.metrics[0].values))
+        simulation.update_metrics()
+        self.assertEqual(13, len(simulation.metrics[0].values))
+
+    def test_evaluate_new_metric_over_saved_trace(self):
+        config = configs.make_config(strategies(), [TotalAssets()], 0.5, end_year=2044.0, etf=stock())
+        simulation = Simulation(config, progress=False)
+        simulation.run()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.npz")
+            simulation.trace.save(path)
+            trace = Trace.load(path)
+
+        self.assertEqual(simulation.trace.assets, trace.assets)
+        fi = trace.evaluate(FIReached(0.04))
+        config = configs.make_config(strategies(), [FIReached(0.04)], 0.5, end_year=2044.0, etf=stock())
+        reference = Simulation(config, progress=False)
+        reference.run()
+        self.assertEqual(reference.metrics[0].values, fi.values)
+        with self.assertRaises(ValueError):
+            trace.evaluate(Recorded(TotalAssets()))
+
+    def test_sink_runs_skip_the_trace(self):
+        entries = []
+        config = configs.make_config(strategies(), [TotalAssets()], 0.5, end_year=2044.0, etf=stock())
+        simulation = Simulation(config, progress=False, sink=lambda metric, entry: entries.append(entry))
+        simulation.run()
+        self.assertEqual(40, len(entries))
+        self.assertEqual(0, simulation.trace.n_rows)
+
+    def test_subclasses_overriding_calculate_are_recorded(self):
+        class Doubled(TotalAssets):
+            def calculate(self, portfolio: Portfolio):
+                return 2 * portfolio.current_value()
+
+        self.assertFalse(Doubled.derivable)
+        config = configs.make_config(strategies(), [Doubled()], 0.5, end_year=2044.0, etf=stock())
+        doubled = Simulation(config, progress=False)
+        doubled.run()
+        config = configs.make_config(strategies(), [TotalAssets()], 0.5, end_year=2044.0, etf=stock())
+        reference = Simulation(config, progress=False)
+        reference.run()
+        np.testing.assert_allclose(
+            2 * np.array([entry["value"] for entry in reference.metrics[0].values]),
+            [entry["value"] for entry in doubled.metrics[0].values],
+        )